@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 
 import certifi
 
@@ -9,28 +10,40 @@ from dotenv import load_dotenv
 
 load_dotenv()
 mongo_db_url = os.getenv("MONGO_DB_URL")
-print(mongo_db_url)
 import pymongo
 from networksecurity.exception.exception import NetworkSecurityException
-from networksecurity.logging.logger import logging
+from networksecurity.logging.logger import logging, timed_stage
+from networksecurity.serving.metrics import (
+    CONTENT_TYPE_LATEST,
+    generate_metrics,
+    get_route_path,
+    hide_metrics_dir,
+    record_prediction,
+    record_request,
+    track_in_flight,
+)
 from networksecurity.pipeline.training_pipeline import TrainingPipeline
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, File, UploadFile, Request
-from uvicorn import run as app_run
 from fastapi.responses import Response
 from starlette.responses import RedirectResponse
 import pandas as pd
 
-from networksecurity.utils.main_utils.utils import load_object
-
-from networksecurity.utils.ml_utils.model.estimator import NetworkModel
 
-
-client = pymongo.MongoClient(mongo_db_url, tlsCAFile=ca)
+# connect lazily: the serving workers are forked and must not inherit the client's threads
+client = pymongo.MongoClient(mongo_db_url, tlsCAFile=ca, connect=False)
 
 from networksecurity.constant.training_pipeline import DATA_INGESTION_COLLECTION_NAME
 from networksecurity.constant.training_pipeline import DATA_INGESTION_DATABASE_NAME
+from networksecurity.constant.training_pipeline import MODEL_DISTILLATION_FIDELITY_THRESHOLD
+from networksecurity.constant.training_pipeline import (
+    SERVING_HOST,
+    SERVING_MODEL_DIR,
+    SERVING_NUM_WORKERS,
+    SERVING_PORT,
+)
+from networksecurity.serving.prefork import ModelCache, serve
 
 database = client[DATA_INGESTION_DATABASE_NAME]
 collection = database[DATA_INGESTION_COLLECTION_NAME]
@@ -51,16 +64,51 @@ from fastapi.templating import Jinja2Templates
 templates = Jinja2Templates(directory="./templates")
 
 
+@app.middleware("http")
+async def log_request_duration(request: Request, call_next):
+    with timed_stage("request", method=request.method, route=request.url.path) as request_timing:
+        response = await call_next(request)
+        request_timing.fields["status_code"] = response.status_code
+        return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        with track_in_flight():
+            response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        record_request(
+            request.method, get_route_path(app.routes, request.scope), status_code,
+            time.perf_counter() - start,
+        )
+
+model_cache = ModelCache(
+    SERVING_MODEL_DIR, fidelity_threshold=MODEL_DISTILLATION_FIDELITY_THRESHOLD, mmap_mode="r"
+)
+
+
 @app.get("/", tags=["authentication"])
 async def index():
     return RedirectResponse(url="/docs")
 
 
+@app.get("/metrics")
+async def metrics_route():
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/train")
 async def train_route():
     try:
-        train_pipeline = TrainingPipeline()
-        train_pipeline.run_pipeline()
+        # the metrics directory belongs to the serving processes, not to the training workers
+        with hide_metrics_dir():
+            train_pipeline = TrainingPipeline()
+            train_pipeline.run_pipeline()
         return Response("Training is successful")
     except Exception as e:
         raise NetworkSecurityException(e, sys)
@@ -71,14 +119,11 @@ async def predict_route(request: Request, file: UploadFile = File(...)):
     try:
         df = pd.read_csv(file.file)
         # print(df)
-        preprocesor = load_object("final_model/preprocessor.pkl")
-        final_model = load_object("final_model/model.pkl")
-        network_model = NetworkModel(preprocessor=preprocesor, model=final_model)
-        print(df.iloc[0])
-        y_pred = network_model.predict(df)
-        print(y_pred)
+        network_model = model_cache.get()
+        y_pred, timings = network_model.predict_with_timings(df)
+        record_prediction(len(df), timings)
         df["predicted_column"] = y_pred
-        print(df["predicted_column"])
+        logging.debug(f"Predicted {len(df)} rows")
         # df['predicted_column'].replace(-1, 0)
         # return df.to_json()
         df.to_csv("prediction_output/output.csv")
@@ -93,4 +138,10 @@ async def predict_route(request: Request, file: UploadFile = File(...)):
 
 
 if __name__ == "__main__":
-    app_run(app, host="0.0.0.0", port=8000)
+    serve(
+        app,
+        host=SERVING_HOST,
+        port=SERVING_PORT,
+        num_workers=int(os.getenv("SERVING_NUM_WORKERS", SERVING_NUM_WORKERS)),
+        model_cache=model_cache,
+    )
@@ -0,0 +1,99 @@
+"""
+Load test for the /predict route of the serving app.
+
+Posts a csv file from n_clients concurrent clients for a fixed duration and reports the
+aggregate throughput and latency percentiles. With --server-pid (the pid of app.py) it also
+reports the memory of every serving process: RSS, USS (memory private to the process) and
+PSS (RSS with pages shared copy-on-write split between the processes sharing them).
+
+    SERVING_NUM_WORKERS=4 python app.py &
+    python benchmarks/load_test.py --csv valid_data/test.csv --server-pid $!
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import psutil
+import requests
+
+
+def _client(url, payload, deadline, latencies, errors):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.post(url, files={"file": ("input.csv", payload, "text/csv")})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException:
+            errors.append(1)
+
+
+def get_server_memory(server_pid):
+    parent = psutil.Process(server_pid)
+    memory = {}
+    for process in [parent] + parent.children():
+        info = process.memory_full_info()
+        memory[process.pid] = {
+            "rss_mb": info.rss / 2**20,
+            "uss_mb": info.uss / 2**20,
+            "pss_mb": getattr(info, "pss", info.rss) / 2**20,
+        }
+    return memory
+
+
+def run_load_test(url, payload, n_clients, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    clients = [
+        threading.Thread(target=_client, args=(url, payload, deadline, latencies, errors))
+        for _ in range(n_clients)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000/predict")
+    parser.add_argument("--csv", required=True, help="csv file with the feature columns")
+    parser.add_argument("--rows", type=int, default=None, help="only send the first N rows")
+    parser.add_argument("--n-clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--server-pid", type=int, default=None)
+    parser.add_argument("--output", default=None, help="optional json file for the results")
+    args = parser.parse_args()
+
+    with open(args.csv, "rb") as file_obj:
+        lines = file_obj.read().splitlines(keepends=True)
+    payload = b"".join(lines if args.rows is None else lines[: args.rows + 1])
+
+    results = run_load_test(args.url, payload, args.n_clients, args.duration)
+    if args.server_pid is not None:
+        results["server_memory"] = get_server_memory(args.server_pid)
+        results["server_pss_mb_total"] = sum(
+            memory["pss_mb"] for memory in results["server_memory"].values()
+        )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
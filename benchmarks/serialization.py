@@ -0,0 +1,119 @@
+"""
+Compares cold-load time and per-worker memory of pickle against the memory-mappable
+joblib format used by save_object/load_object.
+
+Every format is saved once, then loaded by n_workers fresh processes at the same time.
+Each worker reports its load time, RSS, USS (memory private to the process) and PSS
+(RSS with shared pages split between the processes sharing them).
+
+    python benchmarks/serialization.py --model-dir final_model --n-workers 4
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import psutil
+
+from networksecurity.utils.main_utils.utils import load_object, save_object
+
+FORMATS = {
+    "pickle": {},
+    "joblib": {"mmap_mode": None},
+    "joblib_mmap": {"mmap_mode": "r"},
+    "joblib_compressed": {"compress": 3},
+}
+
+
+def _save(file_path, obj, fmt):
+    if fmt == "pickle":
+        with open(file_path, "wb") as file_obj:
+            pickle.dump(obj, file_obj)
+    else:
+        save_object(file_path, obj, compress=FORMATS[fmt].get("compress", 0))
+
+
+def _load(file_path, fmt):
+    if fmt == "pickle":
+        with open(file_path, "rb") as file_obj:
+            return pickle.load(file_obj)
+    return load_object(file_path, mmap_mode=FORMATS[fmt].get("mmap_mode"))
+
+
+def _worker(file_paths, fmt, modules, start_barrier, done_barrier, results):
+    # import the estimator modules up front so only deserialization is timed
+    for module in modules:
+        importlib.import_module(module)
+    start_barrier.wait()
+    start = time.perf_counter()
+    objects = [_load(file_path, fmt) for file_path in file_paths]
+    load_time = time.perf_counter() - start
+    memory = psutil.Process().memory_full_info()
+    results.put({
+        "load_time_s": load_time,
+        "rss_mb": memory.rss / 2**20,
+        "uss_mb": memory.uss / 2**20,
+        "pss_mb": getattr(memory, "pss", memory.rss) / 2**20,
+    })
+    # stay alive until every worker is measured, so shared pages are split between all of them
+    done_barrier.wait()
+    del objects
+
+
+def benchmark_format(file_paths, fmt, n_workers, modules=()):
+    ctx = multiprocessing.get_context("spawn")
+    start_barrier, done_barrier = ctx.Barrier(n_workers), ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker, args=(file_paths, fmt, modules, start_barrier, done_barrier, results))
+        for _ in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    worker_results = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return {
+        "file_size_mb": sum(os.path.getsize(file_path) for file_path in file_paths) / 2**20,
+        "load_time_s": max(result["load_time_s"] for result in worker_results),
+        "rss_mb_per_worker": sum(result["rss_mb"] for result in worker_results) / n_workers,
+        "uss_mb_per_worker": sum(result["uss_mb"] for result in worker_results) / n_workers,
+        "pss_mb_total": sum(result["pss_mb"] for result in worker_results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-dir", default="final_model")
+    parser.add_argument("--files", nargs="+", default=["preprocessor.pkl", "model.pkl"])
+    parser.add_argument("--n-workers", type=int, default=4)
+    parser.add_argument("--output", default=None, help="optional json file for the results")
+    args = parser.parse_args()
+
+    objects = [load_object(os.path.join(args.model_dir, name)) for name in args.files]
+    modules = [
+        module for module in sys.modules
+        if module.split(".")[0] in ("numpy", "scipy", "sklearn", "xgboost", "networksecurity")
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in FORMATS:
+            file_paths = [os.path.join(tmp_dir, f"{fmt}_{name}") for name in args.files]
+            for file_path, obj in zip(file_paths, objects):
+                _save(file_path, obj, fmt)
+            results[fmt] = benchmark_format(file_paths, fmt, args.n_workers, modules)
+            print(fmt, json.dumps(results[fmt]), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
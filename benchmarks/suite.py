@@ -0,0 +1,303 @@
+"""
+Benchmarks the main pipeline and serving paths on synthetic data at several scales.
+
+Data comes from benchmarks/synthetic_data.py, so a run is reproducible from its seed.
+Every benchmark is repeated and the median wall time, CPU time and rows per second are
+saved as JSON with the environment and git commit, to compare runs with --baseline.
+Benchmarks run in a temporary working directory, the project's artifacts are not touched.
+
+    python benchmarks/suite.py --rows 10000 100000 1000000
+    python benchmarks/suite.py --rows 100000 --benchmarks drift predict_batch --baseline old.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from networksecurity.components.data_ingestion import DataIngestion
+from networksecurity.components.data_transformation import DataTransformation
+from networksecurity.components.data_validation import DataValidation
+from networksecurity.constant.training_pipeline import SCHEMA_FILE_PATH, TARGET_COLUMN
+from networksecurity.entity.artifact_entity import DataValidationArtifact
+from networksecurity.entity.config_entity import (
+    DataIngestionConfig,
+    DataTransformationConfig,
+    DataValidationConfig,
+    TrainingPipelineConfig,
+)
+from networksecurity.utils.main_utils.utils import evaluate_models, get_peak_rss_mb
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+from synthetic_data import REFERENCE_FILE_PATH, get_generator
+
+## a small search, so evaluate_models stays tractable at the large scales
+SEARCH_MODELS = {
+    "Decision Tree": lambda: DecisionTreeClassifier(random_state=0),
+    "Logistic Regression": lambda: LogisticRegression(max_iter=200),
+}
+SEARCH_PARAMS = {
+    "Decision Tree": {"criterion": ["gini", "entropy"], "max_depth": [8, 16]},
+    "Logistic Regression": {"C": [0.1, 1.0]},
+}
+## rows the serving model is fitted on, prediction cost does not depend on it much
+PREDICT_FIT_ROWS = 100_000
+SINGLE_ROW_CALLS = 200
+
+
+class FakeCollection:
+    """Stands in for a pymongo collection; find() decodes one document per row like a cursor"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def find(self):
+        columns = list(self.df.columns)
+        for i, row in enumerate(self.df.itertuples(index=False, name=None)):
+            yield {"_id": i, **dict(zip(columns, map(int, row)))}
+
+
+class FakeMongoClient:
+    def __init__(self, collections: dict):
+        self.collections = collections
+
+    def __getitem__(self, database_name):
+        return self.collections
+
+
+def _run(func, repeats):
+    wall_times, cpu_times = [], []
+    for _ in range(repeats):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        func()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+    return {
+        "wall_time_s": float(np.median(wall_times)),
+        "min_wall_time_s": float(min(wall_times)),
+        "cpu_time_s": float(np.median(cpu_times)),
+        "wall_times_s": wall_times,
+    }
+
+
+class BenchmarkData:
+    """Synthetic data of one scale, also written as train and test csv files to the working directory"""
+
+    def __init__(self, df: pd.DataFrame, test_ratio: float = 0.2):
+        self.df = df
+        n_test = int(len(df) * test_ratio)
+        self.train_df, self.test_df = df.iloc[n_test:], df.iloc[:n_test]
+        self.train_file_path = os.path.abspath(f"train_{len(df)}.csv")
+        self.test_file_path = os.path.abspath(f"test_{len(df)}.csv")
+        self.train_df.to_csv(self.train_file_path, index=False)
+        self.test_df.to_csv(self.test_file_path, index=False)
+
+    def get_xy(self, df):
+        return (
+            df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64),
+            df[TARGET_COLUMN].replace(-1, 0).to_numpy(dtype=np.float64),
+        )
+
+
+def bench_ingestion(data, args):
+    data_ingestion = DataIngestion(DataIngestionConfig(TrainingPipelineConfig()))
+    config = data_ingestion.data_ingestion_config
+    data_ingestion.mongo_client = FakeMongoClient({config.collection_name: FakeCollection(data.df)})
+    return len(data.df), _run(data_ingestion.export_collection_as_dataframe, args.repeats)
+
+
+def bench_drift(data, args):
+    data_validation = DataValidation(
+        data_ingestion_artifact=None,
+        data_validation_config=DataValidationConfig(TrainingPipelineConfig()),
+    )
+    return len(data.df), _run(
+        lambda: data_validation.detect_dataset_drift(data.train_df, data.test_df), args.repeats
+    )
+
+
+def bench_transformation(data, args):
+    data_transformation = DataTransformation(
+        data_validation_artifact=DataValidationArtifact(
+            validation_status=True,
+            valid_train_file_path=data.train_file_path,
+            valid_test_file_path=data.test_file_path,
+            invalid_train_file_path=None,
+            invalid_test_file_path=None,
+            drift_report_file_path=None,
+        ),
+        data_transformation_config=DataTransformationConfig(TrainingPipelineConfig()),
+    )
+    return len(data.df), _run(data_transformation.initiate_data_transformation, args.repeats)
+
+
+def bench_evaluate_models(data, args):
+    x_train, y_train = data.get_xy(data.train_df)
+    x_test, y_test = data.get_xy(data.test_df)
+
+    def search():
+        evaluate_models(
+            X_train=x_train, y_train=y_train, X_test=x_test, y_test=y_test,
+            models={name: make_model() for name, make_model in SEARCH_MODELS.items()},
+            param=SEARCH_PARAMS, n_jobs=args.n_jobs,
+        )
+
+    return len(data.train_df), _run(search, args.repeats)
+
+
+def _get_network_model(data):
+    fit_df = data.train_df.iloc[:PREDICT_FIT_ROWS]
+    x_fit = fit_df.drop(columns=[TARGET_COLUMN])
+    preprocessor = DataTransformation(None, None).get_data_transformer_object().fit(x_fit)
+    model = DecisionTreeClassifier(random_state=0).fit(
+        preprocessor.transform(x_fit), fit_df[TARGET_COLUMN].replace(-1, 0)
+    )
+    return NetworkModel(preprocessor=preprocessor, model=model)
+
+
+def bench_predict_single_row(data, args):
+    network_model = _get_network_model(data)
+    x_test = data.test_df.drop(columns=[TARGET_COLUMN])
+    rows = [x_test.iloc[i % len(x_test): i % len(x_test) + 1] for i in range(SINGLE_ROW_CALLS)]
+    latencies = []
+
+    def predict_rows():
+        for row in rows:
+            start = time.perf_counter()
+            network_model.predict(row)
+            latencies.append(time.perf_counter() - start)
+
+    result = _run(predict_rows, args.repeats)
+    result["p50_ms"] = float(np.percentile(latencies, 50) * 1000)
+    result["p99_ms"] = float(np.percentile(latencies, 99) * 1000)
+    return SINGLE_ROW_CALLS, result
+
+
+def bench_predict_batch(data, args):
+    network_model = _get_network_model(data)
+    x_test = data.test_df.drop(columns=[TARGET_COLUMN])
+    return len(x_test), _run(lambda: network_model.predict(x_test), args.repeats)
+
+
+BENCHMARKS = {
+    "ingestion": bench_ingestion,
+    "drift": bench_drift,
+    "transformation": bench_transformation,
+    "evaluate_models": bench_evaluate_models,
+    "predict_single_row": bench_predict_single_row,
+    "predict_batch": bench_predict_batch,
+}
+
+
+def get_environment():
+    try:
+        git_commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+    return {
+        "git_commit": git_commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+
+
+def compare(results, baseline):
+    """Wall time of every benchmark relative to the same benchmark and scale in baseline"""
+    baseline_times = {
+        (result["benchmark"], result["rows"]): result["wall_time_s"] for result in baseline["results"]
+    }
+    for result in results:
+        key = (result["benchmark"], result["rows"])
+        if key in baseline_times:
+            ratio = result["wall_time_s"] / baseline_times[key]
+            print(f"{result['benchmark']:>20} {result['rows']:>10}: {ratio:.2f}x baseline time",
+                  file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="scales to run, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n-jobs", type=int, default=None, help="cores for evaluate_models")
+    parser.add_argument("--reference", default=REFERENCE_FILE_PATH)
+    parser.add_argument("--output", default=None,
+                        help="json file for the results, benchmark_results/<timestamp>.json by default")
+    parser.add_argument("--baseline", default=None, help="earlier results to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(
+        args.output or os.path.join("benchmark_results", f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    )
+    generator = get_generator(args.reference, SCHEMA_FILE_PATH)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "environment": get_environment(),
+        "results": [],
+    }
+
+    # the components write their artifacts relative to the working directory
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="networksecurity-benchmarks-")
+    shutil.copytree(os.path.dirname(SCHEMA_FILE_PATH), os.path.join(work_dir, os.path.dirname(SCHEMA_FILE_PATH)))
+    os.chdir(work_dir)
+    try:
+        for n_rows in args.rows:
+            data = BenchmarkData(generator.generate(n_rows, seed=args.seed))
+            for name in args.benchmarks:
+                start_peak_rss_mb = get_peak_rss_mb()
+                rows, result = BENCHMARKS[name](data, args)
+                process_peak_rss_mb = get_peak_rss_mb()
+                result = {
+                    "benchmark": name,
+                    "rows": n_rows,
+                    "rows_processed": rows,
+                    "rows_per_second": rows / result["wall_time_s"] if result["wall_time_s"] else None,
+                    **result,
+                    # the peak RSS only grows over the process lifetime, so a benchmark that
+                    # stays below an earlier peak adds 0
+                    "peak_rss_increase_mb": process_peak_rss_mb - start_peak_rss_mb,
+                    "process_peak_rss_mb": process_peak_rss_mb,
+                }
+                report["results"].append(result)
+                rows_per_second = result["rows_per_second"]
+                throughput = f"{rows_per_second:,.0f} rows/s" if rows_per_second is not None else "n/a rows/s"
+                print(f"{name:>20} {n_rows:>10}: {result['wall_time_s']:.3f}s {throughput}", file=sys.stderr)
+            del data
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            compare(report["results"], json.load(file_obj))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Generates synthetic phishing data with the columns of data_schema/schema.yaml.
+
+Every column of the reference data takes a few values (-1, 0, 1). The target is drawn
+from its empirical distribution and every feature from its empirical distribution given
+the target, so the marginal value frequencies and the signal the models learn from are
+kept. The same seed always gives the same rows, at any scale.
+
+    python benchmarks/synthetic_data.py --rows 1000000 --output synthetic.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from networksecurity.constant.training_pipeline import TARGET_COLUMN
+
+REFERENCE_FILE_PATH = os.path.join("Network_Data", "phisingData.csv")
+SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
+CHUNK_SIZE = 1_000_000
+
+
+def read_schema_columns(schema_file_path: str = SCHEMA_FILE_PATH) -> list:
+    with open(schema_file_path) as schema_file:
+        schema = yaml.safe_load(schema_file)
+    return [name for column in schema["columns"] for name in column]
+
+
+class TernaryDataGenerator:
+    """
+    Samples rows from the target distribution and the per class value distributions of
+    every feature, fitted on a reference dataframe
+    """
+
+    def __init__(self, columns: list, target_column: str = TARGET_COLUMN):
+        self.columns = columns
+        self.target_column = target_column
+        self.feature_columns = [column for column in columns if column != target_column]
+        self.classes = None
+        self.class_probabilities = None
+        # column -> (values, cumulative probabilities with one row per class)
+        self.feature_distributions = {}
+
+    def fit(self, reference_df: pd.DataFrame) -> "TernaryDataGenerator":
+        missing = set(self.columns) - set(reference_df.columns)
+        if missing:
+            raise ValueError(f"Reference data has no column {sorted(missing)}")
+        target = reference_df[self.target_column]
+        class_frequencies = target.value_counts(normalize=True).sort_index()
+        self.classes = class_frequencies.index.to_numpy()
+        self.class_probabilities = class_frequencies.to_numpy()
+        for column in self.feature_columns:
+            frequencies = pd.crosstab(target, reference_df[column], normalize="index")
+            frequencies = frequencies.reindex(self.classes).fillna(0.0)
+            self.feature_distributions[column] = (
+                frequencies.columns.to_numpy(),
+                np.cumsum(frequencies.to_numpy(), axis=1),
+            )
+        return self
+
+    def _generate_chunk(self, rng, n_rows):
+        class_index = rng.choice(len(self.classes), size=n_rows, p=self.class_probabilities)
+        data = {}
+        for column in self.columns:
+            if column == self.target_column:
+                data[column] = self.classes[class_index].astype(np.int8)
+                continue
+            values, cumulative = self.feature_distributions[column]
+            # inverse CDF of the row's class, vectorised over the rows
+            value_index = (rng.random(n_rows)[:, None] >= cumulative[class_index]).sum(axis=1)
+            data[column] = values[np.minimum(value_index, len(values) - 1)].astype(np.int8)
+        return pd.DataFrame(data, columns=self.columns)
+
+    def generate(self, n_rows: int, seed: int = 0) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        chunks = [
+            self._generate_chunk(rng, min(CHUNK_SIZE, n_rows - start))
+            for start in range(0, n_rows, CHUNK_SIZE)
+        ]
+        if not chunks:
+            return self._generate_chunk(rng, 0)
+        return pd.concat(chunks, ignore_index=True)
+
+
+def get_generator(reference_file_path: str = REFERENCE_FILE_PATH,
+                  schema_file_path: str = SCHEMA_FILE_PATH) -> TernaryDataGenerator:
+    generator = TernaryDataGenerator(read_schema_columns(schema_file_path))
+    return generator.fit(pd.read_csv(reference_file_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reference", default=REFERENCE_FILE_PATH)
+    parser.add_argument("--schema", default=SCHEMA_FILE_PATH)
+    parser.add_argument("--output", required=True, help="csv file to write")
+    args = parser.parse_args()
+
+    df = get_generator(args.reference, args.schema).generate(args.rows, seed=args.seed)
+    df.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
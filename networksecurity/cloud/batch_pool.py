@@ -0,0 +1,172 @@
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from datetime import timedelta
+
+from networksecurity.constant.training_pipeline import (
+    BATCH_PREDICTION_CONTAINER_IMAGE,
+    BATCH_PREDICTION_POOL_AUTO_SCALE_INTERVAL_MINUTES,
+    BATCH_PREDICTION_POOL_ID,
+    BATCH_PREDICTION_POOL_MAX_NODES,
+    BATCH_PREDICTION_POOL_TASK_SLOTS_PER_NODE,
+    BATCH_PREDICTION_POOL_VM_SIZE,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+SPEC_HASH_METADATA_NAME = "spec_hash"
+
+
+def get_target_nodes(pending_tasks: int, max_nodes: int, task_slots_per_node: int) -> int:
+    """
+    Number of nodes the auto-scale formula of the pool asks for: enough task slots for the
+    pending tasks, capped at max_nodes, and 0 once nothing is pending.
+    """
+    return min(max_nodes, math.ceil(max(pending_tasks, 0) / task_slots_per_node))
+
+
+def build_auto_scale_formula(max_nodes: int, task_slots_per_node: int, interval_minutes: int) -> str:
+    """Azure Batch auto-scale formula implementing get_target_nodes on the pending task count"""
+    return (
+        f"$samples = $PendingTasks.GetSamplePercent(TimeInterval_Minute * {interval_minutes});\n"
+        f"$tasks = $samples < 70 ? max(0, $PendingTasks.GetSample(1)) : "
+        f"max($PendingTasks.GetSample(1), avg($PendingTasks.GetSample(TimeInterval_Minute * {interval_minutes})));\n"
+        f"$TargetDedicatedNodes = min({max_nodes}, ceil($tasks / {task_slots_per_node}));\n"
+        f"$NodeDeallocationOption = taskcompletion;"
+    )
+
+
+def _get_pool_metadata(pool, name):
+    for item in getattr(pool, "metadata", None) or []:
+        item_name = item["name"] if isinstance(item, dict) else item.name
+        if item_name == name:
+            return item["value"] if isinstance(item, dict) else item.value
+    return None
+
+
+def decide_pool_action(pool, spec_hash: str) -> str:
+    """
+    What to do with the existing pool before submitting a job.
+
+    Returns:
+        "create" if there is no pool, "wait" while it is being deleted, "recreate" if it was
+        built from a different spec (e.g. a new container image), otherwise "reuse"
+    """
+    if pool is None:
+        return "create"
+    if pool.state == "deleting":
+        return "wait"
+    if _get_pool_metadata(pool, SPEC_HASH_METADATA_NAME) != spec_hash:
+        return "recreate"
+    return "reuse"
+
+
+class BatchPoolRegistry:
+    """
+    Keeps one warm Azure Batch pool for all prediction jobs. The pool is created on first use
+    and reused while its spec is unchanged, scales with the pending tasks and down to zero
+    nodes when idle, and is only deleted by an explicit teardown.
+    """
+
+    def __init__(self, batch_client, pool_id=BATCH_PREDICTION_POOL_ID,
+                 vm_size=BATCH_PREDICTION_POOL_VM_SIZE,
+                 container_image=None,
+                 max_nodes=BATCH_PREDICTION_POOL_MAX_NODES,
+                 task_slots_per_node=BATCH_PREDICTION_POOL_TASK_SLOTS_PER_NODE,
+                 auto_scale_interval_minutes=BATCH_PREDICTION_POOL_AUTO_SCALE_INTERVAL_MINUTES,
+                 sleep=time.sleep):
+        try:
+            self.batch_client = batch_client
+            self.pool_id = pool_id
+            self.vm_size = vm_size
+            self.container_image = container_image or os.getenv(
+                "AZURE_BATCH_CONTAINER_IMAGE", BATCH_PREDICTION_CONTAINER_IMAGE
+            )
+            self.max_nodes = max_nodes
+            self.task_slots_per_node = task_slots_per_node
+            self.auto_scale_interval_minutes = auto_scale_interval_minutes
+            self._sleep = sleep
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_pool_spec(self) -> dict:
+        """Pool definition without the id and metadata, which are derived from it"""
+        return {
+            'vm_size': self.vm_size,
+            'task_slots_per_node': self.task_slots_per_node,
+            'virtual_machine_configuration': {
+                'image_reference': {
+                    'publisher': 'microsoft-azure-batch',
+                    'offer': 'ubuntu-server-container',
+                    'sku': '20-04-lts',
+                    'version': 'latest'
+                },
+                'node_agent_sku_id': 'batch.node.ubuntu 20.04',
+                # the image is pulled when a node joins the pool, so tasks start right away
+                'container_configuration': {
+                    'type': 'dockerCompatible',
+                    'container_image_names': [self.container_image],
+                },
+            },
+            'enable_auto_scale': True,
+            'auto_scale_formula': build_auto_scale_formula(
+                self.max_nodes, self.task_slots_per_node, self.auto_scale_interval_minutes
+            ),
+            'auto_scale_evaluation_interval': timedelta(minutes=self.auto_scale_interval_minutes),
+        }
+
+    def get_spec_hash(self) -> str:
+        spec = json.dumps(self.get_pool_spec(), sort_keys=True, default=str)
+        return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+    def get_task_container_settings(self) -> dict:
+        return {'image_name': self.container_image}
+
+    def _get_pool(self):
+        if not self.batch_client.pool.exists(self.pool_id):
+            return None
+        return self.batch_client.pool.get(self.pool_id)
+
+    def _create_pool(self, spec_hash):
+        pool = {
+            'id': self.pool_id,
+            **self.get_pool_spec(),
+            'metadata': [{'name': SPEC_HASH_METADATA_NAME, 'value': spec_hash}],
+        }
+        self.batch_client.pool.add(pool)
+        logging.info(f"Created batch pool {self.pool_id} with image {self.container_image}")
+
+    def get_or_create_pool(self, poll_interval: float = 10.0) -> str:
+        """
+        Returns the id of a pool matching the current spec, reusing the existing pool if it
+        matches and creating or recreating it otherwise.
+        """
+        try:
+            spec_hash = self.get_spec_hash()
+            while True:
+                action = decide_pool_action(self._get_pool(), spec_hash)
+                if action == "reuse":
+                    logging.info(f"Reusing batch pool {self.pool_id}")
+                    return self.pool_id
+                if action == "create":
+                    self._create_pool(spec_hash)
+                    return self.pool_id
+                if action == "recreate":
+                    logging.info(f"Batch pool {self.pool_id} was built from an older spec, recreating it")
+                    self.batch_client.pool.delete(self.pool_id)
+                # pool ids can only be reused once the deletion has finished
+                self._sleep(poll_interval)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def teardown(self) -> None:
+        """Deletes the pool; the next job creates a new one"""
+        try:
+            if self.batch_client.pool.exists(self.pool_id):
+                self.batch_client.pool.delete(self.pool_id)
+                logging.info(f"Deleted batch pool {self.pool_id}")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
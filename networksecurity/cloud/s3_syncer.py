@@ -1,12 +1,255 @@
-
+import fnmatch
+import hashlib
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from networksecurity.constant.training_pipeline import (
+    S3_SYNC_EXCLUDE_PATTERNS,
+    S3_SYNC_MAX_CONCURRENCY,
+    S3_SYNC_MULTIPART_CHUNKSIZE,
+    S3_SYNC_MULTIPART_THRESHOLD,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+
+def get_s3_etag(file_path: str, multipart_threshold: int, multipart_chunksize: int) -> str:
+    """
+    ETag S3 gives an object uploaded from file_path with these multipart settings: the MD5 of
+    the file, or for multipart uploads the MD5 of the part MD5s followed by the part count.
+    """
+    if os.path.getsize(file_path) < multipart_threshold:
+        digest = hashlib.md5()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return f'"{digest.hexdigest()}"'
+    part_digests = []
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(multipart_chunksize), b""):
+            part_digests.append(hashlib.md5(chunk).digest())
+    return f'"{hashlib.md5(b"".join(part_digests)).hexdigest()}-{len(part_digests)}"'
 
 
 class S3Sync:
-    def sync_folder_to_s3(self,folder,aws_bucket_url):
-        command = f"aws s3 sync {folder} {aws_bucket_url} "
-        os.system(command)
+    """
+    Syncs local folders with S3 prefixes in-process with boto3. Files are transferred
+    concurrently, large files in multipart uploads, and files whose ETag already matches the
+    other side are skipped. Every sync returns and logs its byte and time stats.
+
+    max_concurrency bounds the open connections: it is split between the files transferred
+    at the same time and the parts transferred per file, so many small files get one
+    connection each and a single large file gets all of them.
+    """
+
+    def __init__(self, s3_client=None, max_concurrency=S3_SYNC_MAX_CONCURRENCY,
+                 multipart_threshold=S3_SYNC_MULTIPART_THRESHOLD,
+                 multipart_chunksize=S3_SYNC_MULTIPART_CHUNKSIZE):
+        self._s3_client = s3_client
+        self.max_concurrency = max_concurrency
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+
+    @property
+    def s3_client(self):
+        # created on first use, so constructing S3Sync needs neither boto3 nor credentials
+        if self._s3_client is None:
+            import boto3
+            from botocore.config import Config
+
+            self._s3_client = boto3.client(
+                "s3", config=Config(max_pool_connections=self.max_concurrency)
+            )
+        return self._s3_client
+
+    def get_concurrency(self, n_files: int):
+        """Files transferred at the same time and parts per file, within max_concurrency connections"""
+        file_concurrency = max(1, min(self.max_concurrency, n_files))
+        return file_concurrency, max(1, self.max_concurrency // file_concurrency)
+
+    def _get_transfer_config(self, max_concurrency):
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=max_concurrency,
+        )
+
+    @staticmethod
+    def _parse_bucket_url(aws_bucket_url):
+        url = urlparse(aws_bucket_url)
+        return url.netloc, url.path.strip("/")
+
+    def _list_remote_objects(self, bucket, prefix) -> dict:
+        objects = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=f"{prefix}/" if prefix else ""):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = obj
+        return objects
+
+    @staticmethod
+    def list_folder(folder) -> list:
+        """
+        Paths relative to folder of the files to upload, without the temporary files other
+        writers rename into place (see S3_SYNC_EXCLUDE_PATTERNS)
+        """
+        file_paths = []
+        for root, _, file_names in os.walk(folder):
+            for file_name in file_names:
+                if any(fnmatch.fnmatch(file_name, pattern) for pattern in S3_SYNC_EXCLUDE_PATTERNS):
+                    continue
+                file_paths.append(os.path.relpath(os.path.join(root, file_name), folder))
+        return file_paths
+
+    def _is_in_sync(self, file_path, remote_object) -> bool:
+        if remote_object is None or not os.path.exists(file_path):
+            return False
+        if remote_object["Size"] != os.path.getsize(file_path):
+            return False
+        return remote_object["ETag"] == get_s3_etag(
+            file_path, self.multipart_threshold, self.multipart_chunksize
+        )
+
+    def _run_transfers(self, transfers, transfer_file) -> dict:
+        """
+        Runs transfer_file(file_path, key, transfer_config) over the (file_path, key,
+        remote_object) transfers concurrently
+        """
+        stats = {"transferred_files": 0, "transferred_bytes": 0, "skipped_files": 0, "skipped_bytes": 0}
+        start = time.perf_counter()
+        file_concurrency, part_concurrency = self.get_concurrency(len(transfers))
+        transfer_config = self._get_transfer_config(part_concurrency)
+
+        def transfer(args):
+            file_path, key, remote_object = args
+            try:
+                if self._is_in_sync(file_path, remote_object):
+                    return False, os.path.getsize(file_path)
+                transfer_file(file_path, key, transfer_config)
+                return True, os.path.getsize(file_path)
+            except FileNotFoundError:
+                # the file was removed after it was listed
+                logging.info(f"{file_path} no longer exists, skipping it")
+                return False, 0
+
+        with ThreadPoolExecutor(max_workers=file_concurrency) as executor:
+            for transferred, size in executor.map(transfer, transfers):
+                prefix = "transferred" if transferred else "skipped"
+                stats[f"{prefix}_files"] += 1
+                stats[f"{prefix}_bytes"] += size
+        stats["elapsed_time"] = time.perf_counter() - start
+        stats["throughput_mb_per_s"] = stats["transferred_bytes"] / 2**20 / max(stats["elapsed_time"], 1e-9)
+        return stats
+
+    def sync_folder_to_s3(self,folder,aws_bucket_url,file_paths=None) -> dict:
+        """
+        Uploads the files of folder that differ from the objects under aws_bucket_url.
+        file_paths: paths relative to folder to upload instead of the folder's current files
+        """
+        try:
+            bucket, prefix = self._parse_bucket_url(aws_bucket_url)
+            remote_objects = self._list_remote_objects(bucket, prefix)
+            if file_paths is None:
+                file_paths = self.list_folder(folder)
+            transfers = []
+            for relative_path in file_paths:
+                key = "/".join(filter(None, [prefix, relative_path.replace(os.sep, "/")]))
+                transfers.append((os.path.join(folder, relative_path), key, remote_objects.get(key)))
+
+            stats = self._run_transfers(
+                transfers,
+                lambda file_path, key, transfer_config: self.s3_client.upload_file(
+                    file_path, bucket, key, Config=transfer_config
+                ),
+            )
+            logging.info(f"Synced {folder} to {aws_bucket_url}: {stats}")
+            return stats
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def sync_folder_from_s3(self,folder,aws_bucket_url) -> dict:
+        try:
+            bucket, prefix = self._parse_bucket_url(aws_bucket_url)
+            transfers = []
+            for key, remote_object in self._list_remote_objects(bucket, prefix).items():
+                file_path = os.path.join(folder, *key[len(prefix):].lstrip("/").split("/"))
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                transfers.append((file_path, key, remote_object))
+
+            def download(file_path, key, transfer_config):
+                self.s3_client.download_file(bucket, key, file_path, Config=transfer_config)
+
+            stats = self._run_transfers(transfers, download)
+            logging.info(f"Synced {aws_bucket_url} to {folder}: {stats}")
+            return stats
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+class BackgroundS3Sync:
+    """
+    Runs S3Sync.sync_folder_to_s3 calls from a background thread in the order they were
+    queued, so uploads overlap with whatever the caller does next. The files of a folder are
+    listed when the sync is queued, files written to it later belong to a later sync.
+    wait() blocks until the queued syncs are done and raises the first error.
+    """
+
+    def __init__(self, s3_sync: S3Sync):
+        try:
+            self.s3_sync = s3_sync
+            self.stats = []
+            self._queue = queue.Queue()
+            self._errors = []
+            self._thread = threading.Thread(target=self._worker, name="s3-sync", daemon=True)
+            self._thread.start()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    break
+                folder, aws_bucket_url, file_paths = task
+                self.stats.append(self.s3_sync.sync_folder_to_s3(folder, aws_bucket_url, file_paths))
+            except Exception as e:
+                logging.error(f"Background S3 sync failed: {e}")
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def sync_folder_to_s3(self, folder, aws_bucket_url, file_paths=None):
+        """
+        Queues a sync and returns immediately.
+        file_paths: paths relative to folder to upload, the folder's current files by default
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("BackgroundS3Sync is already closed")
+        if file_paths is None:
+            file_paths = self.s3_sync.list_folder(folder)
+        self._queue.put((folder, aws_bucket_url, list(file_paths)))
+
+    def wait(self):
+        """Blocks until every queued sync is done"""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """Waits for the queued syncs and stops the background thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_errors()
 
-    def sync_folder_from_s3(self,folder,aws_bucket_url):
-        command = f"aws s3 sync  {aws_bucket_url} {folder} "
-        os.system(command)
+    def _raise_errors(self):
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise errors[0]
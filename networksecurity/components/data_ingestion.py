@@ -11,6 +11,7 @@ from networksecurity.entity.artifact_entity import DataIngestionArtifact
 from networksecurity.entity.config_entity import DataIngestionConfig
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.pipeline_profiler import profile_step
 
 load_dotenv()
 
@@ -93,9 +94,13 @@ class DataIngestion:
 
     def initiate_data_ingestion(self):
         try:
-            dataframe = self.export_collection_as_dataframe()
-            dataframe = self.export_data_into_feature_store(dataframe)
-            self.split_data_as_train_test(dataframe)
+            with profile_step("mongo_export") as step:
+                dataframe = self.export_collection_as_dataframe()
+                step.rows = len(dataframe)
+            with profile_step("feature_store_export", rows=len(dataframe)):
+                dataframe = self.export_data_into_feature_store(dataframe)
+            with profile_step("train_test_split", rows=len(dataframe)):
+                self.split_data_as_train_test(dataframe)
             dataingestionartifact = DataIngestionArtifact(
                 trained_file_path=self.data_ingestion_config.training_file_path,
                 test_file_path=self.data_ingestion_config.testing_file_path,
@@ -16,6 +16,7 @@ from networksecurity.entity.artifact_entity import (
 from networksecurity.entity.config_entity import DataTransformationConfig
 from networksecurity.exception.exception import NetworkSecurityException 
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.pipeline_profiler import profile_step
 from networksecurity.utils.main_utils.utils import save_numpy_array_data,save_object
 
 class DataTransformation:
@@ -58,10 +59,128 @@ class DataTransformation:
         except Exception as e:
             raise NetworkSecurityException(e,sys)
 
-        
+
+    def sample_data(self, file_path):
+        """
+        Draws a uniform random sample of at most fit_sample_size rows while reading the
+        file in chunks. Every row gets a random key and the rows with the smallest keys are
+        kept, so memory is bounded by the sample size plus one chunk. The keys are drawn
+        from fit_sample_seed, so the same file always gives the same sample.
+
+        Args:
+          file_path: path of the validated csv file
+
+        Returns:
+          The sampled dataframe and the total number of rows in the file
+        """
+        try:
+            rng = np.random.default_rng(self.data_transformation_config.fit_sample_seed)
+            sample_size = self.data_transformation_config.fit_sample_size
+            sample = None
+            n_rows = 0
+            for chunk in pd.read_csv(file_path, chunksize=self.data_transformation_config.chunk_size):
+                n_rows += len(chunk)
+                chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+                sample = chunk if sample is None else pd.concat([sample, chunk])
+                sample = sample.nsmallest(sample_size, "_sample_key")
+            sample = sample.drop(columns=["_sample_key"]).sort_index()
+            return sample, n_rows
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def transform_data_in_chunks(self, preprocessor, file_path, n_rows, feature_file_path, target_file_path):
+        """
+        Transforms the validated csv chunk by chunk and writes features and target into
+        preallocated memory-mapped .npy files, so peak memory depends on the chunk size only.
+        """
+        try:
+            os.makedirs(os.path.dirname(feature_file_path), exist_ok=True)
+            features = None
+            target = np.lib.format.open_memmap(
+                target_file_path, mode="w+", dtype=np.float64, shape=(n_rows,)
+            )
+            if n_rows == 0:
+                # no chunks will be read, write empty arrays with the file's feature columns
+                n_features = len(pd.read_csv(file_path, nrows=0).columns.drop(TARGET_COLUMN))
+                np.save(feature_file_path, np.empty((0, n_features), dtype=np.float64))
+                del target
+                return
+            start = 0
+            for chunk in pd.read_csv(file_path, chunksize=self.data_transformation_config.chunk_size):
+                input_feature_df = chunk.drop(columns=[TARGET_COLUMN])
+                if features is None:
+                    features = np.lib.format.open_memmap(
+                        feature_file_path,
+                        mode="w+",
+                        dtype=np.float64,
+                        shape=(n_rows, input_feature_df.shape[1]),
+                    )
+                end = start + len(chunk)
+                features[start:end] = preprocessor.transform(input_feature_df)
+                target[start:end] = chunk[TARGET_COLUMN].replace(-1, 0).to_numpy()
+                start = end
+            features.flush()
+            target.flush()
+            del features, target
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def initiate_out_of_core_data_transformation(self)->DataTransformationArtifact:
+        logging.info("Entered initiate_out_of_core_data_transformation method of DataTransformation class")
+        try:
+            train_file_path = self.data_validation_artifact.valid_train_file_path
+            test_file_path = self.data_validation_artifact.valid_test_file_path
+
+            # Fit the preprocessor on a bounded sample of the training data
+            with profile_step("sample_data") as step:
+                train_sample_df, n_train_rows = self.sample_data(train_file_path)
+                step.rows = n_train_rows
+            logging.info(f"Fitting preprocessor on {len(train_sample_df)} of {n_train_rows} training rows")
+            with profile_step("fit_imputer", rows=len(train_sample_df)):
+                preprocessor=self.get_data_transformer_object()
+                preprocessor_object=preprocessor.fit(train_sample_df.drop(columns=[TARGET_COLUMN]))
+            del train_sample_df
+
+            n_test_rows = sum(len(chunk) for chunk in pd.read_csv(
+                test_file_path, chunksize=self.data_transformation_config.chunk_size, usecols=[TARGET_COLUMN]
+            ))
+
+            with profile_step("transform", rows=n_train_rows + n_test_rows):
+                self.transform_data_in_chunks(
+                    preprocessor_object,
+                    train_file_path,
+                    n_train_rows,
+                    self.data_transformation_config.transformed_train_file_path,
+                    self.data_transformation_config.transformed_train_target_file_path,
+                )
+                self.transform_data_in_chunks(
+                    preprocessor_object,
+                    test_file_path,
+                    n_test_rows,
+                    self.data_transformation_config.transformed_test_file_path,
+                    self.data_transformation_config.transformed_test_target_file_path,
+                )
+            save_object( self.data_transformation_config.transformed_object_file_path, preprocessor_object,)
+
+            save_object( "final_model/preprocessor.pkl", preprocessor_object,)
+
+            data_transformation_artifact=DataTransformationArtifact(
+                transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
+                transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+                transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path,
+            )
+            return data_transformation_artifact
+        except Exception as e:
+            raise NetworkSecurityException(e,sys)
+
     def initiate_data_transformation(self)->DataTransformationArtifact:
         logging.info("Entered initiate_data_transformation method of DataTransformation class")
         try:
+            if self.data_transformation_config.out_of_core:
+                return self.initiate_out_of_core_data_transformation()
+
             logging.info("Starting data transformation")
             train_df=DataTransformation.read_data(self.data_validation_artifact.valid_train_file_path)
             test_df=DataTransformation.read_data(self.data_validation_artifact.valid_test_file_path)
@@ -78,17 +197,25 @@ class DataTransformation:
 
             preprocessor=self.get_data_transformer_object()
 
-            preprocessor_object=preprocessor.fit(input_feature_train_df)
-            transformed_input_train_feature=preprocessor_object.transform(input_feature_train_df)
-            transformed_input_test_feature =preprocessor_object.transform(input_feature_test_df)
+            with profile_step("fit_imputer", rows=len(input_feature_train_df)):
+                preprocessor_object=preprocessor.fit(input_feature_train_df)
+            with profile_step("transform", rows=len(input_feature_train_df) + len(input_feature_test_df)):
+                transformed_input_train_feature=preprocessor_object.transform(input_feature_train_df)
+                transformed_input_test_feature =preprocessor_object.transform(input_feature_test_df)
              
 
-            train_arr = np.c_[transformed_input_train_feature, np.array(target_feature_train_df) ]
-            test_arr = np.c_[ transformed_input_test_feature, np.array(target_feature_test_df) ]
+            # features and target are kept as separate C-contiguous arrays so the
+            # model trainer can memory-map them without slicing out copies
+            train_arr = np.ascontiguousarray(transformed_input_train_feature, dtype=np.float64)
+            train_target_arr = np.ascontiguousarray(target_feature_train_df, dtype=np.float64)
+            test_arr = np.ascontiguousarray(transformed_input_test_feature, dtype=np.float64)
+            test_target_arr = np.ascontiguousarray(target_feature_test_df, dtype=np.float64)
 
             #save numpy array data
             save_numpy_array_data( self.data_transformation_config.transformed_train_file_path, array=train_arr, )
+            save_numpy_array_data( self.data_transformation_config.transformed_train_target_file_path, array=train_target_arr, )
             save_numpy_array_data( self.data_transformation_config.transformed_test_file_path,array=test_arr,)
+            save_numpy_array_data( self.data_transformation_config.transformed_test_target_file_path,array=test_target_arr,)
             save_object( self.data_transformation_config.transformed_object_file_path, preprocessor_object,)
 
             save_object( "final_model/preprocessor.pkl", preprocessor_object,)
@@ -99,7 +226,9 @@ class DataTransformation:
             data_transformation_artifact=DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+                transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path,
             )
             return data_transformation_artifact
 
@@ -12,6 +12,7 @@ from networksecurity.entity.artifact_entity import (
 from networksecurity.entity.config_entity import DataValidationConfig
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.pipeline_profiler import profile_step
 from networksecurity.utils.main_utils.utils import read_yaml_file, write_yaml_file
 
 
@@ -87,21 +88,25 @@ class DataValidation:
             train_file_path = self.data_ingestion_artifact.trained_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
 
-            train_dataframe = DataValidation.read_data(train_file_path)
-            test_dataframe = DataValidation.read_data(test_file_path)
+            with profile_step("read_data") as step:
+                train_dataframe = DataValidation.read_data(train_file_path)
+                test_dataframe = DataValidation.read_data(test_file_path)
+                n_rows = step.rows = len(train_dataframe) + len(test_dataframe)
 
             ## validate schema
-            train_schema_status = self.validate_schema(dataframe=train_dataframe)
-            if not train_schema_status:
-                logging.warning("Schema of train dataset is not correct!")
-            test_schema_status = self.validate_schema(dataframe=test_dataframe)
-            if not test_schema_status:
-                logging.warning("Schema of test dataset is not correct!")
+            with profile_step("schema_validation", rows=n_rows):
+                train_schema_status = self.validate_schema(dataframe=train_dataframe)
+                if not train_schema_status:
+                    logging.warning("Schema of train dataset is not correct!")
+                test_schema_status = self.validate_schema(dataframe=test_dataframe)
+                if not test_schema_status:
+                    logging.warning("Schema of test dataset is not correct!")
 
             ## Datadrift detection
-            datadrift_status = self.detect_dataset_drift(
-                base_df=train_dataframe, current_df=test_dataframe
-            )
+            with profile_step("ks_drift", rows=n_rows):
+                datadrift_status = self.detect_dataset_drift(
+                    base_df=train_dataframe, current_df=test_dataframe
+                )
             if not test_schema_status:
                 logging.warning("Datadrift was detected!", sys)
 
@@ -110,17 +115,18 @@ class DataValidation:
             )
             os.makedirs(dir_path, exist_ok=True)
 
-            train_dataframe.to_csv(
-                self.data_validation_config.valid_train_file_path,
-                index=False,
-                header=True,
-            )
+            with profile_step("write_valid_data", rows=n_rows):
+                train_dataframe.to_csv(
+                    self.data_validation_config.valid_train_file_path,
+                    index=False,
+                    header=True,
+                )
 
-            test_dataframe.to_csv(
-                self.data_validation_config.valid_test_file_path,
-                index=False,
-                header=True,
-            )
+                test_dataframe.to_csv(
+                    self.data_validation_config.valid_test_file_path,
+                    index=False,
+                    header=True,
+                )
 
             if (
                 not datadrift_status
@@ -0,0 +1,161 @@
+import os
+import sys
+from dataclasses import asdict
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from networksecurity.entity.artifact_entity import (
+    DataTransformationArtifact,
+    ModelDistillationArtifact,
+    ModelTrainerArtifact,
+)
+from networksecurity.entity.config_entity import ModelDistillationConfig
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.pipeline_profiler import profile_step
+from networksecurity.utils.main_utils.utils import (
+    get_file_checksum,
+    load_numpy_array_data,
+    load_object,
+    save_object,
+)
+from networksecurity.utils.ml_utils.metric.classification_metric import (
+    get_classification_score,
+)
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.profiler import profile_model
+
+
+class ModelDistillation:
+    def __init__(
+        self,
+        model_distillation_config: ModelDistillationConfig,
+        data_transformation_artifact: DataTransformationArtifact,
+        model_trainer_artifact: ModelTrainerArtifact,
+    ):
+        try:
+            self.model_distillation_config = model_distillation_config
+            self.data_transformation_artifact = data_transformation_artifact
+            self.model_trainer_artifact = model_trainer_artifact
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def get_student_models() -> dict:
+        return {
+            "Decision Tree": DecisionTreeClassifier(max_depth=8),
+            "Gradient Boosting": GradientBoostingClassifier(n_estimators=32, max_depth=3),
+            "Logistic Regression": LogisticRegression(max_iter=1000),
+        }
+
+    def distill(self, teacher, x_train, x_test, y_test):
+        """
+        Trains every student on the teacher's predictions and measures how often it agrees
+        with the teacher on the test set. Returns the fastest student that meets the fidelity
+        threshold, or the most faithful one if none does.
+        """
+        teacher_train_pred = teacher.predict(x_train)
+        teacher_test_pred = teacher.predict(x_test)
+
+        results = {}
+        for name, student in self.get_student_models().items():
+            student.fit(x_train, teacher_train_pred)
+            student_test_pred = student.predict(x_test)
+            agreement_rate = float(np.mean(student_test_pred == teacher_test_pred))
+            f1_score = get_classification_score(y_true=y_test, y_pred=student_test_pred).f1_score
+            profile = profile_model(
+                student, x_test, fit_time=0.0, f1_score=f1_score,
+                n_repeats=self.model_distillation_config.profile_n_repeats,
+            )
+            logging.info(f"Student {name}: agreement rate {agreement_rate:.4f}, profile {profile}")
+            results[name] = (student, agreement_rate, profile)
+
+        faithful = [
+            name
+            for name, (_, agreement_rate, _) in results.items()
+            if agreement_rate >= self.model_distillation_config.fidelity_threshold
+        ]
+        if faithful:
+            best_name = min(faithful, key=lambda name: results[name][2].single_row_p99_ms)
+        else:
+            best_name = max(results, key=lambda name: results[name][1])
+        return (best_name, *results[best_name])
+
+    def initiate_model_distillation(self) -> ModelDistillationArtifact:
+        try:
+            x_train = load_numpy_array_data(
+                self.data_transformation_artifact.transformed_train_file_path, mmap_mode="r"
+            )
+            x_test = load_numpy_array_data(
+                self.data_transformation_artifact.transformed_test_file_path, mmap_mode="r"
+            )
+            y_test = load_numpy_array_data(
+                self.data_transformation_artifact.transformed_test_target_file_path, mmap_mode="r"
+            )
+
+            teacher_network_model = load_object(self.model_trainer_artifact.trained_model_file_path)
+            teacher = teacher_network_model.model
+
+            with profile_step("distill", rows=len(x_train)):
+                surrogate_name, surrogate, agreement_rate, surrogate_profile = self.distill(
+                    teacher, x_train, x_test, y_test
+                )
+            teacher_profile = self.model_trainer_artifact.model_profiles.get(
+                self.model_trainer_artifact.selected_model_name
+            )
+            if teacher_profile is None:
+                teacher_profile = profile_model(
+                    teacher, x_test, fit_time=0.0,
+                    f1_score=self.model_trainer_artifact.test_metric_artifact.f1_score,
+                    n_repeats=self.model_distillation_config.profile_n_repeats,
+                )
+            meets_fidelity_threshold = (
+                agreement_rate >= self.model_distillation_config.fidelity_threshold
+            )
+
+            # Save both variants with their agreement rate and latency
+            teacher_network_model.metadata = {
+                "role": "teacher",
+                "model_name": self.model_trainer_artifact.selected_model_name,
+                "agreement_rate": 1.0,
+                **asdict(teacher_profile),
+            }
+            save_object(self.model_trainer_artifact.trained_model_file_path, teacher_network_model)
+
+            surrogate_network_model = NetworkModel(
+                preprocessor=teacher_network_model.preprocessor,
+                model=surrogate,
+                metadata={
+                    "role": "surrogate",
+                    "model_name": surrogate_name,
+                    "agreement_rate": agreement_rate,
+                    # ties the surrogate to the deployed model it was distilled from
+                    "teacher_checksum": get_file_checksum(
+                        self.model_distillation_config.deployed_model_file_path
+                    ),
+                    **asdict(surrogate_profile),
+                },
+            )
+            save_object(
+                self.model_distillation_config.surrogate_model_file_path, surrogate_network_model
+            )
+            save_object(
+                self.model_distillation_config.deployed_surrogate_model_file_path,
+                surrogate_network_model,
+            )
+
+            model_distillation_artifact = ModelDistillationArtifact(
+                surrogate_model_file_path=self.model_distillation_config.surrogate_model_file_path,
+                surrogate_model_name=surrogate_name,
+                agreement_rate=agreement_rate,
+                teacher_profile=teacher_profile,
+                surrogate_profile=surrogate_profile,
+                meets_fidelity_threshold=meets_fidelity_threshold,
+            )
+            logging.info(f"Model distillation artifact: {model_distillation_artifact}")
+            return model_distillation_artifact
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
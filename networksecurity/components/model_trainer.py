@@ -1,25 +1,43 @@
 import os
 import sys
+import time
+from dataclasses import asdict
+
+import numpy as np
 
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.pipeline_profiler import profile_step
 
 from networksecurity.entity.artifact_entity import (
     DataTransformationArtifact,
+    DataValidationArtifact,
     ModelTrainerArtifact,
 )
 from networksecurity.entity.config_entity import ModelTrainerConfig
 
 
 from networksecurity.utils.ml_utils.model.estimator import NetworkModel
-from networksecurity.utils.main_utils.utils import save_object, load_object
+from networksecurity.utils.ml_utils.model.profiler import profile_model, select_model
+from networksecurity.utils.main_utils.utils import (
+    save_object,
+    load_object,
+    read_yaml_file,
+    write_yaml_file,
+)
 from networksecurity.utils.main_utils.utils import (
     load_numpy_array_data,
+    save_numpy_array_data,
     evaluate_models,
+    get_peak_rss_mb,
+    get_row_hashes,
 )
 from networksecurity.utils.ml_utils.metric.classification_metric import (
     get_classification_score,
+    get_f1_scores,
+    get_r2_score,
 )
+from networksecurity.utils.ml_utils.tracking.mlflow_logger import AsyncMlflowLogger
 
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
@@ -30,10 +48,17 @@ from sklearn.ensemble import (
 )
 from xgboost import XGBClassifier
 import mlflow
-from urllib.parse import urlparse
+
+# the model families that can be retrained incrementally, by their names in the model search
+WARM_START_MODEL_NAMES = {
+    RandomForestClassifier: "Random Forest",
+    GradientBoostingClassifier: "Gradient Boosting",
+    XGBClassifier: "XGBoost",
+}
 
 # Configure MLflow
 mlflow.set_tracking_uri("file:///mlruns")
+mlflow.set_registry_uri("file:///mlruns")
 
 os.environ["MLFLOW_TRACKING_URI"] = "file:///mlruns"
 os.environ["MLFLOW_TRACKING_USERNAME"] = ""
@@ -45,45 +70,165 @@ class ModelTrainer:
         self,
         model_trainer_config: ModelTrainerConfig,
         data_transformation_artifact: DataTransformationArtifact,
+        data_validation_artifact: DataValidationArtifact = None,
+        mlflow_logger: AsyncMlflowLogger = None,
     ):
         try:
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.data_validation_artifact = data_validation_artifact
+            # Without a logger from the caller, the trainer owns one and flushes it when done
+            self._owns_mlflow_logger = mlflow_logger is None
+            self.mlflow_logger = mlflow_logger or AsyncMlflowLogger()
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def track_mlflow(self, best_model, classificationmetric):
-        mlflow.set_registry_uri("file:///mlruns")
-        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-        with mlflow.start_run():
-            f1_score = classificationmetric.f1_score
-            precision_score = classificationmetric.precision_score
-            recall_score = classificationmetric.recall_score
-
-            mlflow.log_metric("f1_score", f1_score)
-            mlflow.log_metric("precision", precision_score)
-            mlflow.log_metric("recall_score", recall_score)
-            mlflow.sklearn.log_model(best_model, "model")
-            # Model registry does not work with file store
-            if tracking_url_type_store != "file":
-                # Register the model
-                # There are other ways to use the Model Registry, which depends on the use case,
-                # please refer to the doc for more information:
-                # https://mlflow.org/docs/latest/model-registry.html#api-workflow
-                mlflow.sklearn.log_model(
-                    best_model, "model", registered_model_name=best_model
-                )
-            else:
-                mlflow.sklearn.log_model(best_model, "model")
+    def track_mlflow(self, best_model, classification_train_metric, classification_test_metric):
+        """Queues the train and test metrics and the model for the background MLflow logger"""
+        metrics = {}
+        for prefix, classificationmetric in (
+            ("train", classification_train_metric),
+            ("test", classification_test_metric),
+        ):
+            metrics[f"{prefix}_f1_score"] = classificationmetric.f1_score
+            metrics[f"{prefix}_precision"] = classificationmetric.precision_score
+            metrics[f"{prefix}_recall_score"] = classificationmetric.recall_score
+            metrics[f"{prefix}_accuracy_score"] = classificationmetric.accuracy_score
+            metrics[f"{prefix}_roc_auc_score"] = classificationmetric.roc_auc_score
+        self.mlflow_logger.log_metrics(metrics)
+        self.mlflow_logger.log_model(best_model)
 
-    def train_model(self, X_train, y_train, x_test, y_test):
+    def select_boosting_rounds(self, model, X_fit, y_fit, X_val, y_val):
+        """
+        Picks the number of boosting rounds with the best F1 on the validation fold from the
+        staged predictions and refits the model with it. Used for AdaBoost, which has no
+        built-in early stopping.
+        """
+        val_scores = get_f1_scores(y_val, np.stack(list(model.staged_predict(X_val))))
+        best_n_rounds = int(np.argmax(val_scores)) + 1
+        logging.info(
+            f"{type(model).__name__} validation F1 peaked after {best_n_rounds} of {len(val_scores)} rounds"
+        )
+        if best_n_rounds < model.n_estimators:
+            model.set_params(n_estimators=best_n_rounds)
+            model.fit(X_fit, y_fit)
+        return model
+
+    def is_drift_detected(self) -> bool:
+        if self.data_validation_artifact is None:
+            return False
+        drift_report = read_yaml_file(self.data_validation_artifact.drift_report_file_path)
+        return any(column["drift_status"] for column in drift_report.values())
+
+    def warm_start_model(self, model, X_new, y_new, X_val, y_val):
+        """
+        Continues training a fitted model on the rows it has not seen yet: RandomForest and
+        GradientBoosting get additional trees fitted on them via warm_start, XGBoost continues
+        boosting from its booster on them and early stops again on the validation fold.
+        Returns None if the model family does not support incremental training.
+        """
+        n_rounds = self.model_trainer_config.warm_start_rounds
+        if isinstance(model, RandomForestClassifier):
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_rounds)
+            model.fit(X_new, y_new)
+        elif isinstance(model, GradientBoostingClassifier):
+            model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_rounds)
+            model.fit(X_new, y_new)
+        elif isinstance(model, XGBClassifier):
+            booster = model.get_booster()
+            # without early stopping the deployed model's best_iteration is kept and predict
+            # would ignore every new round
+            model.set_params(
+                n_estimators=n_rounds,
+                early_stopping_rounds=self.model_trainer_config.early_stopping_rounds,
+            )
+            model.fit(
+                X_new, y_new, eval_set=[(X_val, y_val)], verbose=False, xgb_model=booster
+            )
+            model.set_params(early_stopping_rounds=None)
+        else:
+            return None
+        return model
+
+    def retrain_deployed_model(self, X_fit, y_fit, X_val, y_val, x_test, y_test):
+        """
+        Incrementally retrains the deployed model on the rows of X_fit it was not trained on
+        and returns its name, the model and its cost profile. Returns None if a full search is
+        needed because drift was detected, there is no deployed model that supports warm
+        starting or no record of its training rows, or the retrained model scores below the
+        expected score.
+        """
+        deployed_model_file_path = self.model_trainer_config.deployed_model_file_path
+        training_rows_file_path = self.model_trainer_config.deployed_training_rows_file_path
+        if self.is_drift_detected():
+            logging.info("Data drift was detected, running the full model search")
+            return None
+        if not os.path.exists(deployed_model_file_path):
+            logging.info("No deployed model found, running the full model search")
+            return None
+        if not os.path.exists(training_rows_file_path):
+            logging.info("Training rows of the deployed model are unknown, running the full model search")
+            return None
+
+        seen_row_hashes = load_numpy_array_data(training_rows_file_path)
+        row_hashes = get_row_hashes(X_fit, y_fit)
+        is_new = ~np.isin(row_hashes, seen_row_hashes)
+        X_new, y_new = X_fit[is_new], y_fit[is_new]
+        logging.info(f"{len(X_new)} of {len(X_fit)} training rows are new to the deployed model")
+
+        start = time.perf_counter()
+        model = load_object(deployed_model_file_path)
+        if type(model) not in WARM_START_MODEL_NAMES:
+            logging.info("Deployed model does not support warm starting, running the full model search")
+            return None
+        model_name = WARM_START_MODEL_NAMES[type(model)]
+        if len(X_new) > 0:
+            if len(np.unique(y_new)) < 2:
+                logging.info("The new rows hold a single class, running the full model search")
+                return None
+            model = self.warm_start_model(model, X_new, y_new, X_val, y_val)
+        fit_time = time.perf_counter() - start
+        self._training_row_hashes = np.union1d(seen_row_hashes, row_hashes)
+
+        test_metric = get_classification_score(y_true=y_test, y_pred=model.predict(x_test))
+        if test_metric.f1_score < self.model_trainer_config.expected_accuracy:
+            logging.info(
+                f"Retrained model F1 {test_metric.f1_score:.4f} is below the expected score "
+                f"{self.model_trainer_config.expected_accuracy}, running the full model search"
+            )
+            return None
+        logging.info(
+            f"Incrementally retrained {model_name} with test F1 {test_metric.f1_score:.4f}"
+        )
+        model_profiles = {
+            model_name: profile_model(
+                model, x_test, fit_time, test_metric.f1_score,
+                n_repeats=self.model_trainer_config.profile_n_repeats,
+            )
+        }
+        return model_name, model, model_profiles
+
+    def search_best_model(self, X_fit, y_fit, X_val, y_val, x_test, y_test):
+        # The number of boosting rounds is found by early stopping instead of the grid search
+        max_rounds = self.model_trainer_config.max_boosting_rounds
+        early_stopping_rounds = self.model_trainer_config.early_stopping_rounds
         models = {
             "Random Forest": RandomForestClassifier(verbose=1),
             "Decision Tree": DecisionTreeClassifier(),
-            "Gradient Boosting": GradientBoostingClassifier(verbose=1),
+            # early stops on its own validation_fraction split of X_fit, not on the held-out
+            # fold, because it has no eval_set; the fraction is the same as the fold's
+            "Gradient Boosting": GradientBoostingClassifier(
+                verbose=1,
+                n_estimators=max_rounds,
+                n_iter_no_change=early_stopping_rounds,
+                validation_fraction=self.model_trainer_config.validation_split_ratio,
+            ),
             "Logistic Regression": LogisticRegression(verbose=1),
-            "AdaBoost": AdaBoostClassifier(),
-            "XGBoost": XGBClassifier(verbosity=1),
+            "AdaBoost": AdaBoostClassifier(n_estimators=max_rounds),
+            "XGBoost": XGBClassifier(
+                verbosity=1,
+                n_estimators=max_rounds,
+            ),
         }
         params = {
             "Decision Tree": {
@@ -93,53 +238,111 @@ class ModelTrainer:
             "Gradient Boosting": {
                 "learning_rate": [0.1, 0.01, 0.05, 0.001],
                 "subsample": [0.6, 0.7, 0.75, 0.85, 0.9],
-                "n_estimators": [8, 16, 32, 64, 128, 256],
             },
             "Logistic Regression": {},
             "AdaBoost": {
                 "learning_rate": [0.1, 0.01, 0.001],
-                "n_estimators": [8, 16, 32, 64, 128, 256],
             },
             "XGBoost": {
                 "learning_rate": [0.1, 0.01, 0.05, 0.001],
-                "n_estimators": [8, 16, 32, 64, 128, 256],
                 "max_depth": [3, 5, 7, 9],
                 "subsample": [0.6, 0.7, 0.8, 0.9],
+                # only set for the searched fits, which get the validation fold as eval_set
+                "early_stopping_rounds": [early_stopping_rounds],
             },
         }
-        model_report: dict = evaluate_models(
-            X_train=X_train,
-            y_train=y_train,
-            X_test=x_test,
-            y_test=y_test,
-            models=models,
-            param=params,
-        )
-
-        ## To get best model score from dict
-        best_model_score = max(sorted(model_report.values()))
+        fit_params = {
+            "XGBoost": {"eval_set": [(X_val, y_val)], "verbose": False},
+        }
+        with profile_step("grid_search", rows=len(X_fit)):
+            model_report, search_stats = evaluate_models(
+                X_train=X_fit,
+                y_train=y_fit,
+                X_test=x_test,
+                y_test=y_test,
+                models=models,
+                param=params,
+                n_jobs=self.model_trainer_config.n_jobs,
+                search_strategy=self.model_trainer_config.search_strategy,
+                n_iter=self.model_trainer_config.search_n_iter,
+                random_state=self.model_trainer_config.search_random_state,
+                fit_params=fit_params,
+                return_stats=True,
+                checkpoint_dir=self.model_trainer_config.search_checkpoint_dir,
+                checkpoint_lookup_pattern=self.model_trainer_config.search_checkpoint_lookup_pattern,
+            )
 
-        ## To get best model name from dict
+        with profile_step("boosting_rounds", rows=len(X_fit)):
+            models["AdaBoost"] = self.select_boosting_rounds(
+                models["AdaBoost"], X_fit, y_fit, X_val, y_val
+            )
+            model_report["AdaBoost"] = float(get_r2_score(y_test, models["AdaBoost"].predict(x_test)))
+            # predict keeps using best_iteration, but later fits without an eval_set must not fail
+            models["XGBoost"].set_params(early_stopping_rounds=None)
+            logging.info(
+                f"Early stopping picked {models['Gradient Boosting'].n_estimators_} Gradient Boosting "
+                f"and {models['XGBoost'].best_iteration + 1} XGBoost rounds"
+            )
 
-        best_model_name = list(model_report.keys())[
-            list(model_report.values()).index(best_model_score)
-        ]
-        best_model = models[best_model_name]
-        y_train_pred = best_model.predict(X_train)
+        ## Profile the inference cost of every candidate
+        model_profiles = {}
+        with profile_step("model_profiling"):
+            for name, model in models.items():
+                model_profiles[name] = profile_model(
+                    model,
+                    x_test,
+                    fit_time=search_stats[name]["refit_time"],
+                    f1_score=get_classification_score(y_test, model.predict(x_test)).f1_score,
+                    n_repeats=self.model_trainer_config.profile_n_repeats,
+                )
+                logging.info(f"{name} profile: {model_profiles[name]}")
 
-        classification_train_metric = get_classification_score(
-            y_true=y_train, y_pred=y_train_pred
+        best_model_name = select_model(
+            model_report,
+            model_profiles,
+            policy=self.model_trainer_config.selection_policy,
+            latency_budget_ms=self.model_trainer_config.latency_budget_ms,
         )
+        logging.info(
+            f"Selected {best_model_name} with the {self.model_trainer_config.selection_policy} policy"
+        )
+        return best_model_name, models[best_model_name], model_profiles
 
-        ## Track the experiements with mlflow
-        self.track_mlflow(best_model, classification_train_metric)
+    def train_model(self, X_train, y_train, x_test, y_test):
+        # The ingested data is shuffled by the train test split, so the tail of the training
+        # arrays is a random validation fold. Slicing keeps them memory-mapped views.
+        # at least one row, X_train[:-0] would be empty
+        n_val = max(int(len(X_train) * self.model_trainer_config.validation_split_ratio), 1)
+        X_fit, y_fit = X_train[:-n_val], y_train[:-n_val]
+        X_val, y_val = X_train[-n_val:], y_train[-n_val:]
 
-        y_test_pred = best_model.predict(x_test)
-        classification_test_metric = get_classification_score(
-            y_true=y_test, y_pred=y_test_pred
-        )
+        trained = None
+        if self.model_trainer_config.incremental:
+            with profile_step("warm_start", rows=len(X_fit)):
+                trained = self.retrain_deployed_model(
+                    X_fit, y_fit, X_val, y_val, x_test, y_test
+                )
+        if trained is None:
+            trained = self.search_best_model(
+                X_fit, y_fit, X_val, y_val, x_test, y_test
+            )
+            self._training_row_hashes = np.unique(get_row_hashes(X_fit, y_fit))
+        best_model_name, best_model, model_profiles = trained
+
+        with profile_step("evaluation", rows=len(X_train) + len(x_test)):
+            y_train_pred = best_model.predict(X_train)
+
+            classification_train_metric = get_classification_score(
+                y_true=y_train, y_pred=y_train_pred, y_score=best_model.predict_proba(X_train)[:, 1]
+            )
 
-        self.track_mlflow(best_model, classification_test_metric)
+            y_test_pred = best_model.predict(x_test)
+            classification_test_metric = get_classification_score(
+                y_true=y_test, y_pred=y_test_pred, y_score=best_model.predict_proba(x_test)[:, 1]
+            )
+
+        ## Track the experiements with mlflow
+        self.track_mlflow(best_model, classification_train_metric, classification_test_metric)
 
         preprocessor = load_object(
             file_path=self.data_transformation_artifact.transformed_object_file_path
@@ -155,13 +358,30 @@ class ModelTrainer:
             self.model_trainer_config.trained_model_file_path, obj=Network_Model
         )
         # model pusher
-        save_object("final_model/model.pkl", best_model)
+        save_object(self.model_trainer_config.deployed_model_file_path, best_model)
+        # the next incremental run only trains on rows that are not in here
+        save_numpy_array_data(
+            self.model_trainer_config.deployed_training_rows_file_path, self._training_row_hashes
+        )
+
+        write_yaml_file(
+            self.model_trainer_config.model_profile_file_path,
+            content={
+                "selected_model": best_model_name,
+                "selection_policy": self.model_trainer_config.selection_policy,
+                "latency_budget_ms": self.model_trainer_config.latency_budget_ms,
+                "models": {name: asdict(profile) for name, profile in model_profiles.items()},
+            },
+        )
 
         ## Model Trainer Artifact
         model_trainer_artifact = ModelTrainerArtifact(
             trained_model_file_path=self.model_trainer_config.trained_model_file_path,
             train_metric_artifact=classification_train_metric,
             test_metric_artifact=classification_test_metric,
+            selected_model_name=best_model_name,
+            model_profile_file_path=self.model_trainer_config.model_profile_file_path,
+            model_profiles=model_profiles,
         )
         logging.info(f"Model trainer artifact: {model_trainer_artifact}")
         return model_trainer_artifact
@@ -175,17 +395,26 @@ class ModelTrainer:
                 self.data_transformation_artifact.transformed_test_file_path
             )
 
-            train_arr = load_numpy_array_data(train_file_path)
-            test_arr = load_numpy_array_data(test_file_path)
-
-            x_train, y_train, x_test, y_test = (
-                train_arr[:, :-1],
-                train_arr[:, -1],
-                test_arr[:, :-1],
-                test_arr[:, -1],
+            train_target_file_path = (
+                self.data_transformation_artifact.transformed_train_target_file_path
+            )
+            test_target_file_path = (
+                self.data_transformation_artifact.transformed_test_target_file_path
             )
 
+            logging.info(f"Peak RSS before loading training data: {get_peak_rss_mb():.1f} MB")
+
+            # Memory-map the arrays read-only, the pages are shared with the search workers
+            x_train = load_numpy_array_data(train_file_path, mmap_mode="r")
+            y_train = load_numpy_array_data(train_target_file_path, mmap_mode="r")
+            x_test = load_numpy_array_data(test_file_path, mmap_mode="r")
+            y_test = load_numpy_array_data(test_target_file_path, mmap_mode="r")
+
             model_trainer_artifact = self.train_model(x_train, y_train, x_test, y_test)
+            if self._owns_mlflow_logger:
+                self.mlflow_logger.close()
+
+            logging.info(f"Peak RSS after model training: {get_peak_rss_mb():.1f} MB")
             return model_trainer_artifact
 
         except Exception as e:
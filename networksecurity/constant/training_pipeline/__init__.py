@@ -19,8 +19,33 @@ SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
 
 SAVED_MODEL_DIR = os.path.join("saved_models")
 MODEL_FILE_NAME = "model.pkl"
+PREPROCESSOR_FILE_NAME = "preprocessor.pkl"
 
 
+"""
+Artifact store related constant start with ARTIFACT_STORE VAR NAME
+"""
+## run artifacts are stored once per content under Artifacts/blobs and hard linked into the
+## run directories; Artifacts/manifests/<timestamp>.json maps every run file to its blob
+ARTIFACT_STORE_ENABLED: bool = True
+ARTIFACT_STORE_BLOB_DIR_NAME: str = "blobs"
+ARTIFACT_STORE_MANIFEST_DIR_NAME: str = "manifests"
+## runs with a manifest beyond the newest ARTIFACT_STORE_RETAIN_RUNS are deleted together with
+## the blobs no remaining run refers to
+ARTIFACT_STORE_RETAIN_RUNS: int = 5
+## files a writer is still renaming into place, never collected as blobs
+ARTIFACT_STORE_TMP_FILE_PATTERNS: tuple = ("*.tmp", "*.link")
+
+"""
+Pipeline profiling related constant start with PIPELINE_PROFILE VAR NAME
+"""
+## wall time, cpu time, peak memory and rows per second of every stage and sub-step are
+## written to Artifacts/<timestamp>/profile_report.json and logged to MLflow
+PIPELINE_PROFILE_REPORT_FILE_NAME: str = "profile_report.json"
+## peak memory per step is the growth of the peak RSS; tracing it with tracemalloc is exact
+## per step but slows down allocation heavy steps
+PIPELINE_PROFILE_TRACE_MEMORY: bool = False
+
 """
 Data Ingestion related constant start with DATA_INGESTION VAR NAME
 """
@@ -58,6 +83,19 @@ DATA_TRANSFORMATION_TRAIN_FILE_PATH: str = "train.npy"
 
 DATA_TRANSFORMATION_TEST_FILE_PATH: str = "test.npy"
 
+## features and target are stored as separate contiguous arrays so they can be memory-mapped
+DATA_TRANSFORMATION_TRAIN_TARGET_FILE_PATH: str = "train_target.npy"
+
+DATA_TRANSFORMATION_TEST_TARGET_FILE_PATH: str = "test_target.npy"
+
+## out-of-core mode fits the imputer on a bounded random sample and transforms the
+## validated data chunk by chunk into memory-mapped .npy files
+DATA_TRANSFORMATION_OUT_OF_CORE: bool = False
+DATA_TRANSFORMATION_CHUNK_SIZE: int = 50_000
+DATA_TRANSFORMATION_FIT_SAMPLE_SIZE: int = 100_000
+## seed of the fit sample, so reruns on the same data fit the same imputer
+DATA_TRANSFORMATION_FIT_SAMPLE_SEED: int = 42
+
 
 """
 Model Trainer ralated constant start with MODE TRAINER VAR NAME
@@ -68,5 +106,99 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD: float = 0.05
+## number of worker processes used by the hyperparameter search, -1 means all cores
+MODEL_TRAINER_N_JOBS: int = -1
+## hyperparameter search strategy: "grid" (exhaustive), "random" (MODEL_TRAINER_SEARCH_N_ITER
+## trials per model) or "halving" (successive halving over the number of training samples)
+MODEL_TRAINER_SEARCH_STRATEGY: str = "grid"
+MODEL_TRAINER_SEARCH_N_ITER: int = 20
+## seed of the sampled "random" candidates and of the "halving" subsamples, a fixed seed lets a
+## resumed search evaluate the same (params, fold) pairs, so they are found in the checkpoint
+MODEL_TRAINER_SEARCH_RANDOM_STATE: int = 42
+## boosted models train up to MODEL_TRAINER_MAX_BOOSTING_ROUNDS rounds and stop once the score on
+## the held out validation fold did not improve for MODEL_TRAINER_EARLY_STOPPING_ROUNDS rounds
+MODEL_TRAINER_VALIDATION_SPLIT_RATIO: float = 0.1
+MODEL_TRAINER_MAX_BOOSTING_ROUNDS: int = 256
+MODEL_TRAINER_EARLY_STOPPING_ROUNDS: int = 10
+## incremental mode continues training the deployed model with MODEL_TRAINER_WARM_START_ROUNDS
+## more trees/boosting rounds on the rows it was not trained on yet, and falls back to the full
+## search on drift or a low score. The hashes of the rows the deployed model was trained on are
+## kept next to it in MODEL_TRAINER_TRAINING_ROWS_FILE_NAME
+MODEL_TRAINER_INCREMENTAL: bool = False
+MODEL_TRAINER_WARM_START_ROUNDS: int = 32
+MODEL_TRAINER_TRAINING_ROWS_FILE_NAME: str = "training_rows.npy"
+## model selection policy: "best_score" or "latency_budget" (best F1 among the models with a
+## single row p99 predict latency within MODEL_TRAINER_LATENCY_BUDGET_MS)
+MODEL_TRAINER_SELECTION_POLICY: str = "best_score"
+MODEL_TRAINER_LATENCY_BUDGET_MS: float = 5.0
+MODEL_TRAINER_PROFILE_N_REPEATS: int = 100
+MODEL_TRAINER_MODEL_PROFILE_FILE_NAME: str = "model_profile.yaml"
+## every finished (model, params, fold) evaluation of the search is saved here and reused by
+## later searches on the same data, including the searches of earlier runs
+MODEL_TRAINER_SEARCH_CHECKPOINT_DIR: str = "search_checkpoint"
+
+"""
+Model Distillation related constant start with MODEL_DISTILLATION VAR NAME
+"""
+
+## optional stage that distills the trained model into a small, fast surrogate model
+MODEL_DISTILLATION_ENABLED: bool = False
+MODEL_DISTILLATION_DIR_NAME: str = "model_distillation"
+MODEL_DISTILLATION_SURROGATE_MODEL_NAME: str = "surrogate_model.pkl"
+## serving uses the surrogate if it agrees with the trained model on at least this share of rows
+MODEL_DISTILLATION_FIDELITY_THRESHOLD: float = 0.98
+
+"""
+Serving related constant start with SERVING VAR NAME
+"""
+
+SERVING_MODEL_DIR: str = "final_model"
+SERVING_HOST: str = "0.0.0.0"
+SERVING_PORT: int = 8000
+## number of pre-forked worker processes sharing the model loaded by the parent,
+## overridden by the SERVING_NUM_WORKERS environment variable; 1 runs a single process
+SERVING_NUM_WORKERS: int = 1
+
+"""
+Batch Prediction related constant start with BATCH_PREDICTION VAR NAME
+"""
+
+## "azure" runs on Azure Batch, "local" shards the input across a local process pool
+BATCH_PREDICTION_BACKEND: str = "azure"
+BATCH_PREDICTION_MODEL_DIR: str = "final_model"
+BATCH_PREDICTION_OUTPUT_DIR: str = "predictions"
+BATCH_PREDICTION_CONTAINER_NAME: str = "network-security-predictions"
+## azure backend: number of parallel tasks the input is split into and the exponential
+## backoff of the task status polling, in seconds
+BATCH_PREDICTION_N_SHARDS: int = 8
+BATCH_PREDICTION_POLL_INITIAL_INTERVAL: float = 1.0
+BATCH_PREDICTION_POLL_MAX_INTERVAL: float = 30.0
+BATCH_PREDICTION_TIMEOUT: float = 3600.0
+## azure backend: blobs uploaded at the same time, and the block size and parallel block uploads
+## of every single blob. The model, preprocessor and task script are stored under their sha256,
+## so unchanged files are uploaded once
+BATCH_PREDICTION_UPLOAD_CONCURRENCY: int = 8
+BATCH_PREDICTION_UPLOAD_BLOCK_SIZE: int = 4 * 1024 * 1024
+BATCH_PREDICTION_UPLOAD_BLOCK_CONCURRENCY: int = 4
+## azure backend: one long lived pool is reused by all jobs. Its nodes run tasks in a prebuilt
+## container image with the ML stack, so no packages are installed when nodes start, and it
+## auto-scales between 0 nodes when idle and BATCH_PREDICTION_POOL_MAX_NODES
+BATCH_PREDICTION_POOL_ID: str = "networksecurity-pool"
+BATCH_PREDICTION_POOL_VM_SIZE: str = "STANDARD_D2_V2"
+BATCH_PREDICTION_POOL_TASK_SLOTS_PER_NODE: int = 2
+BATCH_PREDICTION_POOL_MAX_NODES: int = 4
+BATCH_PREDICTION_POOL_AUTO_SCALE_INTERVAL_MINUTES: int = 5
+BATCH_PREDICTION_CONTAINER_IMAGE: str = "networksecurity/batch-prediction:latest"
+## local backend: shards per worker process, more than one balances uneven shards
+BATCH_PREDICTION_SHARDS_PER_WORKER: int = 4
 
 TRAINING_BUCKET_NAME = "netwworksecurity"
+
+## s3 sync: connections shared by the files and parts transferred at the same time, and files
+## above the threshold are sent in parts of the chunk size. Files whose ETag matches the remote
+## object are skipped
+S3_SYNC_MAX_CONCURRENCY: int = 16
+S3_SYNC_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+S3_SYNC_MULTIPART_CHUNKSIZE: int = 8 * 1024 * 1024
+## temporary files that are renamed into place once written, never uploaded
+S3_SYNC_EXCLUDE_PATTERNS: tuple = ("*.tmp", "*.link")
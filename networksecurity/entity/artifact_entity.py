@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -22,6 +22,8 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    transformed_train_target_file_path: str
+    transformed_test_target_file_path: str
 
 
 @dataclass
@@ -29,6 +31,18 @@ class ClassificationMetricArtifact:
     f1_score: float
     precision_score: float
     recall_score: float
+    accuracy_score: float = None
+    roc_auc_score: float = None
+
+
+@dataclass
+class ModelProfileArtifact:
+    f1_score: float
+    fit_time: float
+    single_row_p50_ms: float
+    single_row_p99_ms: float
+    batch_1k_ms: float
+    serialized_size_bytes: int
 
 
 @dataclass
@@ -36,3 +50,29 @@ class ModelTrainerArtifact:
     trained_model_file_path: str
     train_metric_artifact: ClassificationMetricArtifact
     test_metric_artifact: ClassificationMetricArtifact
+    selected_model_name: str = None
+    model_profile_file_path: str = None
+    model_profiles: dict = field(default_factory=dict)
+
+
+@dataclass
+class ModelDistillationArtifact:
+    surrogate_model_file_path: str
+    surrogate_model_name: str
+    agreement_rate: float
+    teacher_profile: ModelProfileArtifact
+    surrogate_profile: ModelProfileArtifact
+    meets_fidelity_threshold: bool
+
+
+@dataclass
+class StepProfileArtifact:
+    name: str
+    wall_time_s: float = 0.0
+    cpu_time_s: float = 0.0
+    peak_memory_mb: float = None
+    max_rss_mb: float = None
+    rows: int = None
+    rows_per_second: float = None
+    status: str = "ok"
+    steps: list = field(default_factory=list)
@@ -12,6 +12,9 @@ class TrainingPipelineConfig:
         self.artifact_dir = os.path.join(self.artifact_name, timestamp)
         self.model_dir = os.path.join("final_model")
         self.timestamp: str = timestamp
+        self.profile_report_file_path: str = os.path.join(
+            self.artifact_dir, training_pipeline.PIPELINE_PROFILE_REPORT_FILE_NAME
+        )
 
 
 class DataIngestionConfig:
@@ -89,11 +92,25 @@ class DataTransformationConfig:
             training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
             training_pipeline.TEST_FILE_NAME.replace("csv", "npy"),
         )
+        self.transformed_train_target_file_path: str = os.path.join(
+            self.data_transformation_dir,
+            training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+            training_pipeline.DATA_TRANSFORMATION_TRAIN_TARGET_FILE_PATH,
+        )
+        self.transformed_test_target_file_path: str = os.path.join(
+            self.data_transformation_dir,
+            training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+            training_pipeline.DATA_TRANSFORMATION_TEST_TARGET_FILE_PATH,
+        )
         self.transformed_object_file_path: str = os.path.join(
             self.data_transformation_dir,
             training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
             training_pipeline.PREPROCESSING_OBJECT_FILE_NAME,
         )
+        self.out_of_core: bool = training_pipeline.DATA_TRANSFORMATION_OUT_OF_CORE
+        self.chunk_size: int = training_pipeline.DATA_TRANSFORMATION_CHUNK_SIZE
+        self.fit_sample_size: int = training_pipeline.DATA_TRANSFORMATION_FIT_SAMPLE_SIZE
+        self.fit_sample_seed: int = training_pipeline.DATA_TRANSFORMATION_FIT_SAMPLE_SEED
 
 
 class ModelTrainerConfig:
@@ -107,7 +124,66 @@ class ModelTrainerConfig:
             training_pipeline.MODEL_TRAINER_TRAINED_MODEL_DIR,
             training_pipeline.MODEL_FILE_NAME,
         )
+        self.model_profile_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_MODEL_PROFILE_FILE_NAME,
+        )
+        self.search_checkpoint_dir: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_SEARCH_CHECKPOINT_DIR,
+        )
+        self.search_checkpoint_lookup_pattern: str = os.path.join(
+            training_pipeline_config.artifact_name,
+            "*",
+            training_pipeline.MODEL_TRAINER_DIR_NAME,
+            training_pipeline.MODEL_TRAINER_SEARCH_CHECKPOINT_DIR,
+        )
+        self.deployed_model_file_path: str = os.path.join(
+            training_pipeline_config.model_dir, training_pipeline.MODEL_FILE_NAME
+        )
         self.expected_accuracy: float = training_pipeline.MODEL_TRAINER_EXPECTED_SCORE
         self.overfitting_underfitting_threshold = (
             training_pipeline.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
         )
+        self.n_jobs: int = training_pipeline.MODEL_TRAINER_N_JOBS
+        self.search_strategy: str = training_pipeline.MODEL_TRAINER_SEARCH_STRATEGY
+        self.search_n_iter: int = training_pipeline.MODEL_TRAINER_SEARCH_N_ITER
+        self.search_random_state: int = training_pipeline.MODEL_TRAINER_SEARCH_RANDOM_STATE
+        self.validation_split_ratio: float = (
+            training_pipeline.MODEL_TRAINER_VALIDATION_SPLIT_RATIO
+        )
+        self.max_boosting_rounds: int = training_pipeline.MODEL_TRAINER_MAX_BOOSTING_ROUNDS
+        self.early_stopping_rounds: int = (
+            training_pipeline.MODEL_TRAINER_EARLY_STOPPING_ROUNDS
+        )
+        self.incremental: bool = training_pipeline.MODEL_TRAINER_INCREMENTAL
+        self.warm_start_rounds: int = training_pipeline.MODEL_TRAINER_WARM_START_ROUNDS
+        self.deployed_training_rows_file_path: str = os.path.join(
+            training_pipeline_config.model_dir, training_pipeline.MODEL_TRAINER_TRAINING_ROWS_FILE_NAME
+        )
+        self.selection_policy: str = training_pipeline.MODEL_TRAINER_SELECTION_POLICY
+        self.latency_budget_ms: float = training_pipeline.MODEL_TRAINER_LATENCY_BUDGET_MS
+        self.profile_n_repeats: int = training_pipeline.MODEL_TRAINER_PROFILE_N_REPEATS
+
+
+class ModelDistillationConfig:
+    def __init__(self, training_pipeline_config: TrainingPipelineConfig):
+        self.model_distillation_dir: str = os.path.join(
+            training_pipeline_config.artifact_dir,
+            training_pipeline.MODEL_DISTILLATION_DIR_NAME,
+        )
+        self.surrogate_model_file_path: str = os.path.join(
+            self.model_distillation_dir,
+            training_pipeline.MODEL_DISTILLATION_SURROGATE_MODEL_NAME,
+        )
+        self.deployed_model_file_path: str = os.path.join(
+            training_pipeline_config.model_dir, training_pipeline.MODEL_FILE_NAME
+        )
+        self.deployed_surrogate_model_file_path: str = os.path.join(
+            training_pipeline_config.model_dir,
+            training_pipeline.MODEL_DISTILLATION_SURROGATE_MODEL_NAME,
+        )
+        self.fidelity_threshold: float = (
+            training_pipeline.MODEL_DISTILLATION_FIDELITY_THRESHOLD
+        )
+        self.profile_n_repeats: int = training_pipeline.MODEL_TRAINER_PROFILE_N_REPEATS
@@ -1,16 +1,172 @@
+import atexit
+import json
 import logging
 import os
+import queue
+import time
+from contextlib import ContextDecorator
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 
-logs_path=os.path.join(os.getcwd(),"logs",LOG_FILE)
+## run logs go to ./logs unless LOG_DIR points elsewhere
+logs_path=os.getenv("LOG_DIR", os.path.join(os.getcwd(),"logs"))
 os.makedirs(logs_path,exist_ok=True)
 
 LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
\ No newline at end of file
+## default level and per module levels, e.g.
+## LOG_LEVELS="networksecurity.utils.main_utils=DEBUG,botocore=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# attributes every LogRecord has, everything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including the fields passed with extra="""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "lineno": record.lineno,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(levels: str) -> dict:
+    module_levels = {}
+    for item in filter(None, (item.strip() for item in levels.split(","))):
+        module, level = item.split("=")
+        module_levels[module.strip()] = logging.getLevelName(level.strip().upper())
+    return module_levels
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Applies per module levels. Most of the package logs through the root logger, so for
+    root records the module is derived from the file the call was made from.
+    """
+
+    def __init__(self, default_level: int, module_levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        # longest prefix first, so the most specific setting wins
+        self.module_levels = sorted(module_levels.items(), key=lambda item: -len(item[0]))
+        self._module_names = {}
+
+    def _get_module_name(self, record):
+        if record.name != "root":
+            return record.name
+        module_name = self._module_names.get(record.pathname)
+        if module_name is None:
+            parts = os.path.splitext(os.path.normpath(record.pathname))[0].split(os.sep)
+            if "networksecurity" in parts:
+                parts = parts[parts.index("networksecurity"):]
+            else:
+                parts = parts[-1:]
+            module_name = self._module_names[record.pathname] = ".".join(parts)
+        return module_name
+
+    def filter(self, record):
+        module_name = self._get_module_name(record)
+        for module, level in self.module_levels:
+            if module_name == module or module_name.startswith(f"{module}."):
+                return record.levelno >= level
+        return record.levelno >= self.default_level
+
+
+def _start_listener():
+    # the file is only opened once the first record is written
+    file_handler = logging.FileHandler(LOG_FILE_PATH, delay=True)
+    file_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(_queue_handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _restart_listener_in_child():
+    # the listener thread does not survive a fork, so forked workers start their own
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = _start_listener()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+_default_level = logging.getLevelName(LOG_LEVEL.upper())
+_module_levels = _parse_levels(LOG_LEVELS)
+
+# records are only put on a queue by the calling thread, a background thread writes them
+_queue_handler = QueueHandler(queue.SimpleQueue())
+_queue_handler.addFilter(ModuleLevelFilter(_default_level, _module_levels))
+_listener = _start_listener()
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+_root_logger = logging.getLogger()
+for _handler in list(_root_logger.handlers):
+    _root_logger.removeHandler(_handler)
+_root_logger.addHandler(_queue_handler)
+# the root level lets through the most verbose configured level, the filter does the rest
+_root_logger.setLevel(min([_default_level, *_module_levels.values()]))
+for _module, _level in _module_levels.items():
+    logging.getLogger(_module).setLevel(_level)
+
+
+class timed_stage(ContextDecorator):
+    """
+    Logs how long a pipeline stage or request took, as a context manager or decorator.
+    The record carries the stage, duration_ms, status and any extra fields.
+
+        with timed_stage("data_ingestion"):
+            ...
+
+        @timed_stage("predict", route="/predict")
+        def predict_route(...):
+            ...
+    """
+
+    def __init__(self, stage: str, level: int = logging.INFO, **fields):
+        self.stage = stage
+        self.level = level
+        self.fields = fields
+        self.duration_ms = None
+
+    def _recreate_cm(self):
+        # a fresh instance per decorated call, so concurrent calls do not share timings
+        return type(self)(self.stage, self.level, **self.fields)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        logging.getLogger("networksecurity.timing").log(
+            self.level,
+            f"{self.stage} took {self.duration_ms:.1f} ms",
+            extra={
+                "stage": self.stage,
+                "duration_ms": self.duration_ms,
+                "status": "error" if exc_type else "ok",
+                **self.fields,
+            },
+        )
+        return False
@@ -1,177 +1,354 @@
+import io
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from azure.batch import BatchServiceClient
-from azure.batch.batch_auth import SharedKeyCredentials
-from azure.storage.blob import BlobServiceClient
+from networksecurity.cloud.batch_pool import BatchPoolRegistry
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
-from networksecurity.utils.main_utils.utils import load_object
+from networksecurity.utils.main_utils.utils import load_object, get_csv_shard_ranges, get_file_checksum
+from networksecurity.constant.training_pipeline import (
+    BATCH_PREDICTION_BACKEND,
+    BATCH_PREDICTION_CONTAINER_NAME,
+    BATCH_PREDICTION_MODEL_DIR,
+    BATCH_PREDICTION_OUTPUT_DIR,
+    BATCH_PREDICTION_N_SHARDS,
+    BATCH_PREDICTION_POLL_INITIAL_INTERVAL,
+    BATCH_PREDICTION_POLL_MAX_INTERVAL,
+    BATCH_PREDICTION_TIMEOUT,
+    BATCH_PREDICTION_UPLOAD_BLOCK_CONCURRENCY,
+    BATCH_PREDICTION_UPLOAD_BLOCK_SIZE,
+    BATCH_PREDICTION_UPLOAD_CONCURRENCY,
+)
+
+# Azure Batch accepts at most this many tasks per add_collection call
+MAX_TASKS_PER_COLLECTION = 100
+
+
+class CsvShardStream(io.RawIOBase):
+    """Reads the csv header followed by the byte range [start, end) of an open csv file"""
+
+    def __init__(self, file_obj, header, start, end):
+        self._file_obj = file_obj
+        self._header = header
+        self._header_offset = 0
+        self._remaining = end - start
+        file_obj.seek(start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._header_offset < len(self._header):
+            n_bytes = min(len(buffer), len(self._header) - self._header_offset)
+            buffer[:n_bytes] = self._header[self._header_offset:self._header_offset + n_bytes]
+            self._header_offset += n_bytes
+            return n_bytes
+        n_bytes = min(len(buffer), self._remaining)
+        if n_bytes == 0:
+            return 0
+        n_bytes = self._file_obj.readinto(memoryview(buffer)[:n_bytes])
+        self._remaining -= n_bytes
+        return n_bytes
+
 
 class BatchPrediction:
-    def __init__(self, input_file_path):
+    def __init__(self, input_file_path, n_shards=BATCH_PREDICTION_N_SHARDS,
+                 batch_client=None, blob_client=None, pool_registry=None, sleep=time.sleep,
+                 upload_concurrency=BATCH_PREDICTION_UPLOAD_CONCURRENCY):
+        """
+        Args:
+            input_file_path (str): Path to the input csv file
+            n_shards (int): number of parallel tasks the input is split into
+            batch_client: BatchServiceClient to use instead of one built from the environment
+            blob_client: BlobServiceClient to use instead of one built from the environment
+            pool_registry: BatchPoolRegistry providing the pool the jobs run on
+            sleep: function used to wait between status polls
+            upload_concurrency (int): number of blobs uploaded at the same time
+        """
         try:
             self.input_file_path = input_file_path
-            self.model_path = os.path.join("final_model", "model.pkl")
-            
+            self.model_path = os.path.join(BATCH_PREDICTION_MODEL_DIR, "model.pkl")
+            self.preprocessor_path = os.path.join(BATCH_PREDICTION_MODEL_DIR, "preprocessor.pkl")
+            self.n_shards = n_shards
+            self._sleep = sleep
+            self.upload_concurrency = upload_concurrency
+            self.upload_stats = {"uploaded_bytes": 0, "skipped_bytes": 0}
+            self._upload_stats_lock = threading.Lock()
+
             # Azure Batch configuration
             self.batch_account_name = os.getenv("AZURE_BATCH_ACCOUNT_NAME")
             self.batch_account_key = os.getenv("AZURE_BATCH_ACCOUNT_KEY")
             self.batch_account_url = os.getenv("AZURE_BATCH_ACCOUNT_URL")
-            
+
             # Azure Storage configuration
             self.storage_connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-            self.container_name = "network-security-predictions"
-            
+            self.container_name = BATCH_PREDICTION_CONTAINER_NAME
+
             # Initialize Azure clients
-            self.batch_client = self._create_batch_client()
-            self.blob_client = self._create_blob_client()
-            
+            self.batch_client = batch_client or self._create_batch_client()
+            self.blob_client = blob_client or self._create_blob_client()
+            self.pool_registry = pool_registry or BatchPoolRegistry(self.batch_client, sleep=sleep)
+
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-    
+
     def _create_batch_client(self):
         """Create Azure Batch client"""
+        # the azure sdk is only needed by this backend, so it is imported here
+        from azure.batch import BatchServiceClient
+        from azure.batch.batch_auth import SharedKeyCredentials
+
         credentials = SharedKeyCredentials(
             self.batch_account_name,
             self.batch_account_key
         )
         return BatchServiceClient(credentials, batch_url=self.batch_account_url)
-    
+
     def _create_blob_client(self):
         """Create Azure Blob Storage client"""
-        return BlobServiceClient.from_connection_string(self.storage_connection_string)
-    
-    def _upload_to_blob(self, file_path, blob_name):
-        """Upload file to Azure Blob Storage"""
+        from azure.storage.blob import BlobServiceClient
+
+        # blobs above the block size are uploaded in blocks of that size, several at a time
+        return BlobServiceClient.from_connection_string(
+            self.storage_connection_string,
+            max_block_size=BATCH_PREDICTION_UPLOAD_BLOCK_SIZE,
+            max_single_put_size=BATCH_PREDICTION_UPLOAD_BLOCK_SIZE,
+        )
+
+    def _get_blob_url(self, blob_name):
+        return f"https://{self.batch_account_name}.blob.core.windows.net/{self.container_name}/{blob_name}"
+
+    def _add_upload_stat(self, name, n_bytes):
+        with self._upload_stats_lock:
+            self.upload_stats[name] += n_bytes
+
+    def _upload_data(self, data, blob_name, overwrite=False, length=None):
+        container_client = self.blob_client.get_container_client(self.container_name)
+        container_client.upload_blob(
+            name=blob_name, data=data, overwrite=overwrite, length=length,
+            max_concurrency=BATCH_PREDICTION_UPLOAD_BLOCK_CONCURRENCY,
+        )
+        return self._get_blob_url(blob_name)
+
+    def _upload_content_addressed(self, file_path, prefix):
+        """
+        Uploads file_path as <prefix>/<sha256><extension> unless a blob with that name exists,
+        so the same model or script is stored and transferred only once.
+        """
+        checksum = get_file_checksum(file_path)
+        blob_name = f"{prefix}/{checksum}{os.path.splitext(file_path)[1]}"
         container_client = self.blob_client.get_container_client(self.container_name)
+        if container_client.get_blob_client(blob_name).exists():
+            self._add_upload_stat("skipped_bytes", os.path.getsize(file_path))
+            logging.info(f"{file_path} is already uploaded as {blob_name}")
+            return self._get_blob_url(blob_name)
+        # a concurrent job may upload the same content, which is then overwritten with itself
         with open(file_path, "rb") as data:
-            container_client.upload_blob(name=blob_name, data=data)
-        return f"https://{self.batch_account_name}.blob.core.windows.net/{self.container_name}/{blob_name}"
-    
-    def _create_batch_pool(self):
-        """Create Azure Batch pool for processing"""
-        pool_id = f"networksecurity-pool-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        
-        pool = {
-            'id': pool_id,
-            'vm_size': 'STANDARD_D2_V2',
-            'target_dedicated_nodes': 2,
-            'virtual_machine_configuration': {
-                'image_reference': {
-                    'publisher': 'microsoft-azure-batch',
-                    'offer': 'ubuntu-server-container',
-                    'sku': '20-04-lts',
-                    'version': 'latest'
-                },
-                'node_agent_sku_id': 'batch.node.ubuntu 20.04'
-            },
-            'start_task': {
-                'command_line': '/bin/bash -c "apt-get update && apt-get install -y python3-pip && pip3 install pandas numpy scikit-learn xgboost mlflow azure-storage-blob"',
-                'wait_for_success': True,
-                'user_identity': {
-                    'auto_user': {
-                        'scope': 'pool',
-                        'elevation_level': 'admin'
-                    }
-                }
-            }
-        }
-        
-        self.batch_client.pool.add(pool)
-        return pool_id
-    
+            url = self._upload_data(data, blob_name, overwrite=True)
+        self._add_upload_stat("uploaded_bytes", os.path.getsize(file_path))
+        return url
+
+    def _upload_input_shard(self, header, start, end, blob_name):
+        # the shard is streamed from the input file, it is never held in memory as a whole
+        length = len(header) + end - start
+        with open(self.input_file_path, "rb") as file_obj:
+            url = self._upload_data(CsvShardStream(file_obj, header, start, end), blob_name, length=length)
+        self._add_upload_stat("uploaded_bytes", length)
+        return url
+
+    def _upload_inputs(self, timestamp):
+        """
+        Uploads the input csv split into row ranges, one blob per range with the header, and
+        the model, preprocessor and task script, all in parallel.
+        Returns the input shard urls in input order and the model, preprocessor and script urls.
+        """
+        header, ranges = get_csv_shard_ranges(self.input_file_path, self.n_shards)
+        task_script_path = os.path.join(os.path.dirname(__file__), "batch_task.py")
+        with ThreadPoolExecutor(max_workers=self.upload_concurrency) as executor:
+            model_url = executor.submit(self._upload_content_addressed, self.model_path, "models")
+            preprocessor_url = executor.submit(
+                self._upload_content_addressed, self.preprocessor_path, "preprocessors"
+            )
+            script_url = executor.submit(self._upload_content_addressed, task_script_path, "scripts")
+            input_urls = [
+                executor.submit(
+                    self._upload_input_shard, header, start, end, f"input-{timestamp}/part-{i:05d}.csv"
+                )
+                for i, (start, end) in enumerate(ranges)
+            ]
+            input_urls = [url.result() for url in input_urls]
+            return input_urls, model_url.result(), preprocessor_url.result(), script_url.result()
+
     def _create_batch_job(self, pool_id):
         """Create Azure Batch job"""
-        job_id = f"networksecurity-job-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        job_id = f"networksecurity-job-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
         job = {
             'id': job_id,
             'pool_info': {'pool_id': pool_id}
         }
         self.batch_client.job.add(job)
         return job_id
-    
-    def _create_batch_task(self, job_id, input_url, model_url):
-        """Create Azure Batch task for prediction"""
-        task_id = f"prediction-task-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        
-        # Resource files (upload batch_task.py to batch node)
-        task_script_path = os.path.join(os.path.dirname(__file__), "batch_task.py")
-        script_resource = self._upload_to_blob(task_script_path, "batch_task.py")
-        
-        task = {
-            'id': task_id,
-            'resource_files': [
-                {'http_url': script_resource, 'file_path': 'batch_task.py'}
-            ],
-            'command_line': f'python3 batch_task.py "{input_url}" "{model_url}"',
-            'environment_settings': [
-                {'name': 'AZ_STORAGE_CONNECTION_STRING', 
-                 'value': self.storage_connection_string}
-            ]
-        }
-        
-        self.batch_client.task.add(job_id=job_id, task=task)
-        return task_id
-    
+
+    def _create_batch_tasks(self, job_id, input_urls, model_url, preprocessor_url, script_resource,
+                            output_blob_names):
+        """Create one Azure Batch prediction task per input shard"""
+        # Resource files (batch_task.py is downloaded to the batch node)
+
+        tasks = []
+        for i, (input_url, output_blob_name) in enumerate(zip(input_urls, output_blob_names)):
+            tasks.append({
+                'id': f"prediction-task-{i:05d}",
+                'resource_files': [
+                    {'http_url': script_resource, 'file_path': 'batch_task.py'}
+                ],
+                'command_line': f'python3 batch_task.py "{input_url}" "{model_url}" "{output_blob_name}" "{preprocessor_url}"',
+                'container_settings': self.pool_registry.get_task_container_settings(),
+                'environment_settings': [
+                    {'name': 'AZ_STORAGE_CONNECTION_STRING',
+                     'value': self.storage_connection_string}
+                ]
+            })
+
+        for i in range(0, len(tasks), MAX_TASKS_PER_COLLECTION):
+            self.batch_client.task.add_collection(job_id=job_id, value=tasks[i:i + MAX_TASKS_PER_COLLECTION])
+        return [task['id'] for task in tasks]
+
+    def _download_blob(self, blob_name, file_path):
+        container_client = self.blob_client.get_container_client(self.container_name)
+        blob_client = container_client.get_blob_client(blob_name)
+        with open(file_path, "wb") as f:
+            f.write(blob_client.download_blob().readall())
+
+    def _wait_for_tasks(self, job_id, task_outputs, parts_dir):
+        """
+        Polls the job's tasks with exponential backoff and downloads the output of every
+        task as soon as it completes. One list call per poll covers all tasks of the job.
+
+        Args:
+            job_id (str): Batch job id
+            task_outputs (dict): task id -> output blob name
+            parts_dir (str): directory the outputs are downloaded to
+        Returns:
+            dict: task id -> local path of its output
+        """
+        pending = dict(task_outputs)
+        part_paths = {}
+        interval = BATCH_PREDICTION_POLL_INITIAL_INTERVAL
+        deadline = time.monotonic() + BATCH_PREDICTION_TIMEOUT
+        while pending:
+            finished = 0
+            for task in self.batch_client.task.list(job_id):
+                if task.id not in pending or task.state != 'completed':
+                    continue
+                execution_info = task.execution_info
+                if execution_info is not None and execution_info.exit_code not in (None, 0):
+                    raise Exception(
+                        f"Batch task {task.id} failed with exit code {execution_info.exit_code}"
+                    )
+                part_paths[task.id] = os.path.join(parts_dir, f"{task.id}.csv")
+                self._download_blob(pending.pop(task.id), part_paths[task.id])
+                finished += 1
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{len(pending)} batch tasks did not complete in {BATCH_PREDICTION_TIMEOUT}s")
+            logging.info(f"{len(task_outputs) - len(pending)} of {len(task_outputs)} batch tasks completed")
+            # poll quickly again while tasks are finishing, back off while nothing changes
+            interval = BATCH_PREDICTION_POLL_INITIAL_INTERVAL if finished else min(
+                interval * 2, BATCH_PREDICTION_POLL_MAX_INTERVAL
+            )
+            self._sleep(interval)
+        return part_paths
+
+    @staticmethod
+    def _merge_outputs(part_paths, predictions_path):
+        """Concatenates the task outputs in input order, keeping the first header only"""
+        with open(predictions_path, "wb") as output_file:
+            for i, part_path in enumerate(part_paths):
+                with open(part_path, "rb") as part_file:
+                    header = part_file.readline()
+                    if i == 0:
+                        output_file.write(header)
+                    output_file.write(part_file.read())
+
     def start_batch_prediction(self):
         """Start batch prediction process"""
         try:
             logging.info("Starting batch prediction process")
-            
-            # Upload input file and model to blob storage
-            input_blob_name = f"input-{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv"
-            model_blob_name = f"model-{datetime.now().strftime('%Y%m%d-%H%M%S')}.pkl"
-            
-            input_url = self._upload_to_blob(self.input_file_path, input_blob_name)
-            model_url = self._upload_to_blob(self.model_path, model_blob_name)
-            
-            # Create pool, job and task
-            pool_id = self._create_batch_pool()
+            # microseconds keep the blob and job names of back to back jobs apart
+            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+            # Upload input shards, model and task script to blob storage
+            input_urls, model_url, preprocessor_url, script_url = self._upload_inputs(timestamp)
+            logging.info(
+                f"Uploaded {self.upload_stats['uploaded_bytes']} bytes, skipped "
+                f"{self.upload_stats['skipped_bytes']} bytes already in blob storage"
+            )
+            output_blob_names = [f"predictions-{timestamp}/part-{i:05d}.csv" for i in range(len(input_urls))]
+
+            # Reuse the warm pool and create a job with one task per shard
+            pool_id = self.pool_registry.get_or_create_pool()
             job_id = self._create_batch_job(pool_id)
-            task_id = self._create_batch_task(job_id, input_url, model_url)
-            
-            logging.info(f"Batch prediction job submitted. Job ID: {job_id}, Task ID: {task_id}")
-            
-            # Monitor task status
-            task = self.batch_client.task.get(job_id, task_id)
-            while task.state != 'completed':
-                task = self.batch_client.task.get(job_id, task_id)
-            
-            # Download results
-            container_client = self.blob_client.get_container_client(self.container_name)
-            blob_client = container_client.get_blob_client("predictions.csv")
-            
-            predictions_path = os.path.join("predictions", f"predictions_{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv")
-            os.makedirs("predictions", exist_ok=True)
-            
-            with open(predictions_path, "wb") as f:
-                f.write(blob_client.download_blob().readall())
-            
+            task_ids = self._create_batch_tasks(
+                job_id, input_urls, model_url, preprocessor_url, script_url, output_blob_names
+            )
+
+            logging.info(f"Batch prediction job submitted. Job ID: {job_id}, {len(task_ids)} tasks")
+
+            # Monitor the tasks and collect their outputs as they finish
+            parts_dir = os.path.join(BATCH_PREDICTION_OUTPUT_DIR, f"predictions_{timestamp}_parts")
+            os.makedirs(parts_dir, exist_ok=True)
+            part_paths = self._wait_for_tasks(job_id, dict(zip(task_ids, output_blob_names)), parts_dir)
+
+            predictions_path = os.path.join(BATCH_PREDICTION_OUTPUT_DIR, f"predictions_{timestamp}.csv")
+            self._merge_outputs([part_paths[task_id] for task_id in task_ids], predictions_path)
+            for part_path in part_paths.values():
+                os.remove(part_path)
+            os.rmdir(parts_dir)
+
             logging.info(f"Batch prediction completed. Results saved to {predictions_path}")
-            
-            # Clean up
+
+            # Clean up the job, the pool stays warm for the next one and scales down when idle
             self.batch_client.job.delete(job_id)
-            self.batch_client.pool.delete(pool_id)
-            
+
             return predictions_path
-            
+
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-def start_batch_prediction(input_file_path: str) -> str:
+    def teardown(self):
+        """Delete the batch pool, e.g. when no more jobs are expected"""
+        try:
+            self.pool_registry.teardown()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+def start_batch_prediction(input_file_path: str, backend: str = BATCH_PREDICTION_BACKEND, **kwargs) -> str:
     """
     Start batch prediction process
     Args:
         input_file_path (str): Path to input file
+        backend (str): "azure" for Azure Batch or "local" for a local process pool
+        **kwargs: passed to the backend, e.g. n_workers for the local backend or
+            n_shards, batch_client and blob_client for Azure
     Returns:
         str: Path to predictions file
     """
     try:
-        batch_prediction = BatchPrediction(input_file_path=input_file_path)
+        if backend == "local":
+            from networksecurity.pipeline.local_batch_prediction import LocalBatchPrediction
+
+            batch_prediction = LocalBatchPrediction(input_file_path=input_file_path, **kwargs)
+        elif backend == "azure":
+            batch_prediction = BatchPrediction(input_file_path=input_file_path, **kwargs)
+        else:
+            raise ValueError(f"Unknown batch prediction backend: {backend}")
         return batch_prediction.start_batch_prediction()
-        
+
     except Exception as e:
-        raise NetworkSecurityException(e, sys)
\ No newline at end of file
+        raise NetworkSecurityException(e, sys)
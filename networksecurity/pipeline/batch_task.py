@@ -1,48 +1,136 @@
+import collections
+import io
 import os
+import queue
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
 import pandas as pd
-import pickle
-from azure.storage.blob import BlobClient
 
-def run_prediction(input_url: str, model_url: str):
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+# bytes per download request; the input is scored one downloaded chunk at a time
+CHUNK_SIZE = 4 * 1024 * 1024
+# downloaded chunks buffered ahead of the model
+PREFETCH_CHUNKS = 2
+MAX_UPLOAD_CONCURRENCY = 4
+
+
+def _prefetch(iterable, maxsize):
+    """Iterates over iterable in a background thread, keeping at most maxsize items ahead"""
+    items = queue.Queue(maxsize)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((None, e))
+        items.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is done:
+            return
+        yield item
+
+
+def _iter_csv_frames(byte_chunks):
+    """Parses a csv arriving as arbitrary byte chunks into one dataframe per chunk of whole rows"""
+    header = None
+    remainder = b""
+    for chunk in byte_chunks:
+        data = remainder + chunk
+        cut = data.rfind(b"\n") + 1
+        lines, remainder = data[:cut], data[cut:]
+        if header is None and lines:
+            header_end = lines.index(b"\n") + 1
+            header, lines = lines[:header_end], lines[header_end:]
+        if lines:
+            yield pd.read_csv(io.BytesIO(header + lines))
+    if header is not None and remainder.strip():
+        yield pd.read_csv(io.BytesIO(header + remainder))
+
+
+def stream_predictions(input_blob, network_model, output_blob,
+                       max_upload_concurrency=MAX_UPLOAD_CONCURRENCY):
+    """
+    Scores the csv in input_blob chunk by chunk and writes the predictions to output_blob as
+    staged blocks, committed in order at the end. Downloading the next chunk, scoring the
+    current one and uploading the previous ones overlap, and only a few chunks are held in
+    memory at a time.
+
+    Returns:
+        int: number of rows scored
+    """
+    block_ids = []
+    pending_uploads = collections.deque()
+    n_rows = 0
+    with ThreadPoolExecutor(max_workers=max_upload_concurrency) as executor:
+        frames = _iter_csv_frames(_prefetch(input_blob.download_blob().chunks(), PREFETCH_CHUNKS))
+        for i, df in enumerate(frames):
+            results = pd.DataFrame(network_model.predict(df), columns=['prediction'])
+            block_id = f"{i:08d}"
+            block_ids.append(block_id)
+            pending_uploads.append(executor.submit(
+                output_blob.stage_block, block_id, results.to_csv(index=False, header=i == 0).encode()
+            ))
+            n_rows += len(df)
+            # bound the predictions waiting for upload
+            while len(pending_uploads) > 2 * max_upload_concurrency:
+                pending_uploads.popleft().result()
+        for upload in pending_uploads:
+            upload.result()
+    if not block_ids:
+        block_ids.append(f"{0:08d}")
+        output_blob.stage_block(block_ids[0], b"prediction\n")
+    output_blob.commit_block_list(block_ids)
+    return n_rows
+
+
+def _load_blob_object(blob):
+    # the model files are saved with joblib, which also reads plain pickles
+    return joblib.load(io.BytesIO(blob.download_blob().readall()))
+
+
+def run_prediction(input_url: str, model_url: str, output_blob_name: str = 'predictions.csv',
+                   preprocessor_url: str = None):
     try:
-        # Download input file and model
-        input_blob = BlobClient.from_blob_url(input_url)
-        model_blob = BlobClient.from_blob_url(model_url)
-
-        with open('input.csv', 'wb') as f:
-            f.write(input_blob.download_blob().readall())
-        with open('model.pkl', 'wb') as f:
-            f.write(model_blob.download_blob().readall())
-
-        # Load data and model
-        data = pd.read_csv('input.csv')
-        with open('model.pkl', 'rb') as f:
-            model = pickle.load(f)
-
-        # Make predictions
-        predictions = model.predict(data)
-        results = pd.DataFrame(predictions, columns=['prediction'])
-        results.to_csv('predictions.csv', index=False)
-
-        # Upload results
+        from azure.storage.blob import BlobClient
+
+        # Load the preprocessor and model, the input is streamed
+        model = _load_blob_object(BlobClient.from_blob_url(model_url))
+        if preprocessor_url is not None:
+            preprocessor = _load_blob_object(BlobClient.from_blob_url(preprocessor_url))
+            network_model = NetworkModel(preprocessor=preprocessor, model=model)
+        else:
+            network_model = model
+
+        # the first download request uses max_single_get_size, which defaults to 32MB
+        input_blob = BlobClient.from_blob_url(
+            input_url, max_single_get_size=CHUNK_SIZE, max_chunk_get_size=CHUNK_SIZE
+        )
         output_blob = BlobClient.from_connection_string(
             os.environ['AZ_STORAGE_CONNECTION_STRING'],
             'network-security-predictions',
-            'predictions.csv'
+            output_blob_name
         )
-        with open('predictions.csv', 'rb') as f:
-            output_blob.upload_blob(f)
+        n_rows = stream_predictions(input_blob, network_model, output_blob)
+        print(f"Scored {n_rows} rows into {output_blob_name}")
 
     except Exception as e:
         print(f"Error in batch task: {str(e)}", file=sys.stderr)
         raise e
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python batch_task.py <input_url> <model_url>")
+    if len(sys.argv) not in (3, 4, 5):
+        print("Usage: python batch_task.py <input_url> <model_url> [<output_blob_name> [<preprocessor_url>]]")
         sys.exit(1)
-    
-    input_url = sys.argv[1]
-    model_url = sys.argv[2]
-    run_prediction(input_url, model_url)
+
+    run_prediction(*sys.argv[1:])
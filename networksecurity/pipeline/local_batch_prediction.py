@@ -0,0 +1,127 @@
+import io
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from networksecurity.constant.training_pipeline import (
+    BATCH_PREDICTION_MODEL_DIR,
+    BATCH_PREDICTION_OUTPUT_DIR,
+    BATCH_PREDICTION_SHARDS_PER_WORKER,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.utils import get_csv_shard_ranges
+from networksecurity.utils.ml_utils.model.estimator import load_network_model
+
+# NetworkModel of the worker process, loaded once by _init_worker
+_network_model = None
+
+
+def _init_worker(model_dir):
+    global _network_model
+    # one process per core, so the model itself must not start more threads
+    threadpool_limits(1)
+    _network_model = load_network_model(model_dir, mmap_mode="r")
+    if hasattr(_network_model.model, "n_jobs"):
+        _network_model.model.n_jobs = 1
+
+
+def _predict_shard(shard):
+    """Scores one shard and writes its predictions to shard["output_path"]"""
+    if shard["format"] == "parquet":
+        import pyarrow.parquet as pq
+
+        df = pq.ParquetFile(shard["input_path"]).read_row_groups(shard["row_groups"]).to_pandas()
+    else:
+        with open(shard["input_path"], "rb") as file_obj:
+            file_obj.seek(shard["start"])
+            data = file_obj.read(shard["end"] - shard["start"])
+        df = pd.read_csv(io.BytesIO(data), header=None, names=shard["columns"])
+    results = pd.DataFrame(_network_model.predict(df), columns=["prediction"])
+    results.to_csv(shard["output_path"], index=False, header=False)
+    return len(results)
+
+
+class LocalBatchPrediction:
+    """
+    Batch prediction on this machine. The input is split into row ranges that are scored by
+    a pool of worker processes, each loading the model once, and the partitioned outputs are
+    merged in input order.
+    """
+
+    def __init__(self, input_file_path, model_dir=BATCH_PREDICTION_MODEL_DIR, n_workers=None,
+                 output_dir=BATCH_PREDICTION_OUTPUT_DIR):
+        try:
+            self.input_file_path = input_file_path
+            self.model_dir = model_dir
+            self.n_workers = n_workers or os.cpu_count()
+            self.output_dir = output_dir
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _get_csv_shards(self, n_shards):
+        header, ranges = get_csv_shard_ranges(self.input_file_path, n_shards)
+        columns = pd.read_csv(io.BytesIO(header)).columns.tolist()
+        return [
+            {"format": "csv", "input_path": self.input_file_path, "columns": columns,
+             "start": start, "end": end}
+            for start, end in ranges
+        ]
+
+    def _get_parquet_shards(self, n_shards):
+        """Splits the parquet file into contiguous runs of row groups"""
+        import pyarrow.parquet as pq
+
+        n_row_groups = pq.ParquetFile(self.input_file_path).num_row_groups
+        n_shards = min(n_shards, n_row_groups)
+        return [
+            {"format": "parquet", "input_path": self.input_file_path,
+             "row_groups": list(range(n_row_groups * i // n_shards, n_row_groups * (i + 1) // n_shards))}
+            for i in range(n_shards)
+        ]
+
+    def get_shards(self, n_shards):
+        if self.input_file_path.endswith(".parquet"):
+            return self._get_parquet_shards(n_shards)
+        return self._get_csv_shards(n_shards)
+
+    def start_batch_prediction(self):
+        """Start batch prediction process"""
+        try:
+            logging.info(f"Starting local batch prediction with {self.n_workers} workers")
+            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            predictions_path = os.path.join(self.output_dir, f"predictions_{timestamp}.csv")
+            partition_dir = os.path.join(self.output_dir, f"predictions_{timestamp}_parts")
+            os.makedirs(partition_dir, exist_ok=True)
+
+            shards = self.get_shards(self.n_workers * BATCH_PREDICTION_SHARDS_PER_WORKER)
+            for i, shard in enumerate(shards):
+                shard["output_path"] = os.path.join(partition_dir, f"part-{i:05d}.csv")
+
+            start = datetime.now()
+            with ProcessPoolExecutor(
+                max_workers=self.n_workers, initializer=_init_worker, initargs=(self.model_dir,)
+            ) as executor:
+                n_rows = sum(executor.map(_predict_shard, shards))
+            elapsed = (datetime.now() - start).total_seconds()
+
+            # the partitions are in input order, so merging is a plain concatenation
+            with open(predictions_path, "wb") as output_file:
+                output_file.write(b"prediction\n")
+                for shard in shards:
+                    with open(shard["output_path"], "rb") as part_file:
+                        shutil.copyfileobj(part_file, output_file)
+            shutil.rmtree(partition_dir)
+
+            logging.info(
+                f"Local batch prediction scored {n_rows} rows in {len(shards)} shards in {elapsed:.2f}s "
+                f"({n_rows / max(elapsed, 1e-9):.0f} rows/s). Results saved to {predictions_path}"
+            )
+            return predictions_path
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -2,12 +2,13 @@ import os
 import sys
 
 from networksecurity.exception.exception import NetworkSecurityException
-from networksecurity.logging.logger import logging
+from networksecurity.logging.logger import logging, timed_stage
 
 from networksecurity.components.data_ingestion import DataIngestion
 from networksecurity.components.data_validation import DataValidation
 from networksecurity.components.data_transformation import DataTransformation
 from networksecurity.components.model_trainer import ModelTrainer
+from networksecurity.components.model_distillation import ModelDistillation
 
 from networksecurity.entity.config_entity import(
     TrainingPipelineConfig,
@@ -15,6 +16,7 @@ from networksecurity.entity.config_entity import(
     DataValidationConfig,
     DataTransformationConfig,
     ModelTrainerConfig,
+    ModelDistillationConfig,
 )
 
 from networksecurity.entity.artifact_entity import (
@@ -22,11 +24,27 @@ from networksecurity.entity.artifact_entity import (
     DataValidationArtifact,
     DataTransformationArtifact,
     ModelTrainerArtifact,
+    ModelDistillationArtifact,
 )
 
 from networksecurity.constant.training_pipeline import TRAINING_BUCKET_NAME
-from networksecurity.cloud.s3_syncer import S3Sync
-from networksecurity.constant.training_pipeline import SAVED_MODEL_DIR
+from networksecurity.constant.training_pipeline import (
+    DATA_INGESTION_DIR_NAME,
+    DATA_VALIDATION_DIR_NAME,
+    DATA_TRANSFORMATION_DIR_NAME,
+    MODEL_TRAINER_DIR_NAME,
+    MODEL_DISTILLATION_DIR_NAME,
+)
+from networksecurity.constant.training_pipeline import MODEL_DISTILLATION_ENABLED
+from networksecurity.constant.training_pipeline import (
+    ARTIFACT_STORE_ENABLED,
+    ARTIFACT_STORE_BLOB_DIR_NAME,
+    ARTIFACT_STORE_MANIFEST_DIR_NAME,
+)
+from networksecurity.utils.main_utils.artifact_store import ArtifactStore
+from networksecurity.utils.main_utils.pipeline_profiler import PipelineProfiler, profile_step
+from networksecurity.cloud.s3_syncer import S3Sync, BackgroundS3Sync
+from networksecurity.utils.ml_utils.tracking.mlflow_logger import AsyncMlflowLogger
 import sys
 
 
@@ -34,8 +52,13 @@ class TrainingPipeline:
     def __init__(self):
         self.training_pipeline_config=TrainingPipelineConfig()
         self.s3_sync = S3Sync()
+        self.background_s3_sync = BackgroundS3Sync(self.s3_sync)
+        self.artifact_store = ArtifactStore(artifact_root=self.training_pipeline_config.artifact_name)
+        self.mlflow_logger = AsyncMlflowLogger(run_name=self.training_pipeline_config.timestamp)
+        self.profiler = PipelineProfiler()
         
 
+    @profile_step("data_ingestion")
     def start_data_ingestion(self):
         try:
             self.data_ingestion_config=DataIngestionConfig(training_pipeline_config=self.training_pipeline_config)
@@ -48,6 +71,7 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e,sys)
         
+    @profile_step("data_validation")
     def start_data_validation(self,data_ingestion_artifact:DataIngestionArtifact):
         try:
             data_validation_config=DataValidationConfig(training_pipeline_config=self.training_pipeline_config)
@@ -58,6 +82,7 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e,sys)
         
+    @profile_step("data_transformation")
     def start_data_transformation(self,data_validation_artifact:DataValidationArtifact):
         try:
             data_transformation_config = DataTransformationConfig(training_pipeline_config=self.training_pipeline_config)
@@ -69,7 +94,9 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e,sys)
         
-    def start_model_trainer(self,data_transformation_artifact:DataTransformationArtifact)->ModelTrainerArtifact:
+    @profile_step("model_trainer")
+    def start_model_trainer(self,data_transformation_artifact:DataTransformationArtifact,
+                            data_validation_artifact:DataValidationArtifact=None)->ModelTrainerArtifact:
         try:
             self.model_trainer_config: ModelTrainerConfig = ModelTrainerConfig(
                 training_pipeline_config=self.training_pipeline_config
@@ -78,6 +105,8 @@ class TrainingPipeline:
             model_trainer = ModelTrainer(
                 data_transformation_artifact=data_transformation_artifact,
                 model_trainer_config=self.model_trainer_config,
+                data_validation_artifact=data_validation_artifact,
+                mlflow_logger=self.mlflow_logger,
             )
 
             model_trainer_artifact = model_trainer.initiate_model_trainer()
@@ -87,34 +116,94 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    ## local artifact is going to s3 bucket    
-    def sync_artifact_dir_to_s3(self):
+    @profile_step("model_distillation")
+    def start_model_distillation(self,data_transformation_artifact:DataTransformationArtifact,
+                                 model_trainer_artifact:ModelTrainerArtifact)->ModelDistillationArtifact:
         try:
-            aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/artifact/{self.training_pipeline_config.timestamp}"
-            self.s3_sync.sync_folder_to_s3(folder = self.training_pipeline_config.artifact_dir,aws_bucket_url=aws_bucket_url)
+            model_distillation_config = ModelDistillationConfig(training_pipeline_config=self.training_pipeline_config)
+            model_distillation = ModelDistillation(
+                model_distillation_config=model_distillation_config,
+                data_transformation_artifact=data_transformation_artifact,
+                model_trainer_artifact=model_trainer_artifact,
+            )
+            return model_distillation.initiate_model_distillation()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    ## a finished stage's artifacts are uploaded in the background while the next stages run
+    def queue_stage_artifact_upload(self, stage_dir_name):
+        try:
+            if ARTIFACT_STORE_ENABLED:
+                # only the stage's blobs that are new to the bucket and the run manifest are sent
+                manifest_path = self.artifact_store.commit(self.training_pipeline_config.artifact_dir, stage_dir_name)
+                run_name = os.path.splitext(os.path.basename(manifest_path))[0]
+                self.background_s3_sync.sync_folder_to_s3(
+                    folder=self.artifact_store.blob_dir,
+                    aws_bucket_url=f"s3://{TRAINING_BUCKET_NAME}/artifact/{ARTIFACT_STORE_BLOB_DIR_NAME}",
+                    file_paths=self.artifact_store.get_blob_names(run_name, stage_dir_name),
+                )
+                self.background_s3_sync.sync_folder_to_s3(
+                    folder=self.artifact_store.manifest_dir,
+                    aws_bucket_url=f"s3://{TRAINING_BUCKET_NAME}/artifact/{ARTIFACT_STORE_MANIFEST_DIR_NAME}",
+                    file_paths=[os.path.basename(manifest_path)],
+                )
+                return
+            folder = os.path.join(self.training_pipeline_config.artifact_dir, stage_dir_name)
+            aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/artifact/{self.training_pipeline_config.timestamp}/{stage_dir_name}"
+            self.background_s3_sync.sync_folder_to_s3(folder=folder, aws_bucket_url=aws_bucket_url)
         except Exception as e:
             raise NetworkSecurityException(e,sys)
-        
-    ## local final model is going to s3 bucket 
-        
-    def sync_saved_model_dir_to_s3(self):
+
+    def queue_saved_model_upload(self):
         try:
             aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/final_model/{self.training_pipeline_config.timestamp}"
-            self.s3_sync.sync_folder_to_s3(folder = self.training_pipeline_config.model_dir,aws_bucket_url=aws_bucket_url)
+            self.background_s3_sync.sync_folder_to_s3(folder=self.training_pipeline_config.model_dir, aws_bucket_url=aws_bucket_url)
         except Exception as e:
             raise NetworkSecurityException(e,sys)
-        
-    
-    
+
+    @timed_stage("profile_report")
+    def write_profile_report(self):
+        try:
+            report = self.profiler.write_report(self.training_pipeline_config.profile_report_file_path)
+            # compared between runs in MLflow
+            self.mlflow_logger.log_dict(report, os.path.basename(self.training_pipeline_config.profile_report_file_path))
+            self.mlflow_logger.log_metrics(self.profiler.get_metrics())
+        except Exception as e:
+            raise NetworkSecurityException(e,sys)
+
+    @timed_stage("training_pipeline")
     def run_pipeline(self):
         try:
-            data_ingestion_artifact=self.start_data_ingestion()
-            data_validation_artifact=self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact=self.start_data_transformation(data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact=self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            
-            self.sync_artifact_dir_to_s3()
-            self.sync_saved_model_dir_to_s3()
+            with self.profiler.activate():
+                data_ingestion_artifact=self.start_data_ingestion()
+                self.queue_stage_artifact_upload(DATA_INGESTION_DIR_NAME)
+                data_validation_artifact=self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+                self.queue_stage_artifact_upload(DATA_VALIDATION_DIR_NAME)
+                data_transformation_artifact=self.start_data_transformation(data_validation_artifact=data_validation_artifact)
+                self.queue_stage_artifact_upload(DATA_TRANSFORMATION_DIR_NAME)
+                model_trainer_artifact=self.start_model_trainer(data_transformation_artifact=data_transformation_artifact,
+                                                                data_validation_artifact=data_validation_artifact)
+                self.queue_stage_artifact_upload(MODEL_TRAINER_DIR_NAME)
+                self.queue_saved_model_upload()
+                if MODEL_DISTILLATION_ENABLED:
+                    self.start_model_distillation(data_transformation_artifact=data_transformation_artifact,
+                                                  model_trainer_artifact=model_trainer_artifact)
+                    self.queue_stage_artifact_upload(MODEL_DISTILLATION_DIR_NAME)
+                    # distillation adds metadata to the trained model and a surrogate to final_model,
+                    # the re-syncs only send the changed files
+                    self.queue_stage_artifact_upload(MODEL_TRAINER_DIR_NAME)
+                    self.queue_saved_model_upload()
+
+                # Only wait for the uploads that are still running
+                with profile_step("s3_upload_wait"):
+                    self.background_s3_sync.close()
+                if ARTIFACT_STORE_ENABLED:
+                    with profile_step("artifact_garbage_collection"):
+                        self.artifact_store.collect_garbage()
+            self.write_profile_report()
+
+            # Only wait for the MLflow uploads once everything else is done
+            self.mlflow_logger.close()
             
             return model_trainer_artifact
         except Exception as e:
@@ -0,0 +1,168 @@
+import atexit
+import glob
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager, nullcontext
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    values,
+)
+from starlette.routing import Match
+
+## every pre-forked worker writes its samples to memory-mapped files in this directory and
+## /metrics adds them up, whichever worker serves it
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+_metrics = None
+
+
+class _ServingMetrics:
+    """The serving metrics; updating a sample is a locked write to a memory-mapped file, a few microseconds"""
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            "http_request_duration_seconds", "Request latency by route", ["method", "route"]
+        )
+        self.requests = Counter(
+            "http_requests", "Requests by route and status code", ["method", "route", "status_code"]
+        )
+        self.in_flight_requests = Gauge(
+            "http_requests_in_flight", "Requests being served", multiprocess_mode="livesum"
+        )
+        self.prediction_rows = Histogram(
+            "prediction_rows",
+            "Rows scored per prediction request",
+            buckets=(1, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+        )
+        self.prediction_stage_latency = Histogram(
+            "prediction_stage_duration_seconds",
+            "Time spent in the preprocessor and in the model per prediction request",
+            ["stage"],
+        )
+        self.model_load_duration = Gauge(
+            "model_load_duration_seconds", "Duration of the latest model load", multiprocess_mode="mostrecent"
+        )
+        self.model_loads = Counter("model_loads", "Model loads, including reloads after a retrain")
+        self.model_cache_requests = Counter(
+            "model_cache_requests", "Model cache lookups by result, hit or miss", ["result"]
+        )
+
+
+def _remove_metrics_dir(multiproc_dir, owner_pid):
+    # forked workers run the parent's atexit hooks too, only the parent removes the directory
+    if os.getpid() == owner_pid:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+
+
+def setup_metrics(multiproc_dir: str = None) -> str:
+    """
+    Creates the serving metrics in multiprocess mode. Called by serve() in the parent before
+    the model is loaded and the workers are forked; until then recording is a no-op.
+
+    Args:
+      multiproc_dir: directory for the samples, PROMETHEUS_MULTIPROC_DIR by default. Samples
+        left from an earlier run are removed. Without either, a temporary directory is used
+        and removed when the parent exits.
+
+    Returns:
+      The directory the samples are written to
+    """
+    global _metrics
+    if _metrics is not None:
+        return os.environ[MULTIPROC_DIR_ENV]
+    multiproc_dir = multiproc_dir or os.environ.get(MULTIPROC_DIR_ENV)
+    if multiproc_dir is None:
+        multiproc_dir = tempfile.mkdtemp(prefix="networksecurity-metrics-")
+        atexit.register(_remove_metrics_dir, multiproc_dir, os.getpid())
+    else:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for file_path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(file_path)
+    # prometheus_client reads the directory from the environment whenever a sample file is opened
+    os.environ[MULTIPROC_DIR_ENV] = multiproc_dir
+    # the value class is chosen when prometheus_client is imported, before the directory was set
+    values.ValueClass = values.MultiProcessValue()
+    _metrics = _ServingMetrics()
+    return multiproc_dir
+
+
+@contextmanager
+def hide_metrics_dir():
+    """
+    Removes PROMETHEUS_MULTIPROC_DIR from the environment for the duration, so processes
+    started meanwhile (e.g. the loky workers of a training run) do not inherit it
+    """
+    multiproc_dir = os.environ.pop(MULTIPROC_DIR_ENV, None)
+    try:
+        yield
+    finally:
+        if multiproc_dir is not None:
+            os.environ[MULTIPROC_DIR_ENV] = multiproc_dir
+
+
+def get_route_path(routes, scope) -> str:
+    """Route template the request matched, so path parameters do not create new series"""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def track_in_flight():
+    if _metrics is None:
+        return nullcontext()
+    return _metrics.in_flight_requests.track_inprogress()
+
+
+def record_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    if _metrics is None:
+        return
+    _metrics.request_latency.labels(method, route).observe(seconds)
+    _metrics.requests.labels(method, route, str(status_code)).inc()
+
+
+def record_prediction(n_rows: int, timings: dict) -> None:
+    if _metrics is None:
+        return
+    _metrics.prediction_rows.observe(n_rows)
+    for stage, seconds in timings.items():
+        _metrics.prediction_stage_latency.labels(stage).observe(seconds)
+
+
+def record_model_cache_lookup(hit: bool) -> None:
+    if _metrics is None:
+        return
+    _metrics.model_cache_requests.labels("hit" if hit else "miss").inc()
+
+
+def record_model_load(seconds: float) -> None:
+    if _metrics is None:
+        return
+    _metrics.model_loads.inc()
+    _metrics.model_load_duration.set(seconds)
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drops the in-flight requests of a worker that exited, its counters are kept"""
+    if _metrics is None:
+        return
+    multiprocess.mark_process_dead(pid)
+
+
+def generate_metrics() -> bytes:
+    """Metrics of all worker processes in the Prometheus text format"""
+    if _metrics is None:
+        return b""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
@@ -0,0 +1,162 @@
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from networksecurity.constant.training_pipeline import (
+    MODEL_DISTILLATION_SURROGATE_MODEL_NAME,
+    MODEL_FILE_NAME,
+    PREPROCESSOR_FILE_NAME,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.serving.metrics import (
+    mark_worker_dead,
+    record_model_cache_lookup,
+    record_model_load,
+    setup_metrics,
+)
+from networksecurity.utils.ml_utils.model.estimator import load_network_model
+
+
+class ModelCache:
+    """
+    Keeps the serving NetworkModel in memory and reloads it only when a file in model_dir
+    changed. Loaded in the parent before the workers are forked, so every worker serves
+    the same copy-on-write pages until a retrain replaces the files.
+    """
+
+    def __init__(self, model_dir: str, fidelity_threshold: float = None, mmap_mode: str = None):
+        self.model_dir = model_dir
+        self.fidelity_threshold = fidelity_threshold
+        self.mmap_mode = mmap_mode
+        self._model = None
+        self._mtimes = None
+
+    def _get_mtimes(self):
+        mtimes = {}
+        for file_name in (PREPROCESSOR_FILE_NAME, MODEL_FILE_NAME, MODEL_DISTILLATION_SURROGATE_MODEL_NAME):
+            file_path = os.path.join(self.model_dir, file_name)
+            mtimes[file_name] = os.stat(file_path).st_mtime_ns if os.path.exists(file_path) else None
+        return mtimes
+
+    def get(self):
+        try:
+            mtimes = self._get_mtimes()
+            if self._model is None or mtimes != self._mtimes:
+                start = time.perf_counter()
+                self._model = load_network_model(
+                    self.model_dir, fidelity_threshold=self.fidelity_threshold, mmap_mode=self.mmap_mode
+                )
+                self._mtimes = mtimes
+                load_time = time.perf_counter() - start
+                record_model_cache_lookup(hit=False)
+                record_model_load(load_time)
+                logging.info(
+                    f"Loaded the model from {self.model_dir} in {load_time:.3f}s "
+                    f"in process {os.getpid()}"
+                )
+            else:
+                record_model_cache_lookup(hit=True)
+            return self._model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def _run_worker(app, sock):
+    # the collector may run again; objects inherited from the parent stay frozen
+    gc.enable()
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app))
+    server.run(sockets=[sock])
+
+
+def _fork_worker(app, sock) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            _run_worker(app, sock)
+        except BaseException:
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    logging.info(f"Started serving worker {pid}")
+    return pid
+
+
+def serve(app, host: str, port: int, num_workers: int = 1, model_cache: ModelCache = None) -> None:
+    """
+    Serves app with num_workers pre-forked uvicorn processes accepting on one shared socket.
+
+    The Prometheus metrics are set up and the model is loaded into model_cache in the parent
+    before forking. Objects that exist at
+    fork time are moved to the permanent gc generation (gc.freeze), so garbage collections
+    in the workers do not write to their pages and the workers keep sharing them
+    copy-on-write. Workers that die are restarted; SIGINT/SIGTERM stop all of them.
+
+    Args:
+      app: ASGI application
+      host: interface to bind
+      port: port to bind
+      num_workers: number of worker processes; 1 runs uvicorn in this process
+      model_cache: optional ModelCache to warm before forking
+    """
+    try:
+        setup_metrics()
+        if num_workers <= 1:
+            if model_cache is not None:
+                model_cache.get()
+            uvicorn.run(app, host=host, port=port)
+            return
+
+        # no collections between loading the model and forking, so no freed holes are
+        # left in the pages the workers will share
+        gc.disable()
+        if model_cache is not None:
+            model_cache.get()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        logging.info(f"Serving on {host}:{port} with {num_workers} workers")
+
+        gc.freeze()
+        workers = {_fork_worker(app, sock) for _ in range(num_workers)}
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            for pid in workers:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        while workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            workers.discard(pid)
+            mark_worker_dead(pid)
+            if not stopping:
+                logging.info(f"Serving worker {pid} exited with status {status}, restarting it")
+                workers.add(_fork_worker(app, sock))
+        sock.close()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
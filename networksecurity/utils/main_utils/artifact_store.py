@@ -0,0 +1,223 @@
+import fnmatch
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from datetime import datetime
+
+from networksecurity.constant.training_pipeline import (
+    ARTIFACT_DIR,
+    ARTIFACT_STORE_BLOB_DIR_NAME,
+    ARTIFACT_STORE_MANIFEST_DIR_NAME,
+    ARTIFACT_STORE_RETAIN_RUNS,
+    ARTIFACT_STORE_TMP_FILE_PATTERNS,
+)
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.utils import get_file_checksum
+
+RUN_TIMESTAMP_FORMAT = "%m_%d_%Y_%H_%M_%S"
+
+
+def _get_run_time(run_name: str):
+    try:
+        return datetime.strptime(run_name, RUN_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def _remove_readonly(func, path, exc_info):
+    # stored blobs are read-only, which stops rmtree on Windows
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for the run artifacts under artifact_root.
+
+    Every committed file is kept once in blobs/<sha256[:2]>/<sha256> and the file in the run
+    directory becomes a hard link to that blob, so identical files across stages and runs
+    (e.g. the ingested and validated csvs) use disk space once. Blobs are read-only, which
+    makes an in-place write to a committed file fail instead of changing other runs.
+    manifests/<run>.json maps the run's relative paths to their blobs.
+    """
+
+    def __init__(self, artifact_root: str = ARTIFACT_DIR, retain_runs: int = ARTIFACT_STORE_RETAIN_RUNS):
+        self.artifact_root = artifact_root
+        self.blob_dir = os.path.join(artifact_root, ARTIFACT_STORE_BLOB_DIR_NAME)
+        self.manifest_dir = os.path.join(artifact_root, ARTIFACT_STORE_MANIFEST_DIR_NAME)
+        self.retain_runs = retain_runs
+
+    def get_blob_path(self, checksum: str) -> str:
+        return os.path.join(self.blob_dir, checksum[:2], checksum)
+
+    def get_manifest_path(self, run_name: str) -> str:
+        return os.path.join(self.manifest_dir, f"{run_name}.json")
+
+    def read_manifest(self, run_name: str) -> dict:
+        manifest_path = self.get_manifest_path(run_name)
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def _write_manifest(self, run_name: str, manifest: dict):
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        manifest_path = self.get_manifest_path(run_name)
+        tmp_manifest_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(tmp_manifest_path, manifest_path)
+
+    def _store_file(self, file_path: str):
+        """
+        Moves the content of file_path into the blob store and links the file to it.
+        Returns the checksum and whether the content was new to the store.
+        """
+        checksum = get_file_checksum(file_path)
+        blob_path = self.get_blob_path(checksum)
+        if os.path.exists(blob_path):
+            if not os.path.samefile(file_path, blob_path):
+                # drop the duplicate content and link to the stored blob instead
+                tmp_file_path = f"{file_path}.{os.getpid()}.link"
+                try:
+                    os.link(blob_path, tmp_file_path)
+                    os.replace(tmp_file_path, file_path)
+                except OSError:
+                    logging.warning(f"Could not hard link {file_path}, keeping a copy")
+            return checksum, False
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_blob_path = f"{blob_path}.{os.getpid()}.tmp"
+        try:
+            os.link(file_path, tmp_blob_path)
+        except OSError:
+            # file systems without hard links store a copy
+            shutil.copyfile(file_path, tmp_blob_path)
+        os.chmod(tmp_blob_path, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(tmp_blob_path, blob_path)
+        return checksum, True
+
+    def commit(self, run_dir: str, sub_dir: str = None) -> str:
+        """
+        Stores the files of run_dir, or only of run_dir/sub_dir, and records them in the
+        run's manifest. Files committed again replace their previous manifest entries.
+
+        Returns:
+            str: path of the run's manifest
+        """
+        try:
+            run_name = os.path.basename(os.path.normpath(run_dir))
+            manifest = self.read_manifest(run_name)
+            commit_dir = run_dir if sub_dir is None else os.path.join(run_dir, sub_dir)
+            new_bytes = 0
+            for root, _, file_names in os.walk(commit_dir):
+                for file_name in file_names:
+                    file_path = os.path.join(root, file_name)
+                    checksum, is_new = self._store_file(file_path)
+                    size = os.path.getsize(file_path)
+                    new_bytes += size if is_new else 0
+                    relative_path = os.path.relpath(file_path, run_dir).replace(os.sep, "/")
+                    manifest[relative_path] = {"sha256": checksum, "size": size}
+            self._write_manifest(run_name, manifest)
+            logging.info(f"Committed {commit_dir} to the artifact store, {new_bytes} new bytes")
+            return self.get_manifest_path(run_name)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_blob_names(self, run_name: str, sub_dir: str = None) -> list:
+        """
+        Paths relative to blob_dir of the blobs in the run's manifest, or only of the files
+        under sub_dir, e.g. to upload just the blobs a commit referred to
+        """
+        prefix = None if sub_dir is None else f"{sub_dir.strip('/')}/"
+        checksums = {
+            entry["sha256"]
+            for relative_path, entry in self.read_manifest(run_name).items()
+            if prefix is None or relative_path.startswith(prefix)
+        }
+        return [os.path.join(checksum[:2], checksum) for checksum in sorted(checksums)]
+
+    def materialize(self, run_name: str, target_dir: str) -> None:
+        """Recreates a run directory from its manifest, e.g. after downloading blobs from S3"""
+        try:
+            for relative_path, entry in self.read_manifest(run_name).items():
+                file_path = os.path.join(target_dir, *relative_path.split("/"))
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                if os.path.exists(file_path):
+                    continue
+                try:
+                    os.link(self.get_blob_path(entry["sha256"]), file_path)
+                except OSError:
+                    shutil.copyfile(self.get_blob_path(entry["sha256"]), file_path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _get_manifest_names(self) -> list:
+        if not os.path.isdir(self.manifest_dir):
+            return []
+        return [
+            os.path.splitext(file_name)[0]
+            for file_name in os.listdir(self.manifest_dir)
+            if file_name.endswith(".json")
+        ]
+
+    def get_runs(self) -> list:
+        """
+        Names of the runs with a manifest, oldest first. Manifests not named by a run
+        timestamp (e.g. copied in by hand) are skipped.
+        """
+        runs = []
+        for run_name in self._get_manifest_names():
+            if _get_run_time(run_name) is None:
+                logging.warning(f"Skipping manifest {run_name}.json, its name is not a run timestamp")
+                continue
+            runs.append(run_name)
+        return sorted(runs, key=_get_run_time)
+
+    def collect_garbage(self) -> dict:
+        """
+        Deletes the runs older than the newest retain_runs, their manifests and every blob
+        that no remaining manifest refers to. Run directories without a manifest are kept.
+        Only the local store is collected, the blobs and manifests uploaded to S3 are kept:
+        blobs are shared between runs, so expiring them by age would break newer manifests.
+
+        Returns:
+            dict: number of deleted runs and blobs and the bytes freed
+        """
+        try:
+            start_time = time.time()
+            runs = self.get_runs()
+            expired_runs = runs[:-self.retain_runs] if self.retain_runs > 0 else runs
+            for run_name in expired_runs:
+                shutil.rmtree(os.path.join(self.artifact_root, run_name), onerror=_remove_readonly)
+                os.remove(self.get_manifest_path(run_name))
+
+            referenced = set()
+            for run_name in set(self._get_manifest_names()) - set(expired_runs):
+                referenced.update(entry["sha256"] for entry in self.read_manifest(run_name).values())
+
+            stats = {"deleted_runs": len(expired_runs), "deleted_blobs": 0, "freed_bytes": 0}
+            for root, _, file_names in os.walk(self.blob_dir):
+                for file_name in file_names:
+                    if file_name in referenced or any(
+                        fnmatch.fnmatch(file_name, pattern) for pattern in ARTIFACT_STORE_TMP_FILE_PATTERNS
+                    ):
+                        continue
+                    blob_path = os.path.join(root, file_name)
+                    blob_stat = os.stat(blob_path)
+                    # a blob linked from an older file keeps its mtime, the link and chmod
+                    # of _store_file update its ctime
+                    if max(blob_stat.st_mtime, blob_stat.st_ctime) >= start_time:
+                        continue
+                    stats["freed_bytes"] += blob_stat.st_size
+                    os.chmod(blob_path, stat.S_IWRITE)
+                    os.remove(blob_path)
+                    stats["deleted_blobs"] += 1
+            logging.info(f"Artifact store garbage collection: {stats}")
+            return stats
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
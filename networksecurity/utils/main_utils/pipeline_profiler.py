@@ -0,0 +1,178 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict
+
+from networksecurity.constant.training_pipeline import PIPELINE_PROFILE_TRACE_MEMORY
+from networksecurity.entity.artifact_entity import StepProfileArtifact
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging, timed_stage
+from networksecurity.utils.main_utils.utils import get_peak_rss_mb
+
+_current_profiler = ContextVar("pipeline_profiler", default=None)
+
+
+class PipelineProfiler:
+    """
+    Records wall time, cpu time, peak memory and rows per second of the pipeline stages and
+    their sub-steps, which are marked with profile_step. Steps started inside another step
+    are reported as its sub-steps.
+
+    cpu time is the process time of all threads of this process. Peak memory is how much the
+    step raised the peak RSS of the process, 0 if it stayed below an earlier peak. With
+    trace_memory it is the traced Python and numpy allocation peak above the memory in use
+    when the step started instead, which is exact per step but slows down allocations. Work
+    done in other processes, such as the grid search workers, is not included in either.
+    """
+
+    def __init__(self, trace_memory: bool = PIPELINE_PROFILE_TRACE_MEMORY):
+        self.trace_memory = trace_memory
+        self.steps = []
+        self._open_steps = []
+        self._started_tracemalloc = False
+        self._wall_time_s = 0.0
+        self._cpu_time_s = 0.0
+
+    @contextmanager
+    def activate(self):
+        """Makes this the profiler that profile_step records into, in the current context"""
+        token = _current_profiler.set(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            self._wall_time_s += time.perf_counter() - wall_start
+            self._cpu_time_s += time.process_time() - cpu_start
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            _current_profiler.reset(token)
+
+    def _enter_step(self, step):
+        profile = StepProfileArtifact(name=step.name)
+        (self._open_steps[-1].profile.steps if self._open_steps else self.steps).append(profile)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak so far belongs to every open step, the counter is reset for the new one
+            for open_step in self._open_steps:
+                open_step._peak_memory = max(open_step._peak_memory, peak)
+            tracemalloc.reset_peak()
+            step._start_memory = step._peak_memory = current
+        else:
+            step._start_rss_mb = get_peak_rss_mb()
+        self._open_steps.append(step)
+        return profile
+
+    def _exit_step(self, step, wall_time_s, cpu_time_s, failed):
+        self._open_steps.remove(step)
+        profile = step.profile
+        profile.wall_time_s = wall_time_s
+        profile.cpu_time_s = cpu_time_s
+        profile.max_rss_mb = get_peak_rss_mb()
+        if step._start_rss_mb is not None:
+            profile.peak_memory_mb = profile.max_rss_mb - step._start_rss_mb
+        profile.status = "error" if failed else "ok"
+        if step.rows is not None:
+            profile.rows = int(step.rows)
+            if wall_time_s > 0:
+                profile.rows_per_second = profile.rows / wall_time_s
+        if tracemalloc.is_tracing() and step._start_memory is not None:
+            step._peak_memory = max(step._peak_memory, tracemalloc.get_traced_memory()[1])
+            profile.peak_memory_mb = (step._peak_memory - step._start_memory) / 1024**2
+            if self._open_steps:
+                parent = self._open_steps[-1]
+                parent._peak_memory = max(parent._peak_memory, step._peak_memory)
+            tracemalloc.reset_peak()
+
+    def get_report(self) -> dict:
+        return {
+            "wall_time_s": self._wall_time_s,
+            "cpu_time_s": self._cpu_time_s,
+            "max_rss_mb": get_peak_rss_mb(),
+            "steps": [asdict(profile) for profile in self.steps],
+        }
+
+    def get_metrics(self) -> dict:
+        """Flattens the steps into MLflow metrics named profile/<stage>/<sub-step>/<measure>"""
+        metrics = {}
+
+        def add_step(profile, prefix):
+            name = f"{prefix}/{profile['name']}"
+            for key in ("wall_time_s", "cpu_time_s", "peak_memory_mb", "rows_per_second"):
+                if profile[key] is not None:
+                    metrics[f"{name}/{key}"] = profile[key]
+            for sub_step in profile["steps"]:
+                add_step(sub_step, name)
+
+        report = self.get_report()
+        for profile in report["steps"]:
+            add_step(profile, "profile")
+        metrics["profile/wall_time_s"] = report["wall_time_s"]
+        metrics["profile/cpu_time_s"] = report["cpu_time_s"]
+        metrics["profile/max_rss_mb"] = report["max_rss_mb"]
+        return metrics
+
+    def write_report(self, file_path: str) -> dict:
+        try:
+            report = self.get_report()
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            logging.info(f"Pipeline profile report written to {file_path}")
+            return report
+        except Exception as e:
+            raise NetworkSecurityException(e, sys) from e
+
+
+class profile_step(ContextDecorator):
+    """
+    Marks a pipeline stage or sub-step, as a context manager or decorator. Its duration is
+    always logged with timed_stage, and recorded by the active PipelineProfiler if there is
+    one. Set rows to the number of rows the step processed to get its throughput.
+
+        with profile_step("ks_drift") as step:
+            ...
+            step.rows = len(df)
+    """
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        self.rows = rows
+        self.profile = None
+        self._start_memory = None
+        self._peak_memory = 0
+        self._start_rss_mb = None
+
+    def _recreate_cm(self):
+        # a fresh instance per decorated call
+        return type(self)(self.name, self.rows)
+
+    def __enter__(self):
+        self._profiler = _current_profiler.get()
+        self._timing = timed_stage(self.name).__enter__()
+        if self._profiler is not None:
+            self.profile = self._profiler._enter_step(self)
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time_s = time.perf_counter() - self._wall_start
+        cpu_time_s = time.process_time() - self._cpu_start
+        if self.rows is not None:
+            self._timing.fields["rows"] = int(self.rows)
+        if self._profiler is not None:
+            self._profiler._exit_step(self, wall_time_s, cpu_time_s, failed=exc_type is not None)
+            self._timing.fields.update(
+                cpu_time_s=self.profile.cpu_time_s,
+                peak_memory_mb=self.profile.peak_memory_mb,
+                rows_per_second=self.profile.rows_per_second,
+            )
+        return self._timing.__exit__(exc_type, exc_value, traceback)
@@ -1,13 +1,21 @@
 import yaml
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.ml_utils.metric.classification_metric import get_r2_score
+from networksecurity.utils.ml_utils.model.checkpoint import CheckpointedEstimator
 import os,sys
+import hashlib
+import time
 import numpy as np
+import pandas as pd
 #import dill
-import pickle
+import joblib
+from concurrent.futures import ThreadPoolExecutor
 
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
+from joblib import Parallel, delayed, effective_n_jobs, parallel_config
+from threadpoolctl import threadpool_limits
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV
 
 def read_yaml_file(file_path: str) -> dict:
     try:
@@ -41,67 +49,289 @@ def save_numpy_array_data(file_path: str, array: np.array):
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
     
-def save_object(file_path: str, obj: object) -> None:
+def save_object(file_path: str, obj: object, compress: int = 0) -> None:
+    """
+    Saves obj with joblib. Uncompressed, the numpy arrays inside the object are written raw
+    and aligned, so load_object can memory-map them. compress (0-9) trades that for a
+    smaller file, e.g. for transfer.
+    The file is written next to the target and moved into place, so processes that have
+    the old file memory-mapped keep reading a consistent copy.
+    """
     try:
-        logging.info("Entered the save_object method of MainUtils class")
+        logging.debug("Entered the save_object method of MainUtils class")
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
-        logging.info("Exited the save_object method of MainUtils class")
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp_file_path, compress=compress)
+        os.replace(tmp_file_path, file_path)
+        logging.debug("Exited the save_object method of MainUtils class")
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
     
-def load_object(file_path: str, ) -> object:
+def load_object(file_path: str, mmap_mode: str = None) -> object:
+    """
+    Loads an object saved with save_object, or a plain pickle file.
+    mmap_mode: str if set (e.g. "r"), numpy arrays in uncompressed files are memory-mapped
+    instead of read into RAM, so processes loading the same file share its pages
+    """
     try:
         if not os.path.exists(file_path):
             raise Exception(f"The file: {file_path} is not exists")
-        with open(file_path, "rb") as file_obj:
-            print(file_obj)
-            return pickle.load(file_obj)
+        return joblib.load(file_path, mmap_mode=mmap_mode)
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
     
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: str if set (e.g. "r"), the array is memory-mapped instead of read into RAM
     return: np.array data loaded
     """
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path, "rb") as file_obj:
             return np.load(file_obj)
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
-    
 
 
-def evaluate_models(X_train, y_train,X_test,y_test,models,param):
+def get_file_checksum(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    sha256 hex digest of a file, read in chunks
+    """
     try:
-        report = {}
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_row_hashes(x: np.ndarray, y: np.ndarray, chunk_size: int = 100_000) -> np.ndarray:
+    """
+    64 bit hash of every (features, target) row, computed chunk by chunk so memory-mapped
+    arrays are not copied whole. Identical rows get the same hash.
+    """
+    try:
+        hashes = np.empty(len(x), dtype=np.uint64)
+        for start in range(0, len(x), chunk_size):
+            end = start + chunk_size
+            rows = pd.DataFrame(np.column_stack([x[start:end], y[start:end]]))
+            hashes[start:end] = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+        return hashes
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_csv_shard_ranges(file_path: str, n_shards: int):
+    """
+    Splits a csv file into at most n_shards byte ranges of about equal size. Every range is
+    moved to the next line boundary, so each holds whole rows, and the file is not scanned.
+    file_path: str location of the csv file
+    n_shards: int number of ranges
+    return: header line (bytes) and a list of (start, end) byte offsets
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as file_obj:
+            header = file_obj.readline()
+            data_start = file_obj.tell()
+            boundaries = [data_start]
+            for i in range(1, n_shards):
+                file_obj.seek(max(data_start + (file_size - data_start) * i // n_shards, boundaries[-1]))
+                if file_obj.tell() > data_start:
+                    file_obj.seek(file_obj.tell() - 1)
+                    file_obj.readline()
+                boundaries.append(file_obj.tell())
+            boundaries.append(file_size)
+        ranges = [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+        return header, ranges
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
 
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para=param[list(models.keys())[i]]
 
-            gs = GridSearchCV(model,para,cv=3)
-            gs.fit(X_train,y_train)
+def get_peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process in MB
+    """
+    try:
+        try:
+            import resource
+        except ImportError:
+            # resource is not available on Windows
+            import psutil
+
+            return psutil.Process().memory_info().peak_wset / 1024**2
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in KB on Linux
+        if sys.platform == "darwin":
+            return peak_rss / 1024**2
+        return peak_rss / 1024
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+    
+
+
+def _limit_estimator_threads(model, n_threads: int) -> dict:
+    """
+    Caps the threads an estimator spawns on its own (e.g. RandomForest n_jobs, XGBoost
+    n_jobs/nthread) and returns the original values so they can be restored.
+    Estimators left at their default already follow the OpenMP/BLAS limit of the worker.
+    """
+    params = model.get_params(deep=False)
+    original = {
+        key: params[key]
+        for key in ("n_jobs", "nthread")
+        if params.get(key) not in (None, n_threads)
+    }
+    if original:
+        model.set_params(**{key: n_threads for key in original})
+    return original
+
+
+def _fit_estimator(model, X, y, fit_params):
+    start = time.perf_counter()
+    model.fit(X, y, **fit_params)
+    return model, time.perf_counter() - start
+
 
-            model.set_params(**gs.best_params_)
-            model.fit(X_train,y_train)
+def _build_search(model, para, search_strategy, n_iter, n_jobs, random_state):
+    """
+    Creates the search object for the given strategy: "grid" tries every combination,
+    "random" samples n_iter combinations and "halving" evaluates all combinations on a
+    small subsample and keeps the best third for every threefold increase of samples.
+    random_state seeds the sampled combinations and the subsamples
+    """
+    if search_strategy == "grid":
+        return GridSearchCV(model,para,cv=3,n_jobs=n_jobs,refit=False)
+    if search_strategy == "random":
+        return RandomizedSearchCV(
+            model,para,n_iter=n_iter,cv=3,n_jobs=n_jobs,refit=False,random_state=random_state
+        )
+    if search_strategy == "halving":
+        return HalvingGridSearchCV(
+            model,para,cv=3,factor=3,min_resources="exhaust",n_jobs=n_jobs,refit=False,
+            random_state=random_state,
+        )
+    raise ValueError(f"Unknown search strategy: {search_strategy}")
+
+
+def _search_model_family(name, model, para, X_train, y_train, X_test, y_test, n_jobs,
+                         search_strategy, n_iter, random_state, fit_params, checkpoint_dir,
+                         checkpoint_lookup_pattern):
+    """
+    Runs the hyperparameter search of one model family on the shared worker pool and
+    refits the best candidate there as well
+    """
+    start = time.perf_counter()
+    original_threads = _limit_estimator_threads(model, 1)
+    search_estimator, search_para = model, para
+    if checkpoint_dir is not None:
+        # Every finished (parameters, fold) evaluation is saved and reused on the next search
+        search_estimator = CheckpointedEstimator(model, checkpoint_dir, checkpoint_lookup_pattern)
+        search_para = {f"estimator__{key}": value for key, value in para.items()}
+    # parallel_config is thread local, so every family thread sets it for its own searches.
+    # All searches submit to the same reusable loky pool of n_jobs processes, which is the
+    # global CPU budget, and BLAS/OpenMP inside the workers is limited to one thread.
+    with parallel_config(backend="loky", inner_max_num_threads=1):
+        # np.memmap inputs are passed to the joblib workers by file reference, not pickled copies
+        gs = _build_search(
+            search_estimator, search_para, search_strategy, n_iter, n_jobs, random_state
+        )
+        gs.fit(X_train,y_train,**fit_params)
+
+        best_params = gs.best_params_
+        if checkpoint_dir is not None:
+            best_params = {key.removeprefix("estimator__"): value for key, value in best_params.items()}
+        model.set_params(**best_params)
+        model, refit_time = Parallel(n_jobs=n_jobs)(
+            [delayed(_fit_estimator)(model, X_train, y_train, fit_params)]
+        )[0]
+    model.set_params(**original_threads)
 
-            #model.fit(X_train, y_train)  # Train model
+    y_test_pred = model.predict(X_test)
 
-            y_train_pred = model.predict(X_train)
+    test_model_score = float(get_r2_score(y_test, y_test_pred))
 
-            y_test_pred = model.predict(X_test)
+    wall_time = time.perf_counter() - start
+    # fit and score times are measured inside single threaded workers, so they add up to CPU time
+    cv_results = gs.cv_results_
+    cpu_time = float(
+        np.sum(cv_results["mean_fit_time"] + cv_results["mean_score_time"]) * gs.n_splits_
+        + refit_time
+    )
+    stats = {
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "cpu_utilization": cpu_time / (wall_time * n_jobs),
+        "n_candidates": len(cv_results["params"]),
+        "refit_time": refit_time,
+        "best_cv_score": float(gs.best_score_),
+    }
+    logging.info(
+        f"Searched {name} with {search_strategy} search: {stats['n_candidates']} evaluated candidates, "
+        f"best CV score {stats['best_cv_score']:.4f} with {best_params}, {wall_time:.1f}s wall, "
+        f"{cpu_time:.1f}s CPU ({stats['cpu_utilization']:.0%} of {n_jobs} cores)"
+    )
+    return model, test_model_score, stats
 
-            train_model_score = r2_score(y_train, y_train_pred)
 
-            test_model_score = r2_score(y_test, y_test_pred)
+def evaluate_models(X_train, y_train,X_test,y_test,models,param,n_jobs=None,return_stats=False,
+                    search_strategy="grid",n_iter=20,random_state=None,fit_params=None,
+                    checkpoint_dir=None,checkpoint_lookup_pattern=None):
+    """
+    Searches the hyperparameters of all model families in parallel under one CPU budget of
+    n_jobs cores, using the "grid", "random" (n_iter trials per family) or "halving" search
+    strategy. random_state seeds the "random" and "halving" searches, so a resumed search
+    evaluates the same candidates and folds as the interrupted one. fit_params optionally maps a family to extra keyword arguments of its fit
+    method, e.g. an eval_set for early stopping. If checkpoint_dir is set, every evaluation
+    is checkpointed there and evaluations found in checkpoint_dir or in the directories
+    matching checkpoint_lookup_pattern are not run again. The fitted best model of every
+    family is written back into models.
 
-            report[list(models.keys())[i]] = test_model_score
+    Returns the test score of every family, and the per family wall clock and CPU usage
+    if return_stats is True
+    """
+    try:
+        report = {}
+        stats = {}
+        fit_params = fit_params or {}
+        n_jobs = effective_n_jobs(n_jobs)
+        start = time.perf_counter()
 
+        # Family threads only dispatch work to the worker pool. Threads used by BLAS in this
+        # process are limited while they run, so predictions on the test set stay single threaded.
+        # At most n_jobs families are searched at once, with n_jobs=1 joblib fits in the
+        # family threads themselves and the families run one after the other.
+        max_workers = max(1, min(len(models), n_jobs))
+        with threadpool_limits(limits=1), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(
+                    _search_model_family,
+                    name, model, param[name], X_train, y_train, X_test, y_test, n_jobs,
+                    search_strategy, n_iter, random_state, fit_params.get(name, {}),
+                    checkpoint_dir, checkpoint_lookup_pattern,
+                )
+                for name, model in models.items()
+            }
+            for name, future in futures.items():
+                models[name], report[name], stats[name] = future.result()
+
+        wall_time = time.perf_counter() - start
+        cpu_time = sum(family_stats["cpu_time"] for family_stats in stats.values())
+        best_name = max(stats, key=lambda name: stats[name]["best_cv_score"])
+        logging.info(
+            f"Model search ({search_strategy}) finished in {wall_time:.1f}s wall, {cpu_time:.1f}s CPU "
+            f"({cpu_time / (wall_time * n_jobs):.0%} of {n_jobs} cores), "
+            f"best CV score {stats[best_name]['best_cv_score']:.4f} by {best_name}"
+        )
+
+        if return_stats:
+            return report, stats
         return report
 
     except Exception as e:
-        raise NetworkSecurityException(e, sys)
\ No newline at end of file
+        raise NetworkSecurityException(e, sys)
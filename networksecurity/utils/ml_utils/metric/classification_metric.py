@@ -1,18 +1,135 @@
 from networksecurity.entity.artifact_entity import ClassificationMetricArtifact
 from networksecurity.exception.exception import NetworkSecurityException
-from sklearn.metrics import f1_score,precision_score,recall_score
+import numpy as np
+from scipy.stats import rankdata
 import sys
 
-def get_classification_score(y_true,y_pred)->ClassificationMetricArtifact:
+
+def _safe_divide(numerator, denominator):
+    # sklearn's zero_division default: 0.0 where the denominator is zero
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator != 0)
+
+
+def get_confusion_counts(y_true, y_pred):
+    """
+    Counts the binary confusion matrix in one pass over the labels.
+
+    Args:
+      y_true: 0/1 labels of shape (n_samples,)
+      y_pred: 0/1 predictions of shape (n_samples,), or a stacked matrix of shape
+        (n_candidates, n_samples) to count every candidate at once
+
+    Returns:
+      tp, fp, fn, tn as arrays with the leading shape of y_pred
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    n_samples = y_true.shape[0]
+    n_positive = y_true.sum()
+    n_predicted_positive = y_pred.sum(axis=-1)
+    tp = y_pred @ y_true
+    fp = n_predicted_positive - tp
+    fn = n_positive - tp
+    tn = n_samples - tp - fp - fn
+    return tp, fp, fn, tn
+
+
+def _roc_auc_from_scores(y_true, y_score):
+    # Mann-Whitney U statistic with average ranks for ties, for one or many score rows
+    y_true = np.asarray(y_true).astype(bool)
+    ranks = rankdata(np.asarray(y_score, dtype=np.float64), axis=-1)
+    n_positive = y_true.sum()
+    n_negative = y_true.shape[0] - n_positive
+    rank_sum = ranks[..., y_true].sum(axis=-1)
+    roc_auc = _safe_divide(rank_sum - n_positive * (n_positive + 1) / 2, n_positive * n_negative)
+    # undefined with a single class in y_true, where sklearn raises
+    return np.where(n_positive * n_negative != 0, roc_auc, np.nan)
+
+
+def _scores_from_counts(tp, fp, fn, tn):
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    f1 = _safe_divide(2 * tp, 2 * tp + fp + fn)
+    accuracy = _safe_divide(tp + tn, tp + fp + fn + tn)
+    # with hard labels the ROC curve has a single threshold, so its area is the mean of TPR and TNR
+    # and like from scores it is undefined with a single class in y_true
+    roc_auc = np.where((tp + fn) * (tn + fp) != 0, (recall + _safe_divide(tn, tn + fp)) / 2, np.nan)
+    return f1, precision, recall, accuracy, roc_auc
+
+
+def get_r2_score(y_true, y_pred):
+    """
+    R2 of 0/1 predictions from the confusion matrix: the squared error is the number of
+    misclassified samples and the total sum of squares is n * p * (1 - p).
+    Like sklearn's r2_score with force_finite, constant labels score 1.0 when they are
+    predicted perfectly and 0.0 otherwise.
+    """
+    try:
+        if np.asarray(y_true).shape[0] == 0:
+            raise ValueError("R2 score is not defined for empty labels")
+        tp, fp, fn, tn = get_confusion_counts(y_true, y_pred)
+        n_samples = tp + fp + fn + tn
+        n_errors = fp + fn
+        n_positive = tp + fn
+        total_sum_of_squares = n_positive * (n_samples - n_positive) / n_samples
+        return np.where(
+            total_sum_of_squares != 0,
+            1 - _safe_divide(n_errors, total_sum_of_squares),
+            np.where(n_errors == 0, 1.0, 0.0),
+        )
+    except Exception as e:
+        raise NetworkSecurityException(e,sys)
+
+
+def get_f1_scores(y_true, y_preds):
+    """F1 of every row of a stacked (n_candidates, n_samples) prediction matrix"""
+    try:
+        tp, fp, fn, _ = get_confusion_counts(y_true, y_preds)
+        return _safe_divide(2 * tp, 2 * tp + fp + fn)
+    except Exception as e:
+        raise NetworkSecurityException(e,sys)
+
+
+def get_classification_scores(y_true, y_preds, y_scores=None)->list:
+    """
+    Scores many candidate predictions at once.
+
+    Args:
+      y_true: 0/1 labels of shape (n_samples,)
+      y_preds: stacked 0/1 predictions of shape (n_candidates, n_samples)
+      y_scores: optional stacked positive class scores of the same shape, used for ROC-AUC
+        instead of the hard labels
+
+    Returns:
+      A list with one ClassificationMetricArtifact per candidate
+    """
+    try:
+        y_preds = np.atleast_2d(y_preds)
+        f1, precision, recall, accuracy, roc_auc = _scores_from_counts(
+            *get_confusion_counts(y_true, y_preds)
+        )
+        if y_scores is not None:
+            roc_auc = _roc_auc_from_scores(y_true, np.atleast_2d(y_scores))
+
+        return [
+            ClassificationMetricArtifact(f1_score=float(f1[i]),
+                    precision_score=float(precision[i]),
+                    recall_score=float(recall[i]),
+                    accuracy_score=float(accuracy[i]),
+                    roc_auc_score=float(roc_auc[i]))
+            for i in range(y_preds.shape[0])
+        ]
+    except Exception as e:
+        raise NetworkSecurityException(e,sys)
+
+
+def get_classification_score(y_true,y_pred,y_score=None)->ClassificationMetricArtifact:
     try:
-            
-        model_f1_score = f1_score(y_true, y_pred)
-        model_recall_score = recall_score(y_true, y_pred)
-        model_precision_score=precision_score(y_true,y_pred)
-
-        classification_metric =  ClassificationMetricArtifact(f1_score=model_f1_score,
-                    precision_score=model_precision_score, 
-                    recall_score=model_recall_score)
-        return classification_metric
+        return get_classification_scores(
+            y_true, y_pred, y_scores=None if y_score is None else [y_score]
+        )[0]
     except Exception as e:
-        raise NetworkSecurityException(e,sys)
\ No newline at end of file
+        raise NetworkSecurityException(e,sys)
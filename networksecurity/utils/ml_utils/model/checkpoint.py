@@ -0,0 +1,116 @@
+import glob
+import json
+import os
+import shutil
+import sys
+
+import joblib
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+from networksecurity.exception.exception import NetworkSecurityException
+
+# Parameters that change how fast a model is fitted but not the fitted model
+_RUNTIME_PARAMS = ("n_jobs", "nthread", "verbose", "verbosity")
+
+
+class SearchCheckpointStore:
+    """
+    Stores one JSON file per finished evaluation in checkpoint_dir. Lookups fall back to the
+    checkpoint directories matching lookup_pattern (e.g. those of earlier runs), hits found
+    there are copied into checkpoint_dir.
+    """
+
+    def __init__(self, checkpoint_dir: str, lookup_pattern: str = None):
+        self.checkpoint_dir = checkpoint_dir
+        self.lookup_pattern = lookup_pattern
+
+    def _path(self, directory: str, key: str) -> str:
+        return os.path.join(directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            path = self._path(self.checkpoint_dir, key)
+            if os.path.exists(path):
+                with open(path) as file:
+                    return json.load(file)
+            if self.lookup_pattern:
+                for directory in sorted(glob.glob(self.lookup_pattern), reverse=True):
+                    previous_path = self._path(directory, key)
+                    if os.path.exists(previous_path):
+                        os.makedirs(self.checkpoint_dir, exist_ok=True)
+                        shutil.copyfile(previous_path, path)
+                        with open(path) as file:
+                            return json.load(file)
+            return None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def put(self, key: str, result: dict) -> None:
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            path = self._path(self.checkpoint_dir, key)
+            # Write to a temporary file first, so a crash never leaves a partial checkpoint
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(result, file)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+class CheckpointedEstimator(ClassifierMixin, BaseEstimator):
+    """
+    Wraps a classifier so that each (parameters, train fold, test fold) evaluation of a
+    hyperparameter search is saved to a SearchCheckpointStore as soon as it is scored.
+    Fitting is deferred until score() misses the checkpoint, so evaluations that already
+    finished in an interrupted or earlier search are not fitted again.
+    """
+
+    def __init__(self, estimator=None, checkpoint_dir=None, lookup_pattern=None):
+        self.estimator = estimator
+        self.checkpoint_dir = checkpoint_dir
+        self.lookup_pattern = lookup_pattern
+
+    def _store(self) -> SearchCheckpointStore:
+        return SearchCheckpointStore(self.checkpoint_dir, self.lookup_pattern)
+
+    def _params_hash(self) -> str:
+        params = {
+            name: value
+            for name, value in self.estimator.get_params(deep=True).items()
+            if name.rsplit("__", 1)[-1] not in _RUNTIME_PARAMS
+        }
+        return joblib.hash((type(self.estimator).__name__, params))
+
+    def fit(self, X, y, **fit_params):
+        self.fit_key_ = joblib.hash(
+            (self._params_hash(), joblib.hash(X), joblib.hash(y), joblib.hash(fit_params))
+        )
+        self._fit_data = (X, y, fit_params)
+        self._is_fitted = False
+        return self
+
+    def _ensure_fitted(self):
+        if not self._is_fitted:
+            X, y, fit_params = self._fit_data
+            self.estimator.fit(X, y, **fit_params)
+            self.classes_ = self.estimator.classes_
+            self._is_fitted = True
+
+    def score(self, X, y, sample_weight=None):
+        key = joblib.hash((self.fit_key_, joblib.hash(X), joblib.hash(y)))
+        store = self._store()
+        result = store.get(key)
+        if result is None:
+            self._ensure_fitted()
+            result = {"score": float(self.estimator.score(X, y, sample_weight=sample_weight))}
+            store.put(key, result)
+        return result["score"]
+
+    def predict(self, X):
+        self._ensure_fitted()
+        return self.estimator.predict(X)
+
+    def predict_proba(self, X):
+        self._ensure_fitted()
+        return self.estimator.predict_proba(X)
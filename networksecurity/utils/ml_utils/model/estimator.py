@@ -1,16 +1,25 @@
-from networksecurity.constant.training_pipeline import SAVED_MODEL_DIR,MODEL_FILE_NAME
+from networksecurity.constant.training_pipeline import (
+    SAVED_MODEL_DIR,
+    MODEL_FILE_NAME,
+    PREPROCESSOR_FILE_NAME,
+    MODEL_DISTILLATION_SURROGATE_MODEL_NAME,
+)
 
 import os
 import sys
+import time
 
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.utils import load_object, get_file_checksum
 
 class NetworkModel:
-    def __init__(self,preprocessor,model):
+    def __init__(self,preprocessor,model,metadata:dict=None):
         try:
             self.preprocessor = preprocessor
             self.model = model
+            # e.g. role, agreement rate with the teacher model and latency of distilled variants
+            self.metadata = metadata or {}
         except Exception as e:
             raise NetworkSecurityException(e,sys)
     
@@ -20,4 +29,43 @@ class NetworkModel:
             y_hat = self.model.predict(x_transform)
             return y_hat
         except Exception as e:
-            raise NetworkSecurityException(e,sys)
\ No newline at end of file
+            raise NetworkSecurityException(e,sys)
+
+    def predict_with_timings(self,x):
+        """
+        Same as predict, also returns the seconds spent in the preprocessor and in the model
+        """
+        try:
+            start = time.perf_counter()
+            x_transform = self.preprocessor.transform(x)
+            transformed = time.perf_counter()
+            y_hat = self.model.predict(x_transform)
+            timings = {"preprocessor": transformed - start, "model": time.perf_counter() - transformed}
+            return y_hat, timings
+        except Exception as e:
+            raise NetworkSecurityException(e,sys)
+
+
+def load_network_model(model_dir: str, fidelity_threshold: float = None, mmap_mode: str = None) -> NetworkModel:
+    """
+    Loads the model used for serving from model_dir. The distilled surrogate is preferred
+    if it was distilled from the current model and its agreement rate with it is at least
+    fidelity_threshold. mmap_mode is passed on to load_object.
+    """
+    try:
+        model_file_path = os.path.join(model_dir, MODEL_FILE_NAME)
+        surrogate_file_path = os.path.join(model_dir, MODEL_DISTILLATION_SURROGATE_MODEL_NAME)
+        if fidelity_threshold is not None and os.path.exists(surrogate_file_path):
+            surrogate = load_object(surrogate_file_path, mmap_mode=mmap_mode)
+            metadata = getattr(surrogate, "metadata", {})
+            if (
+                metadata.get("teacher_checksum") == get_file_checksum(model_file_path)
+                and metadata.get("agreement_rate", 0.0) >= fidelity_threshold
+            ):
+                logging.info(f"Serving the distilled {metadata.get('model_name')} surrogate model")
+                return surrogate
+        preprocessor = load_object(os.path.join(model_dir, PREPROCESSOR_FILE_NAME), mmap_mode=mmap_mode)
+        model = load_object(model_file_path, mmap_mode=mmap_mode)
+        return NetworkModel(preprocessor=preprocessor, model=model)
+    except Exception as e:
+        raise NetworkSecurityException(e,sys)
@@ -0,0 +1,65 @@
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from networksecurity.entity.artifact_entity import ModelProfileArtifact
+from networksecurity.exception.exception import NetworkSecurityException
+
+BATCH_SIZE = 1000
+
+
+def _time_predict(model, x) -> float:
+    start = time.perf_counter()
+    model.predict(x)
+    return (time.perf_counter() - start) * 1000
+
+
+def profile_model(model, x_sample, fit_time: float, f1_score: float, n_repeats: int = 100) -> ModelProfileArtifact:
+    """
+    Measures the inference cost of a fitted model: single row latency percentiles over
+    n_repeats calls, the median latency of a 1k row batch and the pickled size
+    """
+    try:
+        single_row_latencies = [
+            _time_predict(model, x_sample[i % len(x_sample) : i % len(x_sample) + 1])
+            for i in range(n_repeats)
+        ]
+        batch = np.take(x_sample, np.arange(BATCH_SIZE), axis=0, mode="wrap")
+        batch_latencies = [_time_predict(model, batch) for _ in range(max(n_repeats // 20, 1))]
+
+        return ModelProfileArtifact(
+            f1_score=float(f1_score),
+            fit_time=float(fit_time),
+            single_row_p50_ms=float(np.percentile(single_row_latencies, 50)),
+            single_row_p99_ms=float(np.percentile(single_row_latencies, 99)),
+            batch_1k_ms=float(np.median(batch_latencies)),
+            serialized_size_bytes=len(pickle.dumps(model)),
+        )
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def select_model(model_report: dict, model_profiles: dict, policy: str, latency_budget_ms: float) -> str:
+    """
+    Picks a model name according to the selection policy:
+    "best_score" takes the highest score in model_report,
+    "latency_budget" takes the highest F1 among the models whose single row p99 latency is
+    within latency_budget_ms, or the fastest model if none is
+    """
+    try:
+        if policy == "best_score":
+            return max(model_report, key=model_report.get)
+        if policy == "latency_budget":
+            within_budget = [
+                name
+                for name, profile in model_profiles.items()
+                if profile.single_row_p99_ms <= latency_budget_ms
+            ]
+            if not within_budget:
+                return min(model_profiles, key=lambda name: model_profiles[name].single_row_p99_ms)
+            return max(within_budget, key=lambda name: model_profiles[name].f1_score)
+        raise ValueError(f"Unknown model selection policy: {policy}")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,102 @@
+import queue
+import sys
+import threading
+from urllib.parse import urlparse
+
+import mlflow
+
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+
+class AsyncMlflowLogger:
+    """
+    Logs to a single MLflow run from a background thread, so callers only wait for
+    MLflow I/O when they call flush() or close()
+    """
+
+    def __init__(self, run_name: str = None):
+        try:
+            self.run_name = run_name
+            self._queue = queue.Queue()
+            self._errors = []
+            self._model_logged = False
+            self._thread = threading.Thread(
+                target=self._worker, name="mlflow-logger", daemon=True
+            )
+            self._thread.start()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _worker(self):
+        run = None
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    break
+                if run is None:
+                    run = mlflow.start_run(run_name=self.run_name)
+                func, args, kwargs = task
+                func(*args, **kwargs)
+            except Exception as e:
+                logging.error(f"MLflow logging failed: {e}")
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
+        if run is not None:
+            mlflow.end_run()
+
+    def _submit(self, func, *args, **kwargs):
+        if not self._thread.is_alive():
+            raise RuntimeError("AsyncMlflowLogger is already closed")
+        self._queue.put((func, args, kwargs))
+
+    def log_metrics(self, metrics: dict):
+        self._submit(mlflow.log_metrics, dict(metrics))
+
+    def log_params(self, params: dict):
+        self._submit(mlflow.log_params, dict(params))
+
+    def log_dict(self, dictionary: dict, artifact_file: str):
+        self._submit(mlflow.log_dict, dictionary, artifact_file)
+
+    def log_model(self, model):
+        """Logs the model artifact, only the first call per run writes it"""
+        if self._model_logged:
+            logging.warning("Model was already logged to this MLflow run, skipping")
+            return
+        self._model_logged = True
+        self._submit(self._log_model, model)
+
+    @staticmethod
+    def _log_model(model):
+        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
+        # Model registry does not work with file store
+        if tracking_url_type_store != "file":
+            # Register the model
+            # There are other ways to use the Model Registry, which depends on the use case,
+            # please refer to the doc for more information:
+            # https://mlflow.org/docs/latest/model-registry.html#api-workflow
+            mlflow.sklearn.log_model(
+                model, "model", registered_model_name=type(model).__name__
+            )
+        else:
+            mlflow.sklearn.log_model(model, "model")
+
+    def flush(self):
+        """Blocks until everything logged so far is written"""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """Flushes the pending logs and ends the MLflow run"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_errors()
+
+    def _raise_errors(self):
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise errors[0]
@@ -0,0 +1,242 @@
+"""
+In-process stand-ins for the Azure Batch and Blob Storage clients used by batch prediction.
+They implement only the calls the pipeline makes, keep everything in memory and count the
+calls, so sharding, polling and upload logic can be exercised without an Azure account.
+"""
+import collections
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+
+class ResourceExistsError(Exception):
+    pass
+
+
+class ResourceNotFoundError(Exception):
+    pass
+
+
+def _read_data(data) -> bytes:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if isinstance(data, str):
+        return data.encode()
+    if hasattr(data, "read"):
+        return data.read()
+    return b"".join(data)
+
+
+class FakeStorageStreamDownloader:
+    def __init__(self, data: bytes, chunk_size: int = 4 * 1024 * 1024):
+        self._data = data
+        self._chunk_size = chunk_size
+        self.size = len(data)
+
+    def readall(self) -> bytes:
+        return self._data
+
+    def readinto(self, stream) -> int:
+        stream.write(self._data)
+        return len(self._data)
+
+    def chunks(self):
+        for start in range(0, len(self._data), self._chunk_size):
+            yield self._data[start:start + self._chunk_size]
+
+
+class FakeBlobClient:
+    def __init__(self, service, container_name: str, blob_name: str):
+        self._service = service
+        self.container_name = container_name
+        self.blob_name = blob_name
+
+    @property
+    def _key(self):
+        return (self.container_name, self.blob_name)
+
+    def exists(self) -> bool:
+        return self._key in self._service.blobs
+
+    def upload_blob(self, data, overwrite: bool = False, **kwargs):
+        self._service.calls["upload_blob"] += 1
+        if self.exists() and not overwrite:
+            raise ResourceExistsError(f"The blob {self.blob_name} already exists")
+        self._service.blobs[self._key] = _read_data(data)
+        self._service.metadata[self._key] = kwargs.get("metadata") or {}
+
+    def stage_block(self, block_id, data, **kwargs):
+        self._service.calls["stage_block"] += 1
+        self._service.staged_blocks[(self._key, block_id)] = _read_data(data)
+
+    def commit_block_list(self, block_list, **kwargs):
+        self._service.calls["commit_block_list"] += 1
+        block_ids = [getattr(block, "id", block) for block in block_list]
+        data = b"".join(self._service.staged_blocks.pop((self._key, block_id)) for block_id in block_ids)
+        self._service.blobs[self._key] = data
+        self._service.metadata[self._key] = kwargs.get("metadata") or {}
+
+    def download_blob(self, **kwargs) -> FakeStorageStreamDownloader:
+        self._service.calls["download_blob"] += 1
+        if not self.exists():
+            raise ResourceNotFoundError(f"The blob {self.blob_name} does not exist")
+        return FakeStorageStreamDownloader(self._service.blobs[self._key], self._service.chunk_size)
+
+    def get_blob_properties(self):
+        if not self.exists():
+            raise ResourceNotFoundError(f"The blob {self.blob_name} does not exist")
+        return SimpleNamespace(
+            name=self.blob_name,
+            size=len(self._service.blobs[self._key]),
+            metadata=self._service.metadata[self._key],
+        )
+
+    def delete_blob(self):
+        self._service.blobs.pop(self._key, None)
+        self._service.metadata.pop(self._key, None)
+
+
+class FakeContainerClient:
+    def __init__(self, service, container_name: str):
+        self._service = service
+        self.container_name = container_name
+
+    def get_blob_client(self, blob) -> FakeBlobClient:
+        return FakeBlobClient(self._service, self.container_name, blob)
+
+    def upload_blob(self, name, data, overwrite: bool = False, **kwargs) -> FakeBlobClient:
+        blob_client = self.get_blob_client(name)
+        blob_client.upload_blob(data, overwrite=overwrite, **kwargs)
+        return blob_client
+
+    def delete_blob(self, blob):
+        self.get_blob_client(blob).delete_blob()
+
+    def list_blobs(self, name_starts_with: str = None):
+        for container_name, blob_name in sorted(self._service.blobs):
+            if container_name == self.container_name and blob_name.startswith(name_starts_with or ""):
+                yield self.get_blob_client(blob_name).get_blob_properties()
+
+
+class FakeBlobServiceClient:
+    """Blob store kept in a dict keyed by (container, blob name)"""
+
+    def __init__(self, chunk_size: int = 4 * 1024 * 1024):
+        self.chunk_size = chunk_size
+        self.blobs = {}
+        self.metadata = {}
+        self.staged_blocks = {}
+        self.calls = collections.Counter()
+
+    def get_container_client(self, container) -> FakeContainerClient:
+        return FakeContainerClient(self, container)
+
+    def get_blob_client(self, container, blob) -> FakeBlobClient:
+        return FakeBlobClient(self, container, blob)
+
+    def get_blob_client_from_url(self, url: str) -> FakeBlobClient:
+        container_name, blob_name = urlparse(url).path.lstrip("/").split("/", 1)
+        return self.get_blob_client(container_name, blob_name)
+
+
+class _FakeOperations:
+    def __init__(self, client):
+        self._client = client
+
+
+class _FakePoolOperations(_FakeOperations):
+    def add(self, pool):
+        self._client.calls["pool.add"] += 1
+        pool = dict(pool)
+        if pool["id"] in self._client.pools:
+            raise ResourceExistsError(f"The pool {pool['id']} already exists")
+        pool.setdefault("allocation_state", "steady")
+        pool.setdefault("state", "active")
+        self._client.pools[pool["id"]] = pool
+
+    def exists(self, pool_id) -> bool:
+        return pool_id in self._client.pools
+
+    def get(self, pool_id):
+        if pool_id not in self._client.pools:
+            raise ResourceNotFoundError(f"The pool {pool_id} does not exist")
+        return SimpleNamespace(**self._client.pools[pool_id])
+
+    def list(self):
+        return [SimpleNamespace(**pool) for pool in self._client.pools.values()]
+
+    def delete(self, pool_id):
+        self._client.calls["pool.delete"] += 1
+        self._client.pools.pop(pool_id, None)
+
+
+class _FakeJobOperations(_FakeOperations):
+    def add(self, job):
+        self._client.calls["job.add"] += 1
+        self._client.jobs[job["id"]] = dict(job)
+        self._client.tasks[job["id"]] = {}
+
+    def get(self, job_id):
+        return SimpleNamespace(**self._client.jobs[job_id])
+
+    def delete(self, job_id):
+        self._client.calls["job.delete"] += 1
+        self._client.jobs.pop(job_id, None)
+        self._client.tasks.pop(job_id, None)
+
+
+class _FakeTaskOperations(_FakeOperations):
+    def add(self, job_id, task):
+        self.add_collection(job_id, [task])
+
+    def add_collection(self, job_id, value):
+        self._client.calls["task.add_collection"] += 1
+        if len(value) > 100:
+            raise ValueError("A task collection holds at most 100 tasks")
+        for task in value:
+            self._client.tasks[job_id][task["id"]] = SimpleNamespace(
+                **task, state="active", execution_info=None, polls=0
+            )
+
+    def _advance(self, task):
+        # a task completes after it has been seen by polls_to_complete status calls
+        if task.state == "completed":
+            return
+        task.polls += 1
+        if task.polls >= self._client.polls_to_complete:
+            exit_code = self._client.task_runner(task) if self._client.task_runner else 0
+            task.state = "completed"
+            task.execution_info = SimpleNamespace(
+                exit_code=exit_code, result="success" if exit_code == 0 else "failure"
+            )
+
+    def get(self, job_id, task_id):
+        self._client.calls["task.get"] += 1
+        task = self._client.tasks[job_id][task_id]
+        self._advance(task)
+        return task
+
+    def list(self, job_id, **kwargs):
+        self._client.calls["task.list"] += 1
+        tasks = list(self._client.tasks[job_id].values())
+        for task in tasks:
+            self._advance(task)
+        return tasks
+
+
+class FakeBatchServiceClient:
+    """
+    Batch service with pool, job and task operations. Tasks complete after polls_to_complete
+    status calls; task_runner(task) is called at completion and returns the exit code, so it
+    can run the task's work in-process.
+    """
+
+    def __init__(self, task_runner=None, polls_to_complete: int = 1):
+        self.task_runner = task_runner
+        self.polls_to_complete = polls_to_complete
+        self.pools = {}
+        self.jobs = {}
+        self.tasks = {}
+        self.calls = collections.Counter()
+        self.pool = _FakePoolOperations(self)
+        self.job = _FakeJobOperations(self)
+        self.task = _FakeTaskOperations(self)
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# set before networksecurity.logging.logger is imported, so test runs do not write run logs
+# into the working tree
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="networksecurity-test-logs-"))
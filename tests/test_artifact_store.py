@@ -0,0 +1,114 @@
+import os
+import time
+from types import SimpleNamespace
+
+from networksecurity.pipeline import training_pipeline
+from networksecurity.pipeline.training_pipeline import TrainingPipeline
+from networksecurity.utils.main_utils.artifact_store import ArtifactStore
+
+RUN_NAME = "10_19_2026_08_00_00"
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_blob_names_of_a_stage(tmp_path):
+    run_dir = tmp_path / RUN_NAME
+    store = ArtifactStore(artifact_root=str(tmp_path))
+    _write(run_dir / "data_ingestion" / "train.csv", "rows")
+    _write(run_dir / "data_ingestion" / "test.csv", "other rows")
+    store.commit(str(run_dir), "data_ingestion")
+    # the same content as an earlier stage is stored once
+    _write(run_dir / "data_validation" / "train.csv", "rows")
+    _write(run_dir / "data_validation" / "report.yaml", "drift: false")
+    store.commit(str(run_dir), "data_validation")
+
+    all_blobs = store.get_blob_names(RUN_NAME)
+    validation_blobs = store.get_blob_names(RUN_NAME, "data_validation")
+
+    assert len(all_blobs) == 3
+    assert len(validation_blobs) == 2
+    assert set(validation_blobs) < set(all_blobs)
+    assert all(os.path.isfile(os.path.join(store.blob_dir, blob_name)) for blob_name in all_blobs)
+
+
+def test_stage_upload_sends_the_committed_blobs_and_manifest_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_pipeline, "ARTIFACT_STORE_ENABLED", True)
+    run_dir = tmp_path / RUN_NAME
+    _write(run_dir / "data_ingestion" / "train.csv", "rows")
+    _write(run_dir / "data_validation" / "report.yaml", "drift: false")
+    syncs = []
+    pipeline = TrainingPipeline.__new__(TrainingPipeline)
+    pipeline.training_pipeline_config = SimpleNamespace(artifact_dir=str(run_dir))
+    pipeline.artifact_store = ArtifactStore(artifact_root=str(tmp_path))
+    pipeline.background_s3_sync = SimpleNamespace(sync_folder_to_s3=lambda **kwargs: syncs.append(kwargs))
+    pipeline.artifact_store.commit(str(run_dir), "data_validation")
+
+    pipeline.queue_stage_artifact_upload("data_ingestion")
+
+    blob_sync, manifest_sync = syncs
+    assert blob_sync["folder"] == pipeline.artifact_store.blob_dir
+    assert blob_sync["file_paths"] == pipeline.artifact_store.get_blob_names(RUN_NAME, "data_ingestion")
+    assert len(blob_sync["file_paths"]) == 1
+    assert manifest_sync["folder"] == pipeline.artifact_store.manifest_dir
+    assert manifest_sync["file_paths"] == [f"{RUN_NAME}.json"]
+
+
+def _commit_run(store, tmp_path, run_name, content):
+    run_dir = tmp_path / run_name
+    _write(run_dir / "model_trainer" / "model.pkl", content)
+    store.commit(str(run_dir))
+    return store.get_blob_names(run_name)[0]
+
+
+def test_garbage_collection_keeps_new_blobs_and_temporary_files(tmp_path, monkeypatch):
+    store = ArtifactStore(artifact_root=str(tmp_path), retain_runs=1)
+    expired_blob = _commit_run(store, tmp_path, "10_18_2026_08_00_00", "old model")
+    kept_blob = _commit_run(store, tmp_path, RUN_NAME, "model")
+    tmp_blob = f"{expired_blob}.123.tmp"
+    _write(tmp_path / "blobs" / tmp_blob, "half written")
+    _write(tmp_path / "blobs" / f"{expired_blob}.123.link", "being linked")
+
+    # a commit running during the collection adds a blob no manifest refers to yet
+    new_file = tmp_path / "incoming" / "model.pkl"
+    read_manifest = store.read_manifest
+
+    def read_manifest_while_committing(run_name):
+        if not new_file.exists():
+            # filesystem timestamps may lag the clock by a tick
+            time.sleep(0.05)
+            _write(new_file, "new model")
+            store._store_file(str(new_file))
+        return read_manifest(run_name)
+
+    monkeypatch.setattr(store, "read_manifest", read_manifest_while_committing)
+    stats = store.collect_garbage()
+
+    blob_names = {
+        os.path.relpath(os.path.join(root, file_name), store.blob_dir)
+        for root, _, file_names in os.walk(store.blob_dir)
+        for file_name in file_names
+    }
+    assert stats["deleted_runs"] == 1
+    assert stats["deleted_blobs"] == 1
+    assert expired_blob not in blob_names
+    assert kept_blob in blob_names
+    assert {tmp_blob, f"{expired_blob}.123.link"} < blob_names
+    assert len(blob_names) == 4
+
+
+def test_manifests_not_named_by_a_timestamp_are_skipped(tmp_path):
+    store = ArtifactStore(artifact_root=str(tmp_path), retain_runs=1)
+    other_blob = _commit_run(store, tmp_path, "best_model", "best model")
+    _commit_run(store, tmp_path, "10_18_2026_08_00_00", "old model")
+    _commit_run(store, tmp_path, RUN_NAME, "model")
+
+    assert store.get_runs() == ["10_18_2026_08_00_00", RUN_NAME]
+    stats = store.collect_garbage()
+
+    assert stats["deleted_runs"] == 1
+    assert stats["deleted_blobs"] == 1
+    assert os.path.exists(store.get_manifest_path("best_model"))
+    assert os.path.isfile(os.path.join(store.blob_dir, other_blob))
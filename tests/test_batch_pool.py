@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from azure_fakes import FakeBatchServiceClient
+from networksecurity.cloud.batch_pool import (
+    SPEC_HASH_METADATA_NAME,
+    BatchPoolRegistry,
+    build_auto_scale_formula,
+    decide_pool_action,
+    get_target_nodes,
+)
+
+
+def _pool(state="active", spec_hash="spec"):
+    return SimpleNamespace(state=state, metadata=[{"name": SPEC_HASH_METADATA_NAME, "value": spec_hash}])
+
+
+@pytest.mark.parametrize(
+    "pool, action",
+    [
+        (None, "create"),
+        (_pool(state="deleting"), "wait"),
+        (_pool(spec_hash="older"), "recreate"),
+        (SimpleNamespace(state="active", metadata=None), "recreate"),
+        (_pool(), "reuse"),
+    ],
+)
+def test_decide_pool_action(pool, action):
+    assert decide_pool_action(pool, "spec") == action
+
+
+@pytest.mark.parametrize(
+    "pending_tasks, target_nodes",
+    [(-5, 0), (0, 0), (1, 1), (2, 1), (3, 2), (8, 4), (1000, 4)],
+)
+def test_target_nodes_stay_between_zero_and_max_nodes(pending_tasks, target_nodes):
+    assert get_target_nodes(pending_tasks, max_nodes=4, task_slots_per_node=2) == target_nodes
+
+
+def test_auto_scale_formula_uses_the_same_bounds():
+    formula = build_auto_scale_formula(max_nodes=4, task_slots_per_node=2, interval_minutes=5)
+    assert "$TargetDedicatedNodes = min(4, ceil($tasks / 2));" in formula
+    assert "max(0, $PendingTasks.GetSample(1))" in formula
+
+
+@pytest.fixture
+def batch_client():
+    return FakeBatchServiceClient()
+
+
+def test_pool_is_created_once_and_reused(batch_client):
+    registry = BatchPoolRegistry(batch_client, pool_id="pool", container_image="image:1")
+
+    for _ in range(3):
+        assert registry.get_or_create_pool() == "pool"
+        batch_client.job.add({"id": "job", "pool_info": {"pool_id": "pool"}})
+        batch_client.job.delete("job")
+
+    assert batch_client.calls["pool.add"] == 1
+    assert batch_client.calls["pool.delete"] == 0
+
+
+def test_pool_is_recreated_when_its_spec_changes(batch_client):
+    BatchPoolRegistry(batch_client, pool_id="pool", container_image="image:1").get_or_create_pool()
+    registry = BatchPoolRegistry(batch_client, pool_id="pool", container_image="image:2", sleep=lambda s: None)
+
+    registry.get_or_create_pool()
+
+    assert batch_client.calls["pool.delete"] == 1
+    assert batch_client.calls["pool.add"] == 2
+    pool = batch_client.pool.get("pool")
+    assert pool.virtual_machine_configuration["container_configuration"]["container_image_names"] == ["image:2"]
+    assert decide_pool_action(pool, registry.get_spec_hash()) == "reuse"
+
+
+def test_pool_in_deletion_is_waited_for(batch_client):
+    registry = BatchPoolRegistry(batch_client, pool_id="pool", container_image="image:1")
+    batch_client.pools["pool"] = {"id": "pool", "state": "deleting", "metadata": []}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        # the deletion finishes while the registry waits
+        if len(sleeps) == 2:
+            batch_client.pools.pop("pool")
+
+    registry._sleep = sleep
+    registry.get_or_create_pool(poll_interval=5.0)
+
+    assert sleeps == [5.0, 5.0]
+    assert batch_client.calls["pool.add"] == 1
+    assert batch_client.calls["pool.delete"] == 0
+
+
+def test_only_teardown_deletes_the_pool(batch_client):
+    registry = BatchPoolRegistry(batch_client, pool_id="pool", container_image="image:1")
+    registry.get_or_create_pool()
+    registry.get_or_create_pool()
+    assert batch_client.calls["pool.delete"] == 0
+
+    registry.teardown()
+    registry.teardown()
+
+    assert batch_client.calls["pool.delete"] == 1
+    assert not batch_client.pool.exists("pool")
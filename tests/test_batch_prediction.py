@@ -0,0 +1,161 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from azure_fakes import FakeBatchServiceClient, FakeBlobServiceClient
+from networksecurity.pipeline import batch_prediction
+from networksecurity.pipeline.batch_prediction import MAX_TASKS_PER_COLLECTION, BatchPrediction
+from networksecurity.utils.main_utils.utils import get_csv_shard_ranges
+
+HEADER = b"a,b,Result\n"
+
+
+def _write_csv(path, n_rows):
+    # rows of different lengths, so the even byte splits fall inside rows
+    rows = b"".join(f"{i},{'x' * (i % 7)},{i % 2}\n".encode() for i in range(n_rows))
+    path.write_bytes(HEADER + rows)
+    return rows
+
+
+@pytest.mark.parametrize("n_rows, n_shards", [(100, 1), (100, 3), (100, 8), (5, 8), (0, 4)])
+def test_csv_shard_ranges_hold_whole_rows(tmp_path, n_rows, n_shards):
+    file_path = tmp_path / "input.csv"
+    rows = _write_csv(file_path, n_rows)
+    content = file_path.read_bytes()
+
+    header, ranges = get_csv_shard_ranges(str(file_path), n_shards)
+
+    assert header == HEADER
+    assert len(ranges) <= n_shards
+    assert b"".join(content[start:end] for start, end in ranges) == rows
+    for start, end in ranges:
+        assert start < end
+        assert content[start - 1:start] == b"\n"
+        assert content[end - 1:end] == b"\n"
+
+
+@pytest.fixture
+def batch_client():
+    return FakeBatchServiceClient()
+
+
+@pytest.fixture
+def blob_client():
+    return FakeBlobServiceClient()
+
+
+@pytest.fixture
+def prediction(tmp_path, batch_client, blob_client):
+    _write_csv(tmp_path / "input.csv", 10)
+    return BatchPrediction(
+        str(tmp_path / "input.csv"), batch_client=batch_client, blob_client=blob_client,
+        sleep=lambda seconds: None,
+    )
+
+
+def test_tasks_are_added_in_collections_of_at_most_100(prediction, batch_client):
+    n_tasks = 2 * MAX_TASKS_PER_COLLECTION + 50
+    batch_client.job.add({"id": "job"})
+
+    task_ids = prediction._create_batch_tasks(
+        "job", [f"input-{i}" for i in range(n_tasks)], "model", "preprocessor", "script",
+        [f"output-{i}" for i in range(n_tasks)],
+    )
+
+    assert batch_client.calls["task.add_collection"] == 3
+    assert list(batch_client.tasks["job"]) == task_ids
+    assert len(set(task_ids)) == n_tasks
+    assert "input-249" in batch_client.tasks["job"][task_ids[-1]].command_line
+
+
+def _submit_tasks(batch_client, blob_client, n_tasks):
+    batch_client.job.add({"id": "job"})
+    batch_client.task.add_collection("job", [{"id": f"task-{i}"} for i in range(n_tasks)])
+    container_client = blob_client.get_container_client(batch_prediction.BATCH_PREDICTION_CONTAINER_NAME)
+    for i in range(n_tasks):
+        container_client.upload_blob(f"output-{i}.csv", f"Result\n{i}\n")
+    return {f"task-{i}": f"output-{i}.csv" for i in range(n_tasks)}
+
+
+def test_wait_for_tasks_backs_off_while_nothing_completes(prediction, batch_client, blob_client,
+                                                          tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_prediction, "BATCH_PREDICTION_POLL_INITIAL_INTERVAL", 1.0)
+    monkeypatch.setattr(batch_prediction, "BATCH_PREDICTION_POLL_MAX_INTERVAL", 4.0)
+    sleeps = []
+    prediction._sleep = sleeps.append
+    batch_client.polls_to_complete = 7
+    task_outputs = _submit_tasks(batch_client, blob_client, 2)
+    # the first task is three polls ahead, it completes on the fourth poll and the second on the seventh
+    batch_client.tasks["job"]["task-0"].polls = 3
+
+    part_paths = prediction._wait_for_tasks("job", task_outputs, str(tmp_path))
+
+    # the interval doubles up to the maximum and starts over once a task completes
+    assert sleeps == [2.0, 4.0, 4.0, 1.0, 2.0, 4.0]
+    assert sorted(part_paths) == ["task-0", "task-1"]
+    assert open(part_paths["task-1"]).read() == "Result\n1\n"
+    # one list call per poll, no per task status calls
+    assert batch_client.calls["task.list"] == 7
+    assert batch_client.calls["task.get"] == 0
+
+
+def test_wait_for_tasks_times_out(prediction, batch_client, blob_client, tmp_path, monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(batch_prediction, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(batch_prediction, "BATCH_PREDICTION_TIMEOUT", 100.0)
+    prediction._sleep = sleep
+    batch_client.polls_to_complete = 10**6
+    task_outputs = _submit_tasks(batch_client, blob_client, 2)
+
+    with pytest.raises(TimeoutError, match="2 batch tasks"):
+        prediction._wait_for_tasks("job", task_outputs, str(tmp_path))
+    assert 100.0 < clock.now <= 100.0 + batch_prediction.BATCH_PREDICTION_POLL_MAX_INTERVAL
+
+
+def test_wait_for_tasks_raises_on_failed_task(prediction, batch_client, blob_client, tmp_path):
+    batch_client.task_runner = lambda task: 1 if task.id == "task-1" else 0
+    task_outputs = _submit_tasks(batch_client, blob_client, 2)
+
+    with pytest.raises(Exception, match="task-1 failed with exit code 1"):
+        prediction._wait_for_tasks("job", task_outputs, str(tmp_path))
+
+
+def test_input_shards_are_uploaded_with_the_header(prediction, blob_client, tmp_path):
+    content = (tmp_path / "input.csv").read_bytes()
+    container_client = blob_client.get_container_client(batch_prediction.BATCH_PREDICTION_CONTAINER_NAME)
+    header, ranges = get_csv_shard_ranges(prediction.input_file_path, 3)
+
+    for i, (start, end) in enumerate(ranges):
+        prediction._upload_input_shard(header, start, end, f"part-{i}.csv")
+
+    shards = [container_client.get_blob_client(f"part-{i}.csv").download_blob().readall() for i in range(len(ranges))]
+    assert all(shard.startswith(HEADER) for shard in shards)
+    assert HEADER + b"".join(shard[len(HEADER):] for shard in shards) == content
+    assert prediction.upload_stats["uploaded_bytes"] == sum(map(len, shards))
+
+
+def test_model_and_script_are_uploaded_once(prediction, blob_client, tmp_path):
+    (tmp_path / "model.pkl").write_bytes(b"model")
+    (tmp_path / "preprocessor.pkl").write_bytes(b"preprocessor")
+    prediction.model_path = str(tmp_path / "model.pkl")
+    prediction.preprocessor_path = str(tmp_path / "preprocessor.pkl")
+
+    first_urls = prediction._upload_inputs("first")
+    first_stats = dict(prediction.upload_stats)
+    uploads = blob_client.calls["upload_blob"]
+    second_urls = prediction._upload_inputs("second")
+
+    # the content addressed blobs are found by name, only the input shards are uploaded again
+    assert second_urls[1:] == first_urls[1:]
+    assert blob_client.calls["upload_blob"] - uploads == len(second_urls[0])
+    assert first_stats["skipped_bytes"] == 0
+    shard_bytes = first_stats["uploaded_bytes"] - len(b"model") - len(b"preprocessor") - os.path.getsize(
+        os.path.join(os.path.dirname(batch_prediction.__file__), "batch_task.py")
+    )
+    assert prediction.upload_stats["uploaded_bytes"] == first_stats["uploaded_bytes"] + shard_bytes
+    assert prediction.upload_stats["skipped_bytes"] == first_stats["uploaded_bytes"] - shard_bytes
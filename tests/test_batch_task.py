@@ -0,0 +1,63 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from sklearn.tree import DecisionTreeClassifier
+
+from azure_fakes import FakeBlobServiceClient
+from networksecurity.constant.training_pipeline import TARGET_COLUMN
+from networksecurity.pipeline.batch_task import stream_predictions
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+
+DATA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "Network_Data", "phisingData.csv")
+
+
+@pytest.fixture(scope="module")
+def labelled_data():
+    return pd.read_csv(DATA_FILE_PATH, nrows=3000)
+
+
+@pytest.fixture(scope="module")
+def data(labelled_data):
+    return labelled_data.drop(columns=[TARGET_COLUMN])
+
+
+@pytest.fixture(scope="module")
+def network_model(labelled_data, data):
+    preprocessor = KNNImputer().fit(data)
+    model = DecisionTreeClassifier(random_state=0).fit(
+        preprocessor.transform(data), labelled_data[TARGET_COLUMN]
+    )
+    return NetworkModel(preprocessor=preprocessor, model=model)
+
+
+@pytest.mark.parametrize("max_upload_concurrency", [1, 4])
+def test_streamed_predictions_match_a_single_predict(data, network_model, max_upload_concurrency):
+    input_csv = data.to_csv(index=False).encode()
+    # small download chunks, so the rows are cut at arbitrary bytes and there are many blocks
+    blob_client = FakeBlobServiceClient(chunk_size=4096)
+    input_blob = blob_client.get_blob_client("container", "input.csv")
+    input_blob.upload_blob(input_csv)
+    output_blob = blob_client.get_blob_client("container", "predictions.csv")
+
+    n_rows = stream_predictions(
+        input_blob, network_model, output_blob, max_upload_concurrency=max_upload_concurrency
+    )
+
+    expected = pd.DataFrame(network_model.predict(data), columns=["prediction"])
+    assert n_rows == len(data)
+    assert blob_client.calls["stage_block"] > len(input_csv) // 4096
+    assert blob_client.calls["commit_block_list"] == 1
+    assert output_blob.download_blob().readall() == expected.to_csv(index=False).encode()
+
+
+def test_streaming_an_empty_csv_writes_the_header_only(data, network_model):
+    blob_client = FakeBlobServiceClient()
+    input_blob = blob_client.get_blob_client("container", "input.csv")
+    input_blob.upload_blob(data.iloc[:0].to_csv(index=False))
+    output_blob = blob_client.get_blob_client("container", "predictions.csv")
+
+    assert stream_predictions(input_blob, network_model, output_blob) == 0
+    assert pd.read_csv(io.BytesIO(output_blob.download_blob().readall())).columns.tolist() == ["prediction"]
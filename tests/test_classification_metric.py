@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score,
+    f1_score,
+    precision_score,
+    r2_score,
+    recall_score,
+    roc_auc_score,
+)
+
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.metric.classification_metric import (
+    get_classification_score,
+    get_classification_scores,
+    get_r2_score,
+)
+
+LABEL_CASES = [
+    ([0, 1, 1, 0, 1], [0, 1, 0, 0, 1]),
+    ([0, 1, 1, 0], [1, 0, 0, 1]),
+    ([0, 0, 1, 1, 1, 0, 1], [0, 0, 0, 0, 0, 0, 0]),
+    ([1, 0, 0, 0, 0, 1], [1, 1, 1, 1, 1, 1]),
+]
+SINGLE_CLASS_CASES = [
+    ([1, 1, 1, 1], [1, 0, 1, 1]),
+    ([0, 0, 0], [0, 1, 0]),
+    ([0, 0, 0], [0, 0, 0]),
+]
+
+
+def _sklearn_scores(y_true, y_pred):
+    return {
+        "f1_score": f1_score(y_true, y_pred, zero_division=0),
+        "precision_score": precision_score(y_true, y_pred, zero_division=0),
+        "recall_score": recall_score(y_true, y_pred, zero_division=0),
+        "accuracy_score": accuracy_score(y_true, y_pred),
+    }
+
+
+def _assert_matches_sklearn(metric, y_true, y_pred):
+    for name, expected in _sklearn_scores(y_true, y_pred).items():
+        assert getattr(metric, name) == pytest.approx(expected), name
+
+
+@pytest.mark.parametrize(
+    "y_true, y_pred",
+    [
+        ([0, 1, 1, 0, 1], [0, 1, 0, 0, 1]),
+        ([0, 1, 1, 0], [1, 0, 0, 1]),
+        ([1, 1, 1, 1], [1, 1, 1, 1]),
+        ([1, 1, 1, 1], [0, 0, 0, 0]),
+        ([0, 0, 0], [0, 1, 0]),
+    ],
+)
+def test_r2_score_matches_sklearn(y_true, y_pred):
+    assert float(get_r2_score(np.array(y_true), np.array(y_pred))) == pytest.approx(
+        r2_score(y_true, y_pred)
+    )
+
+
+def test_r2_score_rejects_empty_labels():
+    with pytest.raises(NetworkSecurityException):
+        get_r2_score(np.array([]), np.array([]))
+
+
+@pytest.mark.parametrize("y_true, y_pred", LABEL_CASES)
+def test_classification_score_matches_sklearn(y_true, y_pred):
+    metric = get_classification_score(np.array(y_true), np.array(y_pred))
+    _assert_matches_sklearn(metric, y_true, y_pred)
+    assert metric.roc_auc_score == pytest.approx(roc_auc_score(y_true, y_pred))
+
+
+@pytest.mark.parametrize("y_true, y_pred", SINGLE_CLASS_CASES)
+def test_classification_score_with_a_single_class(y_true, y_pred):
+    metric = get_classification_score(np.array(y_true), np.array(y_pred))
+    _assert_matches_sklearn(metric, y_true, y_pred)
+    # sklearn raises, ROC-AUC is not defined without both classes
+    assert math.isnan(metric.roc_auc_score)
+    y_score = np.array(y_pred, dtype=float)
+    assert math.isnan(get_classification_score(np.array(y_true), np.array(y_pred), y_score).roc_auc_score)
+
+
+@pytest.mark.parametrize(
+    "y_true, y_score",
+    [
+        ([0, 1, 1, 0, 1], [0.1, 0.8, 0.4, 0.35, 0.9]),
+        ([0, 1, 1, 0, 1], [0.5, 0.5, 0.2, 0.5, 0.9]),
+        ([0, 1, 1, 0], [0.3, 0.3, 0.3, 0.3]),
+        ([1, 0, 0, 1, 0], [0.9, 0.8, 0.7, 0.6, 0.5]),
+    ],
+)
+def test_roc_auc_from_scores_matches_sklearn(y_true, y_score):
+    y_pred = (np.array(y_score) > 0.5).astype(int)
+    metric = get_classification_score(np.array(y_true), y_pred, np.array(y_score))
+    assert metric.roc_auc_score == pytest.approx(roc_auc_score(y_true, y_score))
+    _assert_matches_sklearn(metric, y_true, y_pred)
+
+
+def test_batched_scores_match_sklearn_per_candidate():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=200)
+    y_scores = rng.random(size=(6, 200))
+    # a constant candidate without positive predictions and one with constant scores
+    y_scores[4] = 0.0
+    y_scores[5] = 0.5
+    y_preds = (y_scores > 0.5).astype(int)
+
+    metrics = get_classification_scores(y_true, y_preds, y_scores)
+    assert len(metrics) == len(y_preds)
+    for metric, y_pred, y_score in zip(metrics, y_preds, y_scores):
+        _assert_matches_sklearn(metric, y_true, y_pred)
+        assert metric.roc_auc_score == pytest.approx(roc_auc_score(y_true, y_score))
+
+    hard_label_metrics = get_classification_scores(y_true, y_preds)
+    for metric, y_pred in zip(hard_label_metrics, y_preds):
+        assert metric.roc_auc_score == pytest.approx(roc_auc_score(y_true, y_pred))
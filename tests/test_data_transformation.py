@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from networksecurity.components.data_transformation import DataTransformation
+from networksecurity.constant.training_pipeline import TARGET_COLUMN
+
+N_TRAIN_ROWS = 10
+N_TEST_ROWS = 7
+
+
+def _write_csv(path, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], size=(n_rows, 4)), columns=["a", "b", "c", "d"])
+    # missing values for the imputer, in the first and in the last chunk
+    df.iloc[[1, n_rows - 1], 0] = np.nan
+    df.iloc[[2, n_rows - 2], 2] = np.nan
+    df[TARGET_COLUMN] = rng.choice([-1, 1], size=n_rows)
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _make_transformation(tmp_path, out_of_core, chunk_size=4, fit_sample_size=100, fit_sample_seed=0):
+    out_dir = tmp_path / ("out_of_core" if out_of_core else "in_memory")
+    config = SimpleNamespace(
+        out_of_core=out_of_core,
+        chunk_size=chunk_size,
+        fit_sample_size=fit_sample_size,
+        fit_sample_seed=fit_sample_seed,
+        transformed_train_file_path=str(out_dir / "train.npy"),
+        transformed_test_file_path=str(out_dir / "test.npy"),
+        transformed_train_target_file_path=str(out_dir / "train_target.npy"),
+        transformed_test_target_file_path=str(out_dir / "test_target.npy"),
+        transformed_object_file_path=str(out_dir / "preprocessing.pkl"),
+    )
+    validation_artifact = SimpleNamespace(
+        valid_train_file_path=_write_csv(tmp_path / "train.csv", N_TRAIN_ROWS, seed=0),
+        valid_test_file_path=_write_csv(tmp_path / "test.csv", N_TEST_ROWS, seed=1),
+    )
+    return DataTransformation(validation_artifact, config)
+
+
+@pytest.mark.parametrize("chunk_size", [3, 4, 6, N_TRAIN_ROWS, N_TRAIN_ROWS + 1])
+def test_chunked_transformation_matches_in_memory(tmp_path, monkeypatch, chunk_size):
+    # both modes also save the preprocessor to final_model/ below the working directory
+    monkeypatch.chdir(tmp_path)
+    in_memory = _make_transformation(tmp_path, out_of_core=False).initiate_data_transformation()
+    # the fit sample holds every row, so both modes fit the same imputer
+    chunked = _make_transformation(
+        tmp_path, out_of_core=True, chunk_size=chunk_size
+    ).initiate_data_transformation()
+
+    for name in (
+        "transformed_train_file_path",
+        "transformed_test_file_path",
+        "transformed_train_target_file_path",
+        "transformed_test_target_file_path",
+    ):
+        expected = np.load(getattr(in_memory, name))
+        actual = np.load(getattr(chunked, name))
+        assert actual.shape == expected.shape, name
+        np.testing.assert_allclose(actual, expected, err_msg=name)
+    assert not np.isnan(np.load(chunked.transformed_train_file_path)).any()
+    assert set(np.load(chunked.transformed_train_target_file_path)) <= {0.0, 1.0}
+
+
+def test_sample_data_is_reproducible(tmp_path):
+    transformation = _make_transformation(tmp_path, out_of_core=True, chunk_size=3, fit_sample_size=5)
+    file_path = transformation.data_validation_artifact.valid_train_file_path
+
+    sample, n_rows = transformation.sample_data(file_path)
+    assert n_rows == N_TRAIN_ROWS
+    assert len(sample) == 5
+    pd.testing.assert_frame_equal(transformation.sample_data(file_path)[0], sample)
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from sklearn.datasets import make_classification
+from sklearn.tree import DecisionTreeClassifier
+
+from networksecurity.utils.main_utils.utils import evaluate_models
+
+
+class ConcurrencyRecorder(DecisionTreeClassifier):
+    """Records how many fits run at the same time across all clones"""
+
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def fit(self, X, y, **fit_params):
+        cls = ConcurrencyRecorder
+        with cls.lock:
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        try:
+            time.sleep(0.01)
+            return super().fit(X, y, **fit_params)
+        finally:
+            with cls.lock:
+                cls.running -= 1
+
+
+def test_single_job_searches_one_family_at_a_time():
+    X, y = make_classification(n_samples=90, n_features=6, random_state=0)
+    ConcurrencyRecorder.max_running = 0
+    names = ["Tree A", "Tree B", "Tree C"]
+    models = {name: ConcurrencyRecorder(random_state=0) for name in names}
+    param = {name: {"max_depth": [1, 2, 3]} for name in names}
+
+    report = evaluate_models(X[:60], y[:60], X[60:], y[60:], models, param, n_jobs=1)
+
+    assert set(report) == set(names)
+    # with n_jobs=1 the fits run in the family threads of this process
+    assert ConcurrencyRecorder.max_running == 1
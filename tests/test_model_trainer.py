@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+from networksecurity.components.model_trainer import ModelTrainer
+from networksecurity.utils.main_utils.utils import get_row_hashes, save_numpy_array_data, save_object
+
+
+def _make_data(rng, n_rows, shifted=False):
+    X = rng.normal(size=(n_rows, 6))
+    # the shifted rows follow a different concept, so the new rounds must change predictions
+    signal = X[:, 0] - X[:, 2] if shifted else X[:, 0] + X[:, 1]
+    return X, (signal > 0).astype(float)
+
+
+@pytest.fixture
+def deployed(tmp_path):
+    rng = np.random.default_rng(0)
+    X_old, y_old = _make_data(rng, 2000)
+    X_new, y_new = _make_data(rng, 2000, shifted=True)
+    X_val, y_val = _make_data(rng, 500, shifted=True)
+    X_test, y_test = _make_data(rng, 500, shifted=True)
+    config = SimpleNamespace(
+        deployed_model_file_path=str(tmp_path / "model.pkl"),
+        deployed_training_rows_file_path=str(tmp_path / "training_rows.npy"),
+        warm_start_rounds=50,
+        early_stopping_rounds=10,
+        expected_accuracy=0.0,
+        profile_n_repeats=1,
+    )
+    trainer = ModelTrainer.__new__(ModelTrainer)
+    trainer.model_trainer_config = config
+    trainer.data_validation_artifact = None
+
+    def deploy(model):
+        save_object(config.deployed_model_file_path, model)
+        save_numpy_array_data(config.deployed_training_rows_file_path, np.unique(get_row_hashes(X_old, y_old)))
+
+    # the incremental run sees the old rows again, only the shifted ones are new
+    X_fit, y_fit = np.vstack([X_old, X_new]), np.concatenate([y_old, y_new])
+    return SimpleNamespace(
+        trainer=trainer, deploy=deploy, X_old=X_old, y_old=y_old, X_fit=X_fit, y_fit=y_fit,
+        X_val=X_val, y_val=y_val, X_test=X_test, y_test=y_test,
+    )
+
+
+def test_xgboost_warm_start_predicts_with_the_new_rounds(deployed):
+    model = XGBClassifier(n_estimators=300, early_stopping_rounds=10).fit(
+        deployed.X_old, deployed.y_old, eval_set=[(deployed.X_val, deployed.y_val)], verbose=False
+    )
+    model.set_params(early_stopping_rounds=None)
+    old_rounds = model.get_booster().num_boosted_rounds()
+    old_predictions = model.predict(deployed.X_test)
+    deployed.deploy(model)
+
+    name, retrained, _ = deployed.trainer.retrain_deployed_model(
+        deployed.X_fit, deployed.y_fit, deployed.X_val, deployed.y_val, deployed.X_test, deployed.y_test
+    )
+
+    assert name == "XGBoost"
+    assert retrained.get_booster().num_boosted_rounds() > old_rounds
+    # best_iteration was recomputed on the continued fit, so predict uses the new rounds
+    assert retrained.best_iteration >= old_rounds
+    predictions = retrained.predict(deployed.X_test)
+    np.testing.assert_array_equal(
+        predictions, retrained.predict(deployed.X_test, iteration_range=(0, retrained.best_iteration + 1))
+    )
+    assert (predictions != old_predictions).any()
+    assert (predictions == deployed.y_test).mean() > (old_predictions == deployed.y_test).mean()
+    assert retrained.get_params()["early_stopping_rounds"] is None
+
+
+def test_random_forest_warm_start_adds_trees_for_the_new_rows(deployed):
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(deployed.X_old, deployed.y_old)
+    deployed.deploy(model)
+
+    name, retrained, profiles = deployed.trainer.retrain_deployed_model(
+        deployed.X_fit, deployed.y_fit, deployed.X_val, deployed.y_val, deployed.X_test, deployed.y_test
+    )
+
+    assert name == "Random Forest"
+    assert list(profiles) == ["Random Forest"]
+    assert len(retrained.estimators_) == 20 + deployed.trainer.model_trainer_config.warm_start_rounds
+    assert len(deployed.trainer._training_row_hashes) == len(np.unique(get_row_hashes(deployed.X_fit, deployed.y_fit)))
+
+
+def test_deployed_model_is_kept_without_new_rows(deployed):
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(deployed.X_old, deployed.y_old)
+    deployed.deploy(model)
+
+    name, retrained, _ = deployed.trainer.retrain_deployed_model(
+        deployed.X_old, deployed.y_old, deployed.X_val, deployed.y_val, deployed.X_test, deployed.y_test
+    )
+
+    assert name == "Random Forest"
+    assert len(retrained.estimators_) == 20
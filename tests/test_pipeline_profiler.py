@@ -0,0 +1,58 @@
+import logging
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from networksecurity.pipeline.training_pipeline import TrainingPipeline
+from networksecurity.utils.main_utils.pipeline_profiler import PipelineProfiler, profile_step
+
+
+def _run_steps():
+    with profile_step("stage", rows=1000):
+        with profile_step("sub_step") as step:
+            data = np.ones(4 * 1024 * 1024)
+            step.rows = len(data)
+            del data
+
+
+def test_steps_are_nested_and_measured_without_tracing():
+    profiler = PipelineProfiler()
+    with profiler.activate():
+        assert not tracemalloc.is_tracing()
+        _run_steps()
+
+    stage = profiler.get_report()["steps"][0]
+    sub_step = stage["steps"][0]
+    assert (stage["name"], sub_step["name"]) == ("stage", "sub_step")
+    assert sub_step["rows"] == 4 * 1024 * 1024
+    assert sub_step["rows_per_second"] > 0
+    assert sub_step["peak_memory_mb"] >= 0
+    assert stage["peak_memory_mb"] >= sub_step["peak_memory_mb"]
+    assert "profile/stage/sub_step/wall_time_s" in profiler.get_metrics()
+
+
+def test_traced_peak_memory_is_per_step():
+    profiler = PipelineProfiler(trace_memory=True)
+    with profiler.activate():
+        assert tracemalloc.is_tracing()
+        _run_steps()
+    assert not tracemalloc.is_tracing()
+
+    stage = profiler.get_report()["steps"][0]
+    # the 32 MB array is counted in the sub-step and its parent
+    assert stage["steps"][0]["peak_memory_mb"] >= 32
+    assert stage["peak_memory_mb"] >= 32
+
+
+def test_profile_report_is_timed_as_its_own_stage(tmp_path, caplog):
+    pipeline = TrainingPipeline.__new__(TrainingPipeline)
+    pipeline.profiler = PipelineProfiler()
+    pipeline.training_pipeline_config = SimpleNamespace(profile_report_file_path=str(tmp_path / "profile.json"))
+    pipeline.mlflow_logger = SimpleNamespace(log_dict=lambda *args: None, log_metrics=lambda *args: None)
+
+    with caplog.at_level(logging.INFO, logger="networksecurity.timing"):
+        pipeline.write_profile_report()
+
+    stages = [record.stage for record in caplog.records if record.name == "networksecurity.timing"]
+    assert stages == ["profile_report"]
@@ -0,0 +1,115 @@
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from networksecurity.cloud.s3_syncer import BackgroundS3Sync, S3Sync, get_s3_etag
+
+BUCKET = "networksecurity-test"
+# the smallest part size S3 accepts
+CHUNK_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def s3_sync(s3_client):
+    return S3Sync(s3_client, max_concurrency=4, multipart_threshold=CHUNK_SIZE, multipart_chunksize=CHUNK_SIZE)
+
+
+@pytest.mark.parametrize("size", [0, 1000, CHUNK_SIZE, 2 * CHUNK_SIZE + 1])
+def test_etag_matches_s3(tmp_path, s3_client, s3_sync, size):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(bytes(range(256)) * (size // 256) + b"x" * (size % 256))
+
+    s3_client.upload_file(str(file_path), BUCKET, "file.bin", Config=s3_sync._get_transfer_config(2))
+
+    etag = s3_client.head_object(Bucket=BUCKET, Key="file.bin")["ETag"]
+    assert get_s3_etag(str(file_path), CHUNK_SIZE, CHUNK_SIZE) == etag
+    assert etag.endswith('-3"') == (size > 2 * CHUNK_SIZE)
+
+
+def test_files_in_sync_are_skipped(tmp_path, s3_sync):
+    folder = tmp_path / "artifact"
+    (folder / "model").mkdir(parents=True)
+    (folder / "report.yaml").write_text("drift: false\n")
+    (folder / "model" / "model.pkl").write_bytes(b"m" * (CHUNK_SIZE + 1))
+    url = f"s3://{BUCKET}/artifact/run"
+
+    first = s3_sync.sync_folder_to_s3(str(folder), url)
+    second = s3_sync.sync_folder_to_s3(str(folder), url)
+    (folder / "report.yaml").write_text("drift: true\n")
+    third = s3_sync.sync_folder_to_s3(str(folder), url)
+
+    assert (first["transferred_files"], first["skipped_files"]) == (2, 0)
+    assert (second["transferred_files"], second["skipped_files"]) == (0, 2)
+    assert (third["transferred_files"], third["skipped_files"]) == (1, 1)
+    assert third["transferred_bytes"] == len("drift: true\n")
+
+    download_folder = tmp_path / "download"
+    first = s3_sync.sync_folder_from_s3(str(download_folder), url)
+    second = s3_sync.sync_folder_from_s3(str(download_folder), url)
+    assert (first["transferred_files"], second["skipped_files"]) == (2, 2)
+    assert (download_folder / "report.yaml").read_text() == "drift: true\n"
+    assert (download_folder / "model" / "model.pkl").read_bytes() == b"m" * (CHUNK_SIZE + 1)
+
+
+@pytest.mark.parametrize("n_files", [0, 1, 3, 4, 100])
+def test_concurrency_stays_within_the_connection_budget(n_files):
+    file_concurrency, part_concurrency = S3Sync(max_concurrency=4).get_concurrency(n_files)
+    assert 1 <= file_concurrency * part_concurrency <= 4
+    assert file_concurrency == max(1, min(4, n_files))
+
+
+def _list_keys(s3_client):
+    return sorted(obj["Key"] for obj in s3_client.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def test_temporary_files_are_not_uploaded(tmp_path, s3_client, s3_sync):
+    (tmp_path / "model.pkl").write_bytes(b"model")
+    (tmp_path / "model.pkl.123.tmp").write_bytes(b"partial")
+    (tmp_path / "data.csv.123.link").write_bytes(b"linked")
+
+    s3_sync.sync_folder_to_s3(str(tmp_path), f"s3://{BUCKET}/run")
+
+    assert _list_keys(s3_client) == ["run/model.pkl"]
+
+
+def test_files_removed_after_listing_are_skipped(tmp_path, s3_client, s3_sync):
+    (tmp_path / "model.pkl").write_bytes(b"model")
+
+    stats = s3_sync.sync_folder_to_s3(str(tmp_path), f"s3://{BUCKET}/run", file_paths=["model.pkl", "gone.pkl"])
+
+    assert (stats["transferred_files"], stats["skipped_files"]) == (1, 1)
+    assert _list_keys(s3_client) == ["run/model.pkl"]
+
+
+def test_background_sync_uploads_the_files_listed_when_queued(tmp_path, s3_client, s3_sync):
+    (tmp_path / "first.txt").write_text("first")
+    blocked = threading.Event()
+    s3_sync_folder_to_s3 = s3_sync.sync_folder_to_s3
+
+    def sync_folder_to_s3(*args):
+        blocked.wait()
+        return s3_sync_folder_to_s3(*args)
+
+    s3_sync.sync_folder_to_s3 = sync_folder_to_s3
+    background_s3_sync = BackgroundS3Sync(s3_sync)
+    background_s3_sync.sync_folder_to_s3(str(tmp_path), f"s3://{BUCKET}/run")
+    # written while the sync is queued
+    (tmp_path / "second.txt").write_text("second")
+    blocked.set()
+    background_s3_sync.close()
+
+    assert _list_keys(s3_client) == ["run/first.txt"]
+    assert background_s3_sync.stats[0]["transferred_files"] == 1
@@ -0,0 +1,75 @@
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.tree import DecisionTreeClassifier
+
+from networksecurity.utils.main_utils.utils import evaluate_models
+
+PARAMS = {"max_depth": [1, 2, 3, 4, 5, 6], "min_samples_leaf": [1, 2, 3, 4, 5]}
+N_ITER = 5
+N_SPLITS = 3
+
+
+class CountingClassifier(DecisionTreeClassifier):
+    """Counts its fits across clones and raises KeyboardInterrupt once interrupt_after fits ran"""
+
+    n_fits = 0
+    interrupt_after = None
+
+    def fit(self, X, y, **fit_params):
+        if CountingClassifier.n_fits == CountingClassifier.interrupt_after:
+            raise KeyboardInterrupt
+        CountingClassifier.n_fits += 1
+        return super().fit(X, y, **fit_params)
+
+
+@pytest.fixture
+def data():
+    X, y = make_classification(n_samples=120, n_features=6, random_state=0)
+    CountingClassifier.n_fits = 0
+    CountingClassifier.interrupt_after = None
+    return X[:90], y[:90], X[90:], y[90:]
+
+
+def _search(data, checkpoint_dir, search_strategy, random_state=0):
+    X_train, y_train, X_test, y_test = data
+    models = {"Decision Tree": CountingClassifier(random_state=0)}
+    evaluate_models(
+        X_train, y_train, X_test, y_test, models, {"Decision Tree": PARAMS}, n_jobs=1,
+        search_strategy=search_strategy, n_iter=N_ITER, random_state=random_state,
+        checkpoint_dir=str(checkpoint_dir),
+    )
+    return models["Decision Tree"]
+
+
+def test_interrupted_search_resumes_without_refitting(data, tmp_path):
+    n_evaluations = N_ITER * N_SPLITS
+    CountingClassifier.interrupt_after = 7
+    with pytest.raises(KeyboardInterrupt):
+        _search(data, tmp_path, "random")
+    assert len(list(tmp_path.glob("*.json"))) == 7
+
+    CountingClassifier.n_fits = 0
+    CountingClassifier.interrupt_after = None
+    _search(data, tmp_path, "random")
+    # only the evaluations missing from the checkpoint are fitted, plus the refit of the best model
+    assert CountingClassifier.n_fits == n_evaluations - 7 + 1
+    assert len(list(tmp_path.glob("*.json"))) == n_evaluations
+
+
+@pytest.mark.parametrize("search_strategy", ["grid", "random", "halving"])
+def test_repeated_search_only_refits_best_model(data, tmp_path, search_strategy):
+    first = _search(data, tmp_path, search_strategy)
+    assert CountingClassifier.n_fits > 1
+
+    CountingClassifier.n_fits = 0
+    second = _search(data, tmp_path, search_strategy)
+    assert CountingClassifier.n_fits == 1
+    assert second.get_params() == first.get_params()
+
+
+def test_search_with_another_seed_evaluates_new_candidates(data, tmp_path):
+    _search(data, tmp_path, "random", random_state=0)
+
+    CountingClassifier.n_fits = 0
+    _search(data, tmp_path, "random", random_state=1)
+    assert CountingClassifier.n_fits > 1
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from networksecurity.serving import metrics
+
+
+def test_import_has_no_side_effects():
+    assert metrics._metrics is None
+    assert metrics.MULTIPROC_DIR_ENV not in os.environ
+    # recording before setup_metrics is a no-op
+    metrics.record_request("GET", "/", 200, 0.1)
+    metrics.record_prediction(10, {"preprocessor": 0.1, "model": 0.2})
+    with metrics.track_in_flight():
+        pass
+    assert metrics.generate_metrics() == b""
+
+
+def test_metrics_of_forked_workers_are_added_up(tmp_path):
+    # setup_metrics changes process wide prometheus_client state, so it runs in its own interpreter
+    script = textwrap.dedent(f"""
+        import os
+        import subprocess
+        import sys
+        from networksecurity.serving import metrics
+
+        multiproc_dir = metrics.setup_metrics({str(tmp_path / "metrics")!r})
+        metrics.record_model_load(0.5)
+        for _ in range(2):
+            pid = os.fork()
+            if pid == 0:
+                metrics.record_request("POST", "/predict", 200, 0.1)
+                os._exit(0)
+            os.waitpid(pid, 0)
+            metrics.mark_worker_dead(pid)
+        with metrics.hide_metrics_dir():
+            child_env = subprocess.run(
+                [sys.executable, "-c", "import os; print(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))"],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        assert child_env == "None", child_env
+        assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == multiproc_dir
+        sys.stdout.write(metrics.generate_metrics().decode())
+    """)
+    env = {key: value for key, value in os.environ.items() if key != metrics.MULTIPROC_DIR_ENV}
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env,
+    ).stdout
+
+    assert 'http_requests_total{method="POST",route="/predict",status_code="200"} 2.0' in output
+    assert "model_loads_total 1.0" in output
+    assert "model_load_duration_seconds 0.5" in output